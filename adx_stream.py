@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量 ADX 计算
+算法与 momentum.calc_adx 完全一致（TR/+DM/-DM/DX 均为 period 日简单移动平均），
+但只保留最近 period 个窗口值和前一根 bar，新 bar 到来时 O(1) 更新
+- update()：提交一根已收盘的 bar
+- preview()：假设当前未收盘的 bar 此刻收盘，计算 ADX 但不改变状态（盘中使用）
+- on_tick()：盘中逐笔价格更新当日高低点，返回 preview 结果
+状态可保存为 JSON，下次运行接着算
+"""
+
+import os
+import json
+import math
+from collections import deque
+
+class StreamingADX:
+    def __init__(self, period=14):
+        self.period = period
+        self.prev = None                    # 上一根 bar 的 (high, low, close)
+        self.last_date = None               # 最后提交的 bar 日期（YYYY-MM-DD）
+        self.tr = deque(maxlen=period)
+        self.plus_dm = deque(maxlen=period)
+        self.minus_dm = deque(maxlen=period)
+        self.dx = deque(maxlen=period)
+        self.value = math.nan               # 最新已提交 bar 的 ADX
+        self._partial = None                # 盘中未收盘 bar [high, low, close]
+
+    # ---------- 计算 ----------
+    @staticmethod
+    def _mean(window, period):
+        # 与 pandas rolling(period).mean() 一致：不足 period 个或含 NaN 时为 NaN
+        if len(window) < period:
+            return math.nan
+        return sum(window) / period
+
+    def _step(self, high, low, close):
+        """计算加入一根 bar 后的各窗口新值，返回 (tr, plus_dm, minus_dm, dx, adx)，不修改状态"""
+        if self.prev is None:
+            tr, plus_dm, minus_dm = high - low, 0.0, 0.0
+        else:
+            p_high, p_low, p_close = self.prev
+            tr = max(high - low, abs(high - p_close), abs(low - p_close))
+            up_move = high - p_high
+            down_move = p_low - low
+            plus_dm = up_move if (up_move > down_move and up_move > 0) else 0.0
+            minus_dm = down_move if (down_move > up_move and down_move > 0) else 0.0
+
+        n = self.period
+        atr = self._mean(list(self.tr)[-(n - 1):] + [tr] if n > 1 else [tr], n)
+        plus = self._mean(list(self.plus_dm)[-(n - 1):] + [plus_dm] if n > 1 else [plus_dm], n)
+        minus = self._mean(list(self.minus_dm)[-(n - 1):] + [minus_dm] if n > 1 else [minus_dm], n)
+        dx = math.nan
+        if not (math.isnan(atr) or atr == 0):
+            plus_di = 100 * plus / atr
+            minus_di = 100 * minus / atr
+            if plus_di + minus_di != 0:
+                dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+        adx = self._mean(list(self.dx)[-(n - 1):] + [dx] if n > 1 else [dx], n)
+        return tr, plus_dm, minus_dm, dx, adx
+
+    def update(self, high, low, close, date=None):
+        """提交一根已收盘的 bar，返回最新 ADX；date 不晚于 last_date 的 bar 会被忽略"""
+        if date is not None and self.last_date is not None and str(date) <= self.last_date:
+            return self.value
+        tr, plus_dm, minus_dm, dx, adx = self._step(high, low, close)
+        self.tr.append(tr)
+        self.plus_dm.append(plus_dm)
+        self.minus_dm.append(minus_dm)
+        self.dx.append(dx)
+        self.prev = (high, low, close)
+        self.value = adx
+        self._partial = None
+        if date is not None:
+            self.last_date = str(date)
+        return adx
+
+    def preview(self, high, low, close):
+        """假设当前 bar 此刻收盘时的 ADX（不改变状态）"""
+        return self._step(high, low, close)[-1]
+
+    def on_tick(self, price, high=None, low=None):
+        """盘中价格更新：维护当日高低点并返回预估 ADX；high/low 可直接传入行情源给出的当日高低"""
+        if self._partial is None:
+            self._partial = [price, price, price]
+        bar = self._partial
+        bar[0] = max(bar[0], price if high is None else high)
+        bar[1] = min(bar[1], price if low is None else low)
+        bar[2] = price
+        return self.preview(*bar)
+
+    # ---------- 批量 ----------
+    def warm_up(self, df, until=None):
+        """用 DataFrame[date, high, low, close] 逐根提交（until 为截止行号，不含）"""
+        rows = df.iloc[:until] if until is not None else df
+        for date, high, low, close in zip(rows['date'], rows['high'], rows['low'], rows['close']):
+            self.update(float(high), float(low), float(close), date=_date_str(date))
+        return self.value
+
+    # ---------- 持久化 ----------
+    def to_dict(self):
+        return {
+            'period': self.period,
+            'prev': list(self.prev) if self.prev else None,
+            'last_date': self.last_date,
+            'tr': list(self.tr),
+            'plus_dm': list(self.plus_dm),
+            'minus_dm': list(self.minus_dm),
+            'dx': [None if math.isnan(v) else v for v in self.dx],
+            'value': None if math.isnan(self.value) else self.value,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        obj = cls(data['period'])
+        obj.prev = tuple(data['prev']) if data.get('prev') else None
+        obj.last_date = data.get('last_date')
+        obj.tr.extend(data.get('tr', []))
+        obj.plus_dm.extend(data.get('plus_dm', []))
+        obj.minus_dm.extend(data.get('minus_dm', []))
+        obj.dx.extend(math.nan if v is None else v for v in data.get('dx', []))
+        obj.value = math.nan if data.get('value') is None else data['value']
+        return obj
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, period=None):
+        """读取状态；文件不存在、损坏或周期不一致时返回 None"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                obj = cls.from_dict(json.load(f))
+        except Exception as e:
+            print(f"⚠️ ADX 状态读取失败: {e}")
+            return None
+        if period is not None and obj.period != period:
+            return None
+        return obj
+
+def _date_str(date):
+    return date.strftime('%Y-%m-%d') if hasattr(date, 'strftime') else str(date)[:10]
+
+def market_adx_from_state(df, path, period=14):
+    """
+    结合保存的状态计算最新 ADX：最后一根 bar 视为未收盘（只 preview），之前的 bar 增量提交
+    结果与对整段 df 调用 calc_adx 后取最后一个值一致；状态缺失或与数据不衔接时从头重建
+    """
+    if df is None or df.empty:
+        return None
+    dates = [_date_str(d) for d in df['date']]
+    state = StreamingADX.load(path, period)
+    if state is None or state.last_date is None or state.last_date not in dates[:-1]:
+        state = StreamingADX(period)
+        start = 0
+    else:
+        start = dates.index(state.last_date) + 1
+    # 简单移动平均只依赖最近 2*period 根 bar，所以增量结果与整段重算一致
+    for i in range(start, len(df) - 1):
+        state.update(float(df['high'].iloc[i]), float(df['low'].iloc[i]), float(df['close'].iloc[i]), date=dates[i])
+    state.save(path)
+    last = df.iloc[-1]
+    return state.preview(float(last['high']), float(last['low']), float(last['close']))
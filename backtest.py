@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轮动策略向量化回测
+按 momentum.py 的实盘决策逻辑逐日重放（全部在 NumPy 数组上完成）：
+    1. 各品种 MOMENTUM_PERIOD 日涨幅 × 事件因子 = 调整后动量，取最强品种
+    2. 市场 ADX 低于阈值视为震荡市（ADX 缺失时不过滤）
+    3. 最强动量 > SELL_THRESHOLD 且市场非震荡则全仓持有，否则持有 ETF_SAFE
+    4. 人工强制事件（force_ratio）优先：按比例配置指定品种，其余持有 ETF_SAFE；
+       同一天多个品种被强制时取优先级最高（event_force 中最先插入）且当日有动量的一个，
+       force_ratio 为 0 也算强制（0% 仓位，其余持有 ETF_SAFE）
+第 t 日收盘决策，第 t+1 日起承担持仓收益
+"""
+
+import numpy as np
+
+SAFE = -1                           # positions 中表示持有 ETF_SAFE
+SAFE_ANNUAL_RETURN = 0.02           # 货币 ETF 年化收益（未提供 safe_returns 时使用）
+
+# ====================== 工具函数 ======================
+def align_to_dates(dates, src_dates, values):
+    """把按 src_dates 排列的序列对齐到 dates（向前取最近一个值，之前为 NaN）"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    src_dates = np.asarray(src_dates, dtype='datetime64[D]')
+    values = np.asarray(values, dtype='float64')
+    idx = np.searchsorted(src_dates, dates, side='right') - 1
+    out = np.where(idx >= 0, values[np.clip(idx, 0, None)], np.nan)
+    return out
+
+def rolling_mean(x, period):
+    """与 pandas rolling(period).mean() 一致：窗口内有 NaN 或不足 period 个时为 NaN"""
+    x = np.asarray(x, dtype='float64')
+    out = np.full(len(x), np.nan)
+    if len(x) >= period:
+        out[period - 1:] = np.lib.stride_tricks.sliding_window_view(x, period).mean(axis=1)
+    return out
+
+def calc_adx_array(high, low, close, period=14):
+    """ADX 的纯 NumPy 实现，算法与 momentum.calc_adx 相同（简单移动平均）"""
+    high = np.asarray(high, dtype='float64')
+    low = np.asarray(low, dtype='float64')
+    close = np.asarray(close, dtype='float64')
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    prev_high = np.concatenate(([np.nan], high[:-1]))
+    prev_low = np.concatenate(([np.nan], low[:-1]))
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    atr = rolling_mean(tr, period)
+    up_move = high - prev_high
+    down_move = prev_low - low
+    with np.errstate(invalid='ignore'):
+        plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+        minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100 * (rolling_mean(plus_dm, period) / atr)
+        minus_di = 100 * (rolling_mean(minus_dm, period) / atr)
+        dx = 100 * (np.abs(plus_di - minus_di) / (plus_di + minus_di))
+    return rolling_mean(dx, period)
+
+def _top_assets(scores):
+    """每行最大值所在列与最大值，整行无效时列为 SAFE、值为 NaN"""
+    keyed = np.where(np.isnan(scores), -np.inf, scores)
+    top = np.argmax(keyed, axis=1)
+    top_val = keyed[np.arange(len(keyed)), top]
+    valid = np.isfinite(top_val)
+    return np.where(valid, top, SAFE), np.where(valid, top_val, np.nan)
+
+# ====================== 回测主函数 ======================
+def run_backtest(panel, momentum_period=20, buy_threshold=0.08, sell_threshold=0.02,
+                 adx=None, adx_threshold=25, factors=None, force=None, force_priority=None,
+                 safe_returns=None, cost=0.0, start=None, with_trades=True):
+    """
+    panel: PricePanel（日期 × 品种收盘价）
+    adx: 与 panel.dates 对齐的市场 ADX 序列，None 表示不做 ADX 过滤
+    factors: 与 panel.close 同形状的事件因子矩阵（默认全 1）
+    force: 同形状的强制仓位比例矩阵（NaN 表示无强制，0 表示强制 0% 仓位）
+    force_priority: 同形状的强制优先级矩阵（越小越优先，见 EventIndex.matrices），默认按列号
+    safe_returns: ETF_SAFE 的日收益序列，默认按 SAFE_ANNUAL_RETURN 折算
+    cost: 单边换手成本（比例），按换手率扣除
+    start: 从第几行开始计入收益（默认第 momentum_period 行）
+    with_trades: 是否生成交易列表（参数扫描时关闭以节省时间）
+    返回 dict: dates / nav / returns / positions / weights / strong / turnover / trades
+    """
+    close = panel.close
+    n_days, n_assets = close.shape
+    if n_days < 2 or n_assets == 0:
+        return None
+    start = momentum_period if start is None else start
+
+    # 1. 调整后动量与每日最强品种
+    scores = panel.rolling_returns(momentum_period)
+    if factors is not None:
+        scores = scores * factors
+    top, top_val = _top_assets(scores)
+
+    # 2. 市场状态过滤
+    if adx is None:
+        market_ok = np.ones(n_days, dtype=bool)
+    else:
+        adx = np.asarray(adx, dtype='float64')
+        market_ok = np.isnan(adx) | (adx >= adx_threshold)
+
+    # 3. 阈值决策
+    hold = (top != SAFE) & (top_val > sell_threshold) & market_ok
+    positions = np.where(hold, top, SAFE)
+    strong = hold & (top_val > buy_threshold)
+
+    # 目标权重（最后一列为 ETF_SAFE）
+    weights = np.zeros((n_days, n_assets + 1))
+    rows = np.arange(n_days)
+    weights[rows[hold], positions[hold]] = 1.0
+    weights[~hold, n_assets] = 1.0
+
+    # 4. 强制事件覆盖：实盘 decide 只在 asset_momentums 中的品种里找强制对象，对应这里当日动量有效的列
+    if force is not None:
+        force = np.asarray(force, dtype='float64')
+        candidate = ~np.isnan(force) & ~np.isnan(scores)
+        forced_days = candidate.any(axis=1)
+        if forced_days.any():
+            if force_priority is None:
+                force_priority = np.broadcast_to(np.arange(n_assets), force.shape)
+            keyed = np.where(candidate, force_priority, np.iinfo('int64').max)
+            forced_col = np.argmin(keyed, axis=1)
+            ratio = np.nan_to_num(force[rows, forced_col])
+            weights[forced_days] = 0.0
+            weights[rows[forced_days], forced_col[forced_days]] = ratio[forced_days]
+            weights[forced_days, n_assets] = 1.0 - ratio[forced_days]
+            positions = np.where(forced_days, forced_col, positions)
+            strong = strong & ~forced_days
+
+    weights[:start] = 0.0
+    weights[:start, n_assets] = 1.0
+    positions = positions.copy()
+    positions[:start] = SAFE
+
+    # 5. 收益：t 日权重 × t+1 日各品种收益
+    asset_ret = np.zeros((n_days, n_assets + 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        asset_ret[1:, :n_assets] = close[1:] / close[:-1] - 1
+    asset_ret[:, :n_assets] = np.nan_to_num(asset_ret[:, :n_assets])
+    if safe_returns is None:
+        asset_ret[1:, n_assets] = (1 + SAFE_ANNUAL_RETURN) ** (1 / 252) - 1
+    else:
+        asset_ret[:, n_assets] = np.nan_to_num(np.asarray(safe_returns, dtype='float64'))
+
+    turnover = np.zeros(n_days)
+    turnover[1:] = 0.5 * np.abs(weights[1:] - weights[:-1]).sum(axis=1)
+    daily = np.zeros(n_days)
+    daily[1:] = (weights[:-1] * asset_ret[1:]).sum(axis=1) - turnover[:-1] * cost
+    daily[:start + 1] = 0.0
+    nav = np.cumprod(1 + daily)
+
+    return {
+        'dates': panel.dates,
+        'nav': nav,
+        'returns': daily,
+        'positions': positions,
+        'weights': weights,
+        'strong': strong,
+        'turnover': turnover,
+        'trades': extract_trades(panel, positions, nav, start) if with_trades else None,
+    }
+
+def extract_trades(panel, positions, nav, start=0):
+    """按持仓变化点切分交易段，段收益 = 段末净值 / 段初净值 - 1"""
+    pos = positions[start:]
+    if len(pos) == 0:
+        return []
+    change = np.flatnonzero(pos[1:] != pos[:-1]) + 1
+    entries = np.concatenate(([0], change)) + start
+    exits = np.concatenate((change + start, [len(positions) - 1]))
+    seg_ret = nav[exits] / nav[entries] - 1
+    trades = []
+    for entry, exit_, ret in zip(entries, exits, seg_ret):
+        p = int(positions[entry])
+        trades.append({
+            'asset': 'SAFE' if p == SAFE else panel.codes[p],
+            'entry_date': str(panel.dates[entry]),
+            'exit_date': str(panel.dates[exit_]),
+            'days': int(exit_ - entry),
+            'return': float(ret),
+        })
+    return trades
+
+def summarize(result, periods_per_year=252):
+    """回测结果概要：总收益、年化、最大回撤、夏普、年换手"""
+    nav = result['nav']
+    years = max(len(nav) / periods_per_year, 1e-9)
+    peak = np.maximum.accumulate(nav)
+    daily = result['returns']
+    vol = daily.std() * np.sqrt(periods_per_year)
+    sharpe = (daily.mean() * periods_per_year - SAFE_ANNUAL_RETURN) / vol if vol > 0 else 0.0
+    switches = int(np.count_nonzero(result['positions'][1:] != result['positions'][:-1]))
+    return {
+        'total_return': float(nav[-1] - 1),
+        'annual_return': float(nav[-1] ** (1 / years) - 1),
+        'max_drawdown': float(((nav - peak) / peak).min()),
+        'sharpe': float(sharpe),
+        'annual_turnover': float(result['turnover'].sum() / years),
+        # BUY_THRESHOLD 只影响信号强弱（强烈买入/谨慎持有），不改变持仓
+        'strong_ratio': float(result['strong'].mean()),
+        'trades': len(result['trades']) if result['trades'] is not None else switches + 1,
+    }
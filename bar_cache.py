@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ETF 日线本地缓存模块
+每个品种一个目录（按 etf_code 区分），按列保存为 NumPy 文件：
+    cache/bars/513310_SH/date.npy / close.npy / high.npy / low.npy / meta.json
+读取时使用 mmap 只读映射，增量更新后整列重写
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# ====================== 配置 ======================
+CACHE_DIR = os.environ.get('ETF_BAR_CACHE_DIR', os.path.join('cache', 'bars'))
+BAR_COLUMNS = ['close', 'high', 'low']
+
+# ====================== 工具函数 ======================
+def _code_dir(etf_code, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, etf_code.replace('.', '_'))
+
+def _save_array(path, arr):
+    """先写临时文件再替换，避免中途失败留下半个文件"""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+def load_meta(etf_code, cache_dir=None):
+    path = os.path.join(_code_dir(etf_code, cache_dir), 'meta.json')
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return {}
+
+def list_cached_codes(cache_dir=None):
+    """列出已缓存的 etf_code（目录名 513310_SH -> 513310.SH）"""
+    root = cache_dir or CACHE_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted(name.replace('_', '.') for name in os.listdir(root)
+                  if os.path.exists(os.path.join(root, name, 'date.npy')))
+
+def load_bars(etf_code, cache_dir=None):
+    """读取缓存的日线，返回 DataFrame[date, close, high, low]，无缓存或缓存损坏返回 None"""
+    d = _code_dir(etf_code, cache_dir)
+    date_path = os.path.join(d, 'date.npy')
+    if not os.path.exists(date_path):
+        return None
+    try:
+        dates = np.load(date_path, mmap_mode='r')
+        cols = {c: np.load(os.path.join(d, f'{c}.npy'), mmap_mode='r') for c in BAR_COLUMNS}
+    except Exception as e:
+        print(f"⚠️ 读取缓存失败 {etf_code}: {e}")
+        return None
+    if len(dates) == 0 or any(len(v) != len(dates) for v in cols.values()):
+        print(f"⚠️ 缓存长度不一致，忽略 {etf_code}")
+        return None
+    df = pd.DataFrame({'date': pd.to_datetime(np.array(dates))})
+    for c in BAR_COLUMNS:
+        df[c] = np.array(cols[c], dtype='float64')
+    return df
+
+def save_bars(etf_code, df, full_depth=None, cache_dir=None):
+    """整列写入缓存；full_depth 记录最近一次全量拉取的深度，用于判断是否需要回补"""
+    d = _code_dir(etf_code, cache_dir)
+    os.makedirs(d, exist_ok=True)
+    for c in BAR_COLUMNS:
+        _save_array(os.path.join(d, f'{c}.npy'), df[c].to_numpy(dtype='float64'))
+    # date 最后写，读取时以长度校验保证各列一致
+    _save_array(os.path.join(d, 'date.npy'), df['date'].to_numpy(dtype='datetime64[s]'))
+    meta = load_meta(etf_code, cache_dir)
+    meta['last_date'] = df['date'].iloc[-1].strftime('%Y-%m-%d')
+    meta['bars'] = len(df)
+    if full_depth is not None:
+        meta['full_depth'] = max(int(full_depth), int(meta.get('full_depth', 0)))
+    with open(os.path.join(d, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+def merge_bars(cached, fresh):
+    """合并缓存和新拉取的日线，同日以新数据为准（覆盖盘中未收盘的 bar）"""
+    if cached is None or cached.empty:
+        return fresh.reset_index(drop=True)
+    df = pd.concat([cached, fresh[['date'] + BAR_COLUMNS]], ignore_index=True)
+    df = df.drop_duplicates(subset='date', keep='last')
+    return df.sort_values('date').reset_index(drop=True)
+
+def bars_to_request(last_date, today=None, margin=2):
+    """估算需要补拉的 bar 数：从最后缓存日（含）到今天的工作日数 + 余量"""
+    today = today or pd.Timestamp.now().normalize()
+    last_day = pd.Timestamp(last_date).normalize()
+    if last_day > today:
+        return margin + 1
+    return int(np.busday_count(last_day.date(), today.date())) + 1 + margin
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热点路径基准测试（合成数据，不联网）
+对每个阶段记录耗时（多次取最小值）和峰值内存（tracemalloc 单独跑一次），并与基线比较：
+    calc_adx / momentum / health_score / asset_health / backtest /
+    interventions / classify_news / render_dashboard / render_archive
+规模用 --scale 选择预设，或用 --assets / --bars / --news / --interventions 单独指定
+基线按规模分别保存在 benchmark_baseline.json，耗时或内存超过容忍倍数即视为退化（退出码 1）
+用法：
+    python benchmark.py                          # 当前规模（11 个品种 × 600 天）对比基线
+    python benchmark.py --scale large            # 2000 个品种 × 20 年
+    python benchmark.py --save-baseline          # 把本次结果写为基线
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from datetime import datetime
+
+import synthetic_data
+
+BASELINE_FILE = 'benchmark_baseline.json'
+SCALES = {
+    'small':   {'assets': 11,   'bars': 600,  'news': 200,    'interventions': 100},
+    'medium':  {'assets': 200,  'bars': 2500, 'news': 5000,   'interventions': 2000},
+    'large':   {'assets': 2000, 'bars': 5000, 'news': 50000,  'interventions': 20000},
+    'decades': {'assets': 5000, 'bars': 7500, 'news': 200000, 'interventions': 100000},
+}
+TIME_TOLERANCE = 1.5                # 耗时超过基线 1.5 倍视为退化
+MEMORY_TOLERANCE = 1.2              # 峰值内存超过基线 1.2 倍视为退化
+MIN_TIME_DELTA = 0.005              # 差值小于 5ms 或 1MB 时视为噪声
+MIN_MEMORY_DELTA = 1024 * 1024
+
+# ====================== 合成输入 ======================
+def build_inputs(sizes, seed=0):
+    """生成各阶段共用的输入（不计时）"""
+    import momentum
+    assets = synthetic_data.make_assets(sizes['assets'])
+    n_bars = sizes['bars']
+    cfg = {**momentum.default_config(), 'ASSETS': assets}
+    data = {
+        'cfg': cfg,
+        'assets': assets,
+        'etf_bars': synthetic_data.make_bars(assets, n_bars, seed),
+        'index_df': synthetic_data.make_index(n_bars, seed),
+        'news': synthetic_data.make_news(sizes['news'], seed),
+        'interventions': synthetic_data.make_interventions(sizes['interventions'], seed),
+        'events': synthetic_data.make_events(assets, max(1, n_bars // 20), n_bars, seed),
+    }
+    today_str = str(data['index_df']['date'].iloc[-1].date())
+    data['current_events'] = momentum.active_events(data['events'], today_str)
+    data['event_factors'], data['event_force'] = momentum.event_adjustments(data['current_events'])
+    return data
+
+def build_context(data):
+    """跑一遍计算和决策，得到渲染阶段需要的 ctx（不计时）"""
+    import momentum
+    cfg = data['cfg']
+    market_adx = float(momentum.calc_adx(data['index_df'], cfg['ADX_PERIOD']).iloc[-1])
+    asset_momentums, panel, momentum_cols, latest_date = momentum.compute_momentum(
+        data['etf_bars'], data['assets'], data['event_factors'], cfg['MOMENTUM_PERIOD'])
+    health_score = momentum.calculate_health_score(data['index_df'])[0]
+    health_status, health_color, health_advice = momentum.health_status_of(health_score)
+    rotation_result = momentum.run_rotation_backtest(panel, momentum_cols, data['index_df'], market_adx, cfg)
+    ctx = {
+        'market_adx': market_adx,
+        'current_events': data['current_events'],
+        'event_factors': data['event_factors'],
+        'event_force': data['event_force'],
+        'asset_momentums': asset_momentums,
+        'panel': panel,
+        'momentum_cols': momentum_cols,
+        'latest_date': latest_date,
+        'health_score': health_score,
+        'health_status': health_status,
+        'health_color': health_color,
+        'health_advice': health_advice,
+        'rotation_result': rotation_result,
+        'asset_health': momentum.compute_asset_health(panel, momentum_cols, rotation_result),
+        'intervention_text': '【今日干预信息】\n无有效干预建议。',
+    }
+    ctx = momentum.decide_stage(ctx, cfg)
+    ctx['history'] = _history(ctx, data)
+    return ctx
+
+def _history(ctx, data):
+    """按回测持仓生成与 SignalStore.query() 同格式的信号历史"""
+    import numpy as np
+    panel = ctx['panel']
+    codes = [panel.codes[j] for j in ctx['momentum_cols']]
+    names = {a['etf_code']: a['name'] for a in data['assets']}
+    result = ctx['rotation_result']
+    if not result:
+        return []
+    rows = []
+    for date, pos, nav in zip(result['dates'], result['positions'], result['nav']):
+        code = codes[pos] if pos >= 0 else data['cfg']['ETF_SAFE']
+        rows.append({
+            'date': str(np.datetime64(date, 'D')),
+            'selected': names.get(code, '空仓'),
+            'etf': code,
+            'market_adx': None,
+            'top_momentum': float(nav - 1),
+            'health_score': ctx['health_score'],
+            'health_status': ctx['health_status'],
+        })
+    return rows
+
+# ====================== 各阶段 ======================
+def build_stages(data, ctx, workdir):
+    """返回 {阶段名: 无参函数}，各函数只包含被测代码"""
+    import momentum
+    import news_fetcher
+    import dashboard
+    cfg = data['cfg']
+
+    intervention_file = os.path.join(workdir, 'interventions.json')
+    with open(intervention_file, 'w', encoding='utf-8') as f:
+        json.dump(data['interventions'], f, ensure_ascii=False)
+
+    def render_archive():
+        root = tempfile.mkdtemp(dir=workdir)
+        renderer = dashboard.PageRenderer(root)
+        dashboard.render_archive(renderer, ctx['history'])
+        renderer.save()
+        shutil.rmtree(root)
+
+    return {
+        'calc_adx': lambda: momentum.calc_adx(data['index_df'], cfg['ADX_PERIOD']),
+        'momentum': lambda: momentum.compute_momentum(
+            data['etf_bars'], data['assets'], data['event_factors'], cfg['MOMENTUM_PERIOD']),
+        'health_score': lambda: momentum.calculate_health_score(data['index_df']),
+        'asset_health': lambda: momentum.compute_asset_health(ctx['panel'], ctx['momentum_cols'], ctx['rotation_result']),
+        'backtest': lambda: momentum.run_rotation_backtest(
+            ctx['panel'], ctx['momentum_cols'], data['index_df'], ctx['market_adx'], cfg),
+        'interventions': lambda: momentum.build_intervention_text([intervention_file]),
+        'classify_news': lambda: [news_fetcher.classify_news(n['title'], n['content']) for n in data['news']],
+        'render_dashboard': lambda: dashboard.render_dashboard(ctx, cfg),
+        'render_archive': render_archive,
+    }
+
+# ====================== 计时与内存 ======================
+def measure(fn, repeat=3):
+    """返回 (最短耗时秒数, 峰值内存字节)；耗时与内存分开测，避免 tracemalloc 拖慢计时"""
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()                                         # 预热（延迟导入、模板编译等）
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(times), peak
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """返回退化的阶段列表 [(阶段, 说明)]"""
+    regressions = []
+    for stage, r in results.items():
+        base = baseline.get(stage)
+        if not base:
+            continue
+        if r['seconds'] > base['seconds'] * time_tolerance and r['seconds'] - base['seconds'] > MIN_TIME_DELTA:
+            regressions.append((stage, f"耗时 {r['seconds']:.4f}s，基线 {base['seconds']:.4f}s"))
+        if r['peak_bytes'] > base['peak_bytes'] * memory_tolerance and r['peak_bytes'] - base['peak_bytes'] > MIN_MEMORY_DELTA:
+            regressions.append((stage, f"峰值内存 {r['peak_bytes'] / 1e6:.1f}MB，基线 {base['peak_bytes'] / 1e6:.1f}MB"))
+    return regressions
+
+def scale_key(sizes):
+    return f"a{sizes['assets']}_b{sizes['bars']}_n{sizes['news']}_i{sizes['interventions']}"
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ 基线读取失败: {e}")
+        return {}
+
+def save_baseline(all_baselines, path=BASELINE_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(all_baselines, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+def run(sizes, stages=None, repeat=3, seed=0):
+    """生成数据并测量指定阶段，返回 {阶段: {seconds, peak_bytes}}"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        data = build_inputs(sizes, seed)
+        ctx = build_context(data)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        all_stages = build_stages(data, ctx, workdir)
+        for name in stages or all_stages:
+            seconds, peak = measure(all_stages[name], repeat)
+            results[name] = {'seconds': round(seconds, 6), 'peak_bytes': int(peak)}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='热点路径基准测试（合成数据）')
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--assets', type=int)
+    parser.add_argument('--bars', type=int)
+    parser.add_argument('--news', type=int)
+    parser.add_argument('--interventions', type=int)
+    parser.add_argument('--stages', help='逗号分隔的阶段名，默认全部')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果写为该规模的基线')
+    parser.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE)
+    parser.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args()
+
+    sizes = dict(SCALES[args.scale])
+    for k in sizes:
+        if getattr(args, k) is not None:
+            sizes[k] = getattr(args, k)
+    key = scale_key(sizes)
+    stages = args.stages.split(',') if args.stages else None
+
+    print("="*60)
+    print(f"⏱️ 基准测试 {key}")
+    print(f"🕒 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("="*60)
+
+    results = run(sizes, stages, args.repeat, args.seed)
+    all_baselines = load_baseline(args.baseline)
+    baseline = all_baselines.get(key, {})
+
+    print(f"{'阶段':<18}{'耗时(ms)':>12}{'基线(ms)':>12}{'峰值(MB)':>12}{'基线(MB)':>12}")
+    for name, r in results.items():
+        base = baseline.get(name, {})
+        base_ms = f"{base['seconds'] * 1000:.2f}" if base else '-'
+        base_mb = f"{base['peak_bytes'] / 1e6:.2f}" if base else '-'
+        print(f"{name:<20}{r['seconds'] * 1000:>12.2f}{base_ms:>12}{r['peak_bytes'] / 1e6:>12.2f}{base_mb:>12}")
+
+    if args.save_baseline:
+        all_baselines[key] = {**baseline, **results}
+        save_baseline(all_baselines, args.baseline)
+        print(f"✅ 基线已保存至 {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    if not baseline:
+        print("⚠️ 该规模暂无基线，可用 --save-baseline 保存")
+    elif regressions:
+        for stage, msg in regressions:
+            print(f"❌ {stage} 退化：{msg}")
+        sys.exit(1)
+    else:
+        print("✅ 各阶段均未超过基线容忍范围")
+
+if __name__ == "__main__":
+    main()
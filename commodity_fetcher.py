@@ -13,6 +13,7 @@ COMMODITY_MAP = [
 
 def generate_interventions():
     interventions = []
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     if random.random() > 0.5:  # 50%概率生成建议
         comm = random.choice(COMMODITY_MAP)
         is_bull = random.choice([True, False])
@@ -25,7 +26,8 @@ def generate_interventions():
             'strength': 3,
             'factor': round(factor, 2),
             'reason': f"模拟数据：{comm['name']}价格{ '上涨' if is_bull else '下跌'} {change}%",
-            'source': 'commodity_sim'
+            'source': 'commodity_sim',
+            'time': now
         })
     return interventions
 
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面渲染模块
+- 模板只解析一次（CompiledTemplate），之后每页只做字符串拼接
+- 除 docs/index.html 外，从信号历史生成每日归档页 docs/archive/YYYY-MM-DD.html、
+  归档目录页 docs/archive/index.html 和各标的页 docs/assets/<代码>.html
+- 每页记录输入数据的哈希（docs/render_manifest.json），数据未变化的页面不重新渲染、不重写文件，
+  因此每天提交到 docs/ 的只有当天新增或变化的几页
+"""
+
+import os
+import json
+import html
+import string
+import hashlib
+from datetime import datetime
+
+MANIFEST_FILE = 'render_manifest.json'
+
+# ====================== 预编译模板 ======================
+class CompiledTemplate:
+    """与 str.format 语法一致的模板，构造时解析一次，render 时只做拼接"""
+    def __init__(self, text):
+        self.parts = list(string.Formatter().parse(text))
+        self.digest = hashlib.md5(text.encode('utf-8')).hexdigest()
+
+    def render(self, **values):
+        out = []
+        for literal, field, spec, conversion in self.parts:
+            out.append(literal)
+            if field is None:
+                continue
+            value = values[field]
+            if conversion == 'r':
+                value = repr(value)
+            elif conversion == 's':
+                value = str(value)
+            out.append(format(value, spec or ''))
+        return ''.join(out)
+
+_compiled = {}
+
+def get_template(name):
+    """按名称取预编译模板（每个进程只编译一次）"""
+    if name not in _compiled:
+        _compiled[name] = CompiledTemplate(TEMPLATES[name])
+    return _compiled[name]
+
+# ====================== 首页模板（注意处理 asset_momentums 可能为空）======================
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>多品种动量轮动+健康预警</title>
+    <style>
+        body {{
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+            background: linear-gradient(145deg, #f0f2f5 0%, #e6e9f0 100%);
+            margin: 0;
+            padding: 20px;
+            display: flex;
+            flex-direction: column;
+            align-items: center;
+        }}
+        .card {{
+            background: rgba(255,255,255,0.9);
+            backdrop-filter: blur(8px);
+            border-radius: 36px;
+            padding: 30px 25px;
+            box-shadow: 0 20px 40px rgba(0,0,0,0.1);
+            max-width: 450px;
+            width: 100%;
+        }}
+        h1 {{ font-size: 22px; text-align: center; color: #1e293b; margin: 0 0 10px; }}
+        .badge {{
+            background: #0f172a; color: white; padding: 6px 14px; border-radius: 40px;
+            font-size: 14px; display: inline-block; margin-bottom: 15px;
+        }}
+        .health-bar {{
+            background-color: {health_color};
+            color: white; padding: 12px 18px;
+            border-radius: 40px; margin-bottom: 20px;
+            display: flex; justify-content: space-between; align-items: center;
+        }}
+        .health-text {{ font-size: 16px; font-weight: 700; }}
+        .health-score {{ font-size: 20px; font-weight: 800; }}
+        .advice-box {{
+            background: #f1f5f9; padding: 12px; border-radius: 24px;
+            margin: 15px 0; font-size: 15px; color: #1e293b;
+        }}
+        .signal {{
+            font-size: 40px; font-weight: 800; padding: 20px; border-radius: 48px;
+            text-align: center; margin: 15px 0;
+        }}
+        .strong-buy {{ background: #1e7e34; color: white; box-shadow: 0 8px 0 #0f4d1f; }}
+        .buy {{ background: #4caf50; color: white; box-shadow: 0 8px 0 #2e7d32; }}
+        .sell {{ background: #f44336; color: white; box-shadow: 0 8px 0 #b71c1c; }}
+        .position {{
+            background: #f1f5f9; padding: 18px; border-radius: 30px;
+            font-size: 18px; font-weight: 500; margin: 20px 0;
+            border: 1px solid #cbd5e1; text-align: center;
+        }}
+        .filter-info {{
+            background: #e9eef3; border-radius: 20px; padding: 15px; margin: 15px 0;
+        }}
+        .filter-item {{
+            display: flex; justify-content: space-between; margin: 5px 0;
+        }}
+        .asset-table {{
+            background: #ffffffcc; border-radius: 20px; padding: 15px; margin-top: 20px;
+        }}
+        table {{ width: 100%; border-collapse: collapse; font-size: 15px; }}
+        th, td {{ padding: 10px 5px; text-align: center; border-bottom: 1px solid #cbd5e1; }}
+        th {{ font-weight: 600; color: #334155; }}
+        .positive {{ color: #166534; font-weight: 600; }}
+        .negative {{ color: #991b1b; font-weight: 600; }}
+        .selected {{ background-color: #dcfce7; font-weight: 700; }}
+        .footer {{ font-size: 14px; color: #64748b; text-align: center; margin-top: 25px; }}
+        .event-link {{
+            margin-top: 20px;
+            text-align: center;
+        }}
+        .event-link a {{
+            background: #0f172a;
+            color: white;
+            padding: 8px 16px;
+            border-radius: 30px;
+            text-decoration: none;
+            font-size: 14px;
+            display: inline-block;
+        }}
+        .event-link a:hover {{
+            background: #1e293b;
+        }}
+        .intervention-area {{
+            margin-top: 20px;
+            background: #f0f0f0;
+            padding: 15px;
+            border-radius: 10px;
+        }}
+        .intervention-area h4 {{
+            margin-top: 0;
+            color: #0f172a;
+        }}
+        .intervention-text {{
+            white-space: pre-wrap;
+            font-size: 14px;
+            background: white;
+            padding: 10px;
+            border-radius: 5px;
+            border: 1px solid #ccc;
+        }}
+        .copy-btn {{
+            margin-top: 8px;
+            padding: 8px 16px;
+            background: #0f172a;
+            color: white;
+            border: none;
+            border-radius: 5px;
+            cursor: pointer;
+        }}
+    </style>
+</head>
+<body>
+<div class="card">
+    <div style="display: flex; justify-content: space-between;">
+        <span class="badge">📊 多品种轮动+健康预警</span>
+        <span class="badge" style="background:#334155;">更新 {latest_date}</span>
+    </div>
+
+    <div class="health-bar">
+        <span class="health-text">🧠 策略状态：{health_status}</span>
+        <span class="health-score">{health_score} 分</span>
+    </div>
+    <div class="advice-box">
+        {health_advice}<br>
+        <span style="font-size:13px; color:#475569;">（基于创业板指数模拟，仅供参考）</span>
+    </div>
+
+    <h1>今日信号</h1>
+    <div class="signal {signal_class}">{signal}</div>
+    <div class="position">⚡ {position}</div>
+
+    <div style="background: #e9eef3; border-radius: 20px; padding: 15px; margin: 15px 0;">
+        <div style="font-weight:600; margin-bottom:10px;">💰 建议仓位</div>
+        <div style="font-size: 32px; font-weight: 800; text-align: center;">{suggested_position}</div>
+    </div>
+
+    <div class="filter-info">
+        <div style="font-weight:600; margin-bottom:8px;">🛡️ 过滤条件</div>
+        <div class="filter-item">
+            <span>市场状态 (ADX)</span>
+            <span style="color:{market_adx_color};">{market_adx_display}</span>
+        </div>
+        <div class="filter-item">
+            <span>买入阈值 >{BUY_THRESHOLD:.0%}</span>
+            <span style="color:{buy_threshold_color};">{buy_threshold_display}</span>
+        </div>
+        <div class="filter-item">
+            <span>卖出阈值 <{SELL_THRESHOLD:.0%}</span>
+            <span style="color:{sell_threshold_color};">{sell_threshold_display}</span>
+        </div>
+    </div>
+
+    <!-- 当前生效事件展示 -->
+    {events_html}
+
+    <div class="asset-table">
+        <div style="font-weight:600; margin-bottom:10px;">📋 各品种动量排序（调整后）</div>
+        <table>
+            <tr><th>品种</th><th>20日涨幅</th><th>10日涨幅</th><th>调整后</th><th>健康度</th><th>状态</th></tr>
+            {table_rows}
+        </table>
+    </div>
+
+    <!-- 人工干预链接 -->
+    <div class="event-link">
+        <a href="https://github.com/feihudie2026/etf-momentum-v2/edit/main/events_config.json" target="_blank">
+            ✏️ 管理人工干预事件
+        </a>
+        <a href="archive/index.html">📚 历史信号</a>
+    </div>
+
+    <!-- 今日干预信息 -->
+    <div class="intervention-area">
+        <h4>💬 今日干预信息（复制后发给我）</h4>
+        <div class="intervention-text" id="interventionText">{intervention_text}</div>
+        <button class="copy-btn" onclick="copyIntervention()">📋 复制提示词</button>
+    </div>
+
+    <div class="footer">
+        🤖 每日14:30更新 · 执行时间 14:50<br>
+        空仓时持有 {ETF_SAFE} (银华日利)<br>
+        健康度指标基于创业板指数模拟，非实盘收益。
+    </div>
+</div>
+<script>
+function copyIntervention() {{
+    var text = document.getElementById('interventionText').innerText;
+    navigator.clipboard.writeText(text).then(function() {{
+        alert('提示词已复制，请粘贴到与AI的对话中');
+    }});
+}}
+</script>
+</body>
+</html>
+"""
+
+def dashboard_values(ctx, cfg):
+    """根据计算和决策结果准备首页模板的填充值"""
+    asset_momentums = ctx['asset_momentums']
+    best = ctx['best']
+    market_adx = ctx['market_adx']
+    current_events = ctx['current_events']
+    asset_health = ctx['asset_health']
+    buy_threshold = cfg['BUY_THRESHOLD']
+    adx_threshold = cfg['ADX_TREND_THRESHOLD']
+    if asset_momentums:
+        # 正常有数据的情况
+        signal_class = 'strong-buy' if best and best['adjusted_momentum'] > buy_threshold else ('buy' if best else 'sell')
+        market_adx_display = f"{market_adx:.1f} {'✅趋势' if market_adx and market_adx >= adx_threshold else '❌震荡' if market_adx else '未知'}"
+        market_adx_color = '#166534' if market_adx and market_adx >= adx_threshold else '#991b1b'
+
+        buy_threshold_display = f"最强 {asset_momentums[0]['adjusted_momentum']:.1%} {'✅满足' if best and best['adjusted_momentum'] > buy_threshold else '❌不满足' if best else '无'}"
+        buy_threshold_color = '#166534' if best and best['adjusted_momentum'] > buy_threshold else '#991b1b'
+
+        sell_threshold_display = f"{asset_momentums[0]['adjusted_momentum']:.1%} {'❌空仓' if best is None else '✅持有'}"
+        sell_threshold_color = '#991b1b' if best is None else '#166534'
+
+        if current_events:
+            events_list = ''.join([f"<div>• {e['name']}: {e['description']}</div>" for e in current_events])
+            events_html = f'<div style="background:#fef9c3; border-radius:20px; padding:15px; margin:15px 0;"><div style="font-weight:600; margin-bottom:8px;">📢 当前生效事件</div>{events_list}</div>'
+        else:
+            events_html = ''
+
+        table_rows = ''
+        for a in asset_momentums:
+            selected_class = 'selected' if a == best else ''
+            momentum_class = 'positive' if a['momentum'] > 0 else 'negative'
+            momentum_10d_class = 'positive' if a.get('momentum_10d') and a['momentum_10d'] > 0 else 'negative' if a.get('momentum_10d') else ''
+            selected_mark = '✅ 选中' if a == best else ''
+            momentum_10d_str = f"{a['momentum_10d']:.2%}" if a['momentum_10d'] is not None else "N/A"
+            health_str = asset_health.get(a['etf_code'], '-')
+            table_rows += f'<tr class="{selected_class}"><td>{a["name"]}</td><td class="{momentum_class}">{a["momentum"]:.2%}</td><td class="{momentum_10d_class}">{momentum_10d_str}</td><td>{a["adjusted_momentum"]:.2%}</td><td>{health_str}</td><td>{selected_mark}</td></tr>'
+    else:
+        # 无任何资产数据时的占位显示
+        signal_class = 'sell'
+        market_adx_display = '无数据'
+        market_adx_color = '#991b1b'
+        buy_threshold_display = '无数据'
+        buy_threshold_color = '#991b1b'
+        sell_threshold_display = '无数据'
+        sell_threshold_color = '#991b1b'
+        events_html = ''
+        table_rows = '<tr><td colspan="6" style="text-align:center;">暂无有效资产数据</td></tr>'
+
+    return dict(
+        health_color=ctx['health_color'],
+        latest_date=ctx['latest_date'] if ctx['latest_date'] else datetime.now().strftime('%Y-%m-%d'),
+        health_status=ctx['health_status'],
+        health_score=ctx['health_score'],
+        health_advice=ctx['health_advice'],
+        signal_class=signal_class,
+        signal=ctx['signal'],
+        position=ctx['position'],
+        suggested_position=ctx['suggested_position'],
+        BUY_THRESHOLD=buy_threshold,
+        SELL_THRESHOLD=cfg['SELL_THRESHOLD'],
+        market_adx_color=market_adx_color,
+        market_adx_display=market_adx_display,
+        buy_threshold_color=buy_threshold_color,
+        buy_threshold_display=buy_threshold_display,
+        sell_threshold_color=sell_threshold_color,
+        sell_threshold_display=sell_threshold_display,
+        events_html=events_html,
+        table_rows=table_rows,
+        ETF_SAFE=cfg['ETF_SAFE'],
+        intervention_text=ctx['intervention_text']
+    )
+
+def render_dashboard(ctx, cfg):
+    """返回首页 HTML 字符串"""
+    return get_template('dashboard').render(**dashboard_values(ctx, cfg))
+
+
+# ====================== 归档页 / 标的页模板 ======================
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; background: #f0f2f5; margin: 0; padding: 20px; display: flex; justify-content: center; }}
+        .card {{ background: white; border-radius: 24px; padding: 25px; box-shadow: 0 10px 30px rgba(0,0,0,0.08); max-width: 560px; width: 100%; }}
+        h1 {{ font-size: 20px; color: #1e293b; margin: 0 0 15px; }}
+        table {{ width: 100%; border-collapse: collapse; font-size: 14px; }}
+        th, td {{ padding: 8px 5px; text-align: center; border-bottom: 1px solid #e2e8f0; }}
+        th {{ color: #334155; }}
+        .nav {{ margin-top: 20px; font-size: 14px; display: flex; justify-content: space-between; }}
+        a {{ color: #0f172a; }}
+    </style>
+</head>
+<body>
+<div class="card">
+    <h1>{title}</h1>
+    {body}
+    <div class="nav">{nav}</div>
+</div>
+</body>
+</html>
+"""
+
+TEMPLATES = {
+    'dashboard': HTML_TEMPLATE,
+    'page': PAGE_TEMPLATE,
+}
+
+def _fmt_pct(v):
+    return '-' if v is None else f"{v:.2%}"
+
+def _fmt_num(v, spec='.1f'):
+    if v is None:
+        return '-'
+    return format(int(v) if spec == 'd' else v, spec)
+
+def _asset_slug(row):
+    return (row.get('etf') or 'unknown').replace('.', '_')
+
+def _day_body(row):
+    items = [
+        ('选中标的', html.escape(str(row.get('selected') or '-'))),
+        ('ETF 代码', html.escape(str(row.get('etf') or '-'))),
+        ('市场 ADX', _fmt_num(row.get('market_adx'))),
+        ('最强动量', _fmt_pct(row.get('top_momentum'))),
+        ('健康度', f"{_fmt_num(row.get('health_score'), 'd')}（{html.escape(str(row.get('health_status') or '-'))}）"),
+    ]
+    rows = ''.join(f'<tr><th>{k}</th><td>{v}</td></tr>' for k, v in items)
+    return f'<table>{rows}</table>'
+
+def _history_table(rows, link_prefix):
+    lines = ['<table><tr><th>日期</th><th>选中</th><th>ADX</th><th>最强动量</th><th>健康度</th></tr>']
+    for r in rows:
+        lines.append(
+            f'<tr><td><a href="{link_prefix}{r["date"]}.html">{r["date"]}</a></td>'
+            f'<td>{html.escape(str(r.get("selected") or "-"))}</td><td>{_fmt_num(r.get("market_adx"))}</td>'
+            f'<td>{_fmt_pct(r.get("top_momentum"))}</td><td>{_fmt_num(r.get("health_score"), "d")}</td></tr>'
+        )
+    lines.append('</table>')
+    return ''.join(lines)
+
+# ====================== 增量渲染 ======================
+class PageRenderer:
+    """只渲染输入数据或模板发生变化的页面（按页记录输入哈希）"""
+    def __init__(self, root='docs'):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_FILE)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self.manifest = json.load(f)
+            except Exception:
+                self.manifest = {}
+        self.written = []
+        self.skipped = 0
+
+    def render(self, rel_path, template_name, values):
+        """数据未变且文件存在时跳过，返回是否写入"""
+        template = get_template(template_name)
+        payload = json.dumps(values, sort_keys=True, ensure_ascii=False, default=str)
+        key = hashlib.md5((template.digest + payload).encode('utf-8')).hexdigest()
+        path = os.path.join(self.root, rel_path)
+        if self.manifest.get(rel_path) == key and os.path.exists(path):
+            self.skipped += 1
+            return False
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(template.render(**values))
+        self.manifest[rel_path] = key
+        self.written.append(rel_path)
+        return True
+
+    def save(self):
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=0, sort_keys=True)
+
+def render_archive(renderer, history):
+    """history: 按日期升序的信号记录（SignalStore.query() 的结果）"""
+    for i, row in enumerate(history):
+        prev_link = f'<a href="{history[i - 1]["date"]}.html">← {history[i - 1]["date"]}</a>' if i > 0 else '<span></span>'
+        next_link = f'<a href="{history[i + 1]["date"]}.html">{history[i + 1]["date"]} →</a>' if i + 1 < len(history) else '<span></span>'
+        asset_link = f'<a href="../assets/{_asset_slug(row)}.html">标的历史</a>'
+        renderer.render(f'archive/{row["date"]}.html', 'page', {
+            'title': f'{row["date"]} 信号',
+            'body': _day_body(row),
+            'nav': prev_link + asset_link + next_link,
+        })
+
+    renderer.render('archive/index.html', 'page', {
+        'title': f'历史信号（共 {len(history)} 天）',
+        'body': _history_table(list(reversed(history)), ''),
+        'nav': '<a href="../index.html">← 返回今日信号</a>',
+    })
+
+    by_asset = {}
+    for row in history:
+        by_asset.setdefault(_asset_slug(row), []).append(row)
+    for slug, rows in by_asset.items():
+        name = rows[-1].get('selected') or slug
+        renderer.render(f'assets/{slug}.html', 'page', {
+            'title': f'{html.escape(str(name))}（{html.escape(str(rows[-1].get("etf")))}）· 选中 {len(rows)} 天',
+            'body': _history_table(list(reversed(rows)), '../archive/'),
+            'nav': '<a href="../archive/index.html">← 历史信号</a>',
+        })
+
+def render_site(ctx, cfg, history, root='docs'):
+    """渲染首页 + 归档页 + 标的页，只写有变化的页面，返回写入的页面列表"""
+    renderer = PageRenderer(root)
+    renderer.render(os.path.relpath(cfg['HTML_FILE'], root), 'dashboard', dashboard_values(ctx, cfg))
+    render_archive(renderer, history)
+    renderer.save()
+    print(f"🖼️ 页面渲染：写入 {len(renderer.written)} 页，未变化跳过 {renderer.skipped} 页")
+    return renderer.written
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全市场 ETF 动量筛选
+- list_etfs()：从 mootdx 证券列表中枚举沪深两市全部 ETF（沪市 51/56/58 开头，深市 159 开头），
+  列表缓存在 cache/etf_universe.json，默认 7 天刷新一次
+- fetch_universe_bars()：通达信长连接池并发拉取日线（含成交额）
+- screen()：剔除成交额不足 / 停牌 / 上市不足的品种，一次算出全部 N 日涨幅，用 argpartition 取前 K 名
+"""
+
+import os
+import json
+from datetime import datetime, timedelta
+
+UNIVERSE_CACHE = os.path.join('cache', 'etf_universe.json')
+UNIVERSE_MAX_AGE_DAYS = 7
+ETF_PREFIXES = {
+    1: ('51', '56', '58'),          # 上交所
+    0: ('159',),                    # 深交所
+}
+MARKET_SUFFIX = {1: 'SH', 0: 'SZ'}
+LIQUIDITY_DAYS = 20                 # 流动性按最近 20 个交易日成交额中位数判断
+
+# ====================== 品种列表 ======================
+def list_etfs(pool, cache_path=UNIVERSE_CACHE, max_age_days=UNIVERSE_MAX_AGE_DAYS):
+    """返回 [{name, etf_code}]；缓存未过期时直接读缓存，拉取失败时退回旧缓存"""
+    cached = _load_cache(cache_path)
+    if cached and datetime.now() - datetime.strptime(cached['updated'], '%Y-%m-%d') < timedelta(days=max_age_days):
+        return cached['etfs']
+    etfs = []
+    try:
+        with pool.client() as client:
+            for market, prefixes in ETF_PREFIXES.items():
+                df = client.stocks(market=market)
+                if df is None or df.empty:
+                    continue
+                codes = df['code'].astype(str).str.zfill(6)
+                mask = codes.str.startswith(prefixes)
+                for code, name in zip(codes[mask], df['name'][mask]):
+                    etfs.append({"name": str(name).strip(), "etf_code": f"{code}.{MARKET_SUFFIX[market]}"})
+    except Exception as e:
+        print(f"⚠️ 获取 ETF 列表失败: {e}")
+    if not etfs:
+        return cached['etfs'] if cached else []
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump({'updated': datetime.now().strftime('%Y-%m-%d'), 'etfs': etfs}, f, ensure_ascii=False)
+    return etfs
+
+def _load_cache(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+# ====================== 日线 ======================
+def fetch_universe_bars(etfs, pool, days, workers, timeout):
+    """并发拉取最近 days 根日线（不写本地缓存），返回 {etf_code: DataFrame[date, close, high, low, amount]}"""
+    from momentum import _fetch_bars_tdx
+    from tdx_pool import fetch_parallel
+    bars = fetch_parallel(
+        [e['etf_code'] for e in etfs],
+        lambda code: _fetch_bars_tdx(code, days, retries=1, pool=pool, extra_columns=('amount',)),
+        max_workers=workers,
+        timeout=timeout,
+    )
+    return {code: df for code, df in bars.items() if df is not None and not df.empty}
+
+# ====================== 筛选 ======================
+def screen(etfs, bars, momentum_period=20, top_k=20, min_amount=1e7):
+    """
+    返回 (前 top_k 名 [{rank, name, etf_code, momentum, momentum_10d, amount, close, date}], 各环节剩余数量)
+    过滤条件：最后一根 bar 为最新交易日（剔除停牌）、有效 bar 足够、近期成交额中位数 >= min_amount
+    """
+    import numpy as np
+    from price_panel import PricePanel, rank_desc
+    counts = {'listed': len(etfs), 'fetched': len(bars)}
+    if not bars:
+        return [], counts
+    names = {e['etf_code']: e['name'] for e in etfs}
+    latest = max(df['date'].iloc[-1] for df in bars.values())
+    liquid = {}
+    amounts = {}
+    for code, df in bars.items():
+        if df['date'].iloc[-1] != latest:
+            continue
+        amount = float(np.median(df['amount'].to_numpy()[-LIQUIDITY_DAYS:])) if 'amount' in df else np.nan
+        if not amount >= min_amount:
+            continue
+        liquid[code] = df
+        amounts[code] = amount
+    counts['liquid'] = len(liquid)
+
+    panel = PricePanel.from_frames(liquid, sorted(liquid))
+    enough = np.flatnonzero(panel.valid_counts() >= momentum_period + 1)
+    counts['screened'] = len(enough)
+    if not len(enough):
+        return [], counts
+    ret_n = panel.returns(momentum_period)[enough]
+    ret_10 = panel.returns(10)[enough]
+    top = []
+    for rank, j in enumerate(rank_desc(ret_n, top_k=top_k), 1):
+        code = panel.codes[enough[j]]
+        top.append({
+            'rank': rank,
+            'name': names.get(code, code),
+            'etf_code': code,
+            'momentum': float(ret_n[j]),
+            'momentum_10d': None if np.isnan(ret_10[j]) else float(ret_10[j]),
+            'amount': amounts[code],
+            'close': float(panel.close[-1, enough[j]]),
+            'date': str(panel.dates[-1]),
+        })
+    return top, counts
+
+def save_csv(rows, path):
+    import csv
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    cols = ['rank', 'name', 'etf_code', 'momentum', 'momentum_10d', 'amount', 'close', 'date']
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=cols)
+        writer.writeheader()
+        for r in rows:
+            writer.writerow({c: ('' if r.get(c) is None else r[c]) for c in cols})
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+人工事件（events_config.json）的区间索引
+事件在 [start_date, end_date]（含两端）内生效。把全部端点排序后扫描一遍（sorted-endpoint sweep），
+得到若干“生效事件集合不变”的区间段，之后：
+    - active(date)：二分查找所在区间段，O(log E)
+    - matrices(dates, names)：每个日期二分到区间段，再按段取因子 / 强制仓位 / 强制优先级向量，
+      得到 日期 × 资产 的矩阵，可直接作为 backtest.run_backtest 的 factors / force / force_priority
+口径与 momentum.active_events + event_adjustments + decide 一致：同一资产的因子连乘，
+强制仓位以列表中靠后的事件为准；多个资产同时强制时，decide 取 event_force 字典中最先插入的资产，
+这里用“首次出现的次序”作为优先级（越小越优先）；缺少 end_date 的事件不会生效，缺少 start_date 视为一直生效
+"""
+
+import numpy as np
+
+_NO_START = np.iinfo('int64').min // 2
+NO_PRIORITY = np.iinfo('int64').max   # 无强制的格子
+
+def _day(value):
+    """'YYYY-MM-DD' -> 距 1970-01-01 的天数，无法解析返回 None"""
+    try:
+        return int(np.datetime64(str(value)[:10], 'D').astype('int64'))
+    except ValueError:
+        return None
+
+class EventIndex:
+    def __init__(self, events):
+        self.events = []
+        starts, ends = [], []
+        for e in events or []:
+            start = _day(e['start_date']) if e.get('start_date') else _NO_START
+            end = _day(e['end_date']) if e.get('end_date') else None
+            if start is None or end is None or end < start:
+                continue
+            self.events.append(e)
+            starts.append(start)
+            ends.append(end)
+        self._build(np.array(starts, dtype='int64'), np.array(ends, dtype='int64'))
+
+    def _build(self, starts, ends):
+        """扫描排序后的端点：boundaries[i] 起（含）到 boundaries[i+1]（不含）生效的事件为 segments[i]"""
+        n = len(starts)
+        points = np.concatenate([starts, ends + 1])
+        kinds = np.concatenate([np.ones(n, dtype='int8'), -np.ones(n, dtype='int8')])
+        which = np.concatenate([np.arange(n), np.arange(n)])
+        order = np.lexsort((kinds, points))
+        self.boundaries = np.unique(points)
+        self.segments = []
+        active = set()
+        i = 0
+        for b in self.boundaries:
+            while i < len(order) and points[order[i]] == b:
+                k = order[i]
+                if kinds[k] > 0:
+                    active.add(int(which[k]))
+                else:
+                    active.discard(int(which[k]))
+                i += 1
+            self.segments.append(tuple(sorted(active)))
+
+    def __len__(self):
+        return len(self.events)
+
+    def _segment_of(self, days):
+        return np.searchsorted(self.boundaries, days, side='right') - 1
+
+    # ---------- 查询 ----------
+    def active(self, date):
+        """date（'YYYY-MM-DD' 或 datetime64）当天生效的事件，按原列表顺序"""
+        day = _day(date)
+        if day is None:
+            return []
+        seg = int(self._segment_of(day))
+        return [self.events[k] for k in self.segments[seg]] if seg >= 0 else []
+
+    def active_range(self, dates):
+        """多个日期各自生效的事件（列表的列表），同一区间段的日期共享结果"""
+        days = np.asarray(dates, dtype='datetime64[D]').astype('int64')
+        resolved = {}
+        out = []
+        for seg in self._segment_of(days):
+            seg = int(seg)
+            if seg not in resolved:
+                resolved[seg] = [self.events[k] for k in self.segments[seg]] if seg >= 0 else []
+            out.append(resolved[seg])
+        return out
+
+    def matrices(self, dates, names):
+        """
+        dates：交易日序列；names：资产名（与矩阵列一一对应）
+        返回 (factors, force, priority)：形状均为 len(dates) × len(names)，
+        factors 默认 1.0；force 无强制为 NaN，force_ratio 为 0 时保留 0（实盘按 0% 仓位强制）；
+        priority 为该资产在当日 event_force 中的插入次序，无强制为 NO_PRIORITY
+        """
+        days = np.asarray(dates, dtype='datetime64[D]').astype('int64')
+        col = {name: j for j, name in enumerate(names)}
+        n_seg = len(self.segments)
+        # 多出的最后一行对应“不在任何区间段内”
+        seg_factor = np.ones((n_seg + 1, len(names)))
+        seg_force = np.full((n_seg + 1, len(names)), np.nan)
+        seg_priority = np.full((n_seg + 1, len(names)), NO_PRIORITY, dtype='int64')
+        for s, members in enumerate(self.segments):
+            order = {}
+            for k in members:
+                e = self.events[k]
+                if 'force_ratio' in e:
+                    for a in e.get('affected_assets', []):
+                        order.setdefault(a, len(order))
+                cols = [col[a] for a in e.get('affected_assets', []) if a in col]
+                if not cols:
+                    continue
+                if 'factor' in e:
+                    for j in cols:
+                        seg_factor[s, j] *= e['factor']
+                if 'force_ratio' in e:
+                    seg_force[s, cols] = e['force_ratio']
+            for a, rank in order.items():
+                if a in col:
+                    seg_priority[s, col[a]] = rank
+        seg = self._segment_of(days)
+        seg = np.where(seg >= 0, seg, n_seg)
+        return seg_factor[seg], seg_force[seg], seg_priority[seg]
@@ -10,6 +10,7 @@ ASSET_POOL = ['有色金属', '电网设备', '半导体', '人工智能']
 
 def generate_interventions():
     interventions = []
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     if random.random() > 0.4:  # 60%概率生成建议
         asset = random.choice(ASSET_POOL)
         is_bull = random.choice([True, False])
@@ -22,7 +23,8 @@ def generate_interventions():
             'strength': 3,
             'factor': factor,
             'reason': f"模拟数据：{asset}板块资金{ '净流入' if is_bull else '净流出'} {net_flow}亿",
-            'source': 'flow_sim'
+            'source': 'flow_sim',
+            'time': now
         })
     return interventions
 
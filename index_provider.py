@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+指数数据提供模块（baostock）
+- 每个进程只登录一次 baostock，进程退出时登出
+- 各使用方先用 require() 登记需要的天数，首次 get() 时按最大窗口下载一次
+- 之后按天数切片返回副本，避免同一指数重复下载
+"""
+
+import atexit
+import threading
+from datetime import datetime, timedelta
+import pandas as pd
+import tracing
+
+class BaostockIndexProvider:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._logged_in = False
+        self._windows = {}      # index_code -> 已登记的最大天数
+        self._frames = {}       # index_code -> (已下载天数, DataFrame)
+
+    # ---------- 会话 ----------
+    def _login(self):
+        if self._logged_in:
+            return
+        import baostock as bs
+        lg = bs.login()
+        if lg.error_code != '0':
+            raise Exception("baostock 登录失败")
+        self._logged_in = True
+        atexit.register(self.close)
+
+    def close(self):
+        with self._lock:
+            if not self._logged_in:
+                return
+            import baostock as bs
+            try:
+                bs.logout()
+            except Exception:
+                pass
+            self._logged_in = False
+
+    # ---------- 数据 ----------
+    def require(self, index_code, days):
+        """登记某个使用方需要的历史天数，首次下载时取所有登记中的最大值"""
+        with self._lock:
+            self._windows[index_code] = max(days, self._windows.get(index_code, 0))
+
+    def _query(self, index_code, days):
+        import baostock as bs
+        self._login()
+        end = datetime.now().strftime('%Y-%m-%d')
+        start = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        with tracing.span('baostock.query', 'net', code=index_code, days=days) as sp:
+            rs = bs.query_history_k_data_plus(
+                index_code,
+                "date,close,high,low",
+                start_date=start,
+                end_date=end,
+                frequency="d"
+            )
+            data = []
+            while (rs.error_code == '0') & rs.next():
+                data.append(rs.get_row_data())
+            if tracing.enabled():
+                sp.set(bytes=sum(len(','.join(row)) + 1 for row in data))
+        if not data:
+            return None
+        df = pd.DataFrame(data, columns=['date','close','high','low'])
+        for col in ['close','high','low']:
+            df[col] = pd.to_numeric(df[col])
+        df['date'] = pd.to_datetime(df['date'])
+        df = df.sort_values('date').reset_index(drop=True)
+        return df
+
+    def get(self, index_code, days=600):
+        """返回最近 days 天的指数日线（副本，可随意修改），失败返回 None"""
+        with self._lock:
+            cached = self._frames.get(index_code)
+            if cached is None or cached[0] < days:
+                window = max(days, self._windows.get(index_code, 0))
+                try:
+                    df = self._query(index_code, window)
+                except Exception as e:
+                    print(f"baostock 获取 {index_code} 失败: {e}")
+                    return None
+                if df is None:
+                    return None
+                cached = (window, df)
+                self._frames[index_code] = cached
+        df = cached[1]
+        start = pd.Timestamp((datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d'))
+        return df[df['date'] >= start].reset_index(drop=True)
+
+# 进程内共享的默认实例
+default_provider = BaostockIndexProvider()
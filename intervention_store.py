@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+干预建议的列式存储与分组合并
+全部建议保存为等长数组（asset, source, direction, strength, factor, ts, reason），
+merge() 用 np.unique + np.bincount 一次算出所有品种的合并结果，口径与原 merge_asset_suggestions 一致：
+    - 多空都有时按条数定方向，少数方强度占比 × 0.3 修正因子；条数相同视为分歧，不输出
+    - 因子按强度加权平均，强度取平均；理由取前三条，来源去重
+half_life 不为空时按建议时间做指数衰减（权重 0.5 ** (age / half_life)），条数、强度都按权重计算，
+配合 update_history() 保存的多日历史使用；建议时间取各条的 time 字段（由各 fetcher 写入），
+没有 time 的建议时间戳为 NaN，不并入历史
+"""
+
+import os
+import json
+import time
+import numpy as np
+
+HISTORY_FILE = os.path.join('cache', 'interventions.npz')
+HISTORY_DAYS = 30                   # 历史最多保留天数
+DEFAULT_STRENGTH = 3
+DEFAULT_FACTOR = 1.0
+CONFLICT_WEIGHT = 0.3
+_DIRECTIONS = {'bull': 1, 'bear': -1}
+_COLUMNS = ['asset', 'source', 'direction', 'strength', 'factor', 'ts', 'reason']
+_TEXT_COLUMNS = ['asset', 'source', 'reason']
+
+class InterventionStore:
+    def __init__(self, asset, source, direction, strength, factor, ts, reason):
+        self.asset = np.asarray(asset, dtype=object)
+        self.source = np.asarray(source, dtype=object)
+        self.direction = np.asarray(direction, dtype='int8')
+        self.strength = np.asarray(strength, dtype='float64')
+        self.factor = np.asarray(factor, dtype='float64')
+        self.ts = np.asarray(ts, dtype='float64')
+        self.reason = np.asarray(reason, dtype=object)
+
+    def __len__(self):
+        return len(self.asset)
+
+    # ---------- 构造 ----------
+    @classmethod
+    def from_records(cls, records, ts=None):
+        """
+        records：[{asset, direction, strength, factor, reason, source[, time]}]，没有 asset 的建议被跳过
+        ts：没有 time 字段时使用的时间戳，默认当前时间
+        """
+        now = time.time() if ts is None else ts
+        rows = [r for r in records if r.get('asset')]
+        return cls(
+            [r['asset'] for r in rows],
+            [r.get('source', '未知') for r in rows],
+            [_DIRECTIONS.get(r.get('direction'), 0) for r in rows],
+            [r.get('strength', DEFAULT_STRENGTH) for r in rows],
+            [r.get('factor', DEFAULT_FACTOR) for r in rows],
+            [_timestamp(r.get('time'), now) for r in rows],
+            [r.get('reason', '') or '' for r in rows],
+        )
+
+    @classmethod
+    def from_files(cls, filenames):
+        """
+        读取各干预文件（JSON 列表）；没有 time 字段的建议时间戳记为 NaN
+        （文件随仓库签出，修改时间不代表建议生成时间）
+        """
+        parts = []
+        for filename in filenames:
+            if not os.path.exists(filename):
+                continue
+            try:
+                with open(filename, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception:
+                continue
+            if isinstance(data, list):
+                parts.append(cls.from_records(data, ts=np.nan))
+        return cls.concat(parts)
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], [], [], [], [], [])
+
+    @classmethod
+    def concat(cls, stores):
+        stores = [s for s in stores if len(s)]
+        if not stores:
+            return cls.empty()
+        return cls(*(np.concatenate([getattr(s, c) for s in stores]) for c in _COLUMNS))
+
+    def take(self, idx):
+        return InterventionStore(*(getattr(self, c)[idx] for c in _COLUMNS))
+
+    # ---------- 持久化 ----------
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp.npz'
+        arrays = {c: getattr(self, c) for c in _COLUMNS}
+        for c in _TEXT_COLUMNS:
+            arrays[c] = arrays[c].astype(str) if len(self) else np.array([], dtype='<U1')
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls.empty()
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return cls(*(data[c].astype(object) if c in _TEXT_COLUMNS else data[c] for c in _COLUMNS))
+        except Exception as e:
+            print(f"⚠️ 读取干预历史失败 {path}: {e}")
+            return cls.empty()
+
+    # ---------- 合并 ----------
+    def merge(self, now=None, half_life=None):
+        """
+        按 asset 分组合并，返回按 asset 排序的 [{asset, direction, factor, strength, reason, sources, count}]
+        half_life：衰减半衰期（秒），None 表示不衰减（每条权重为 1）
+        """
+        if not len(self):
+            return []
+        assets, group = _factorize(self.asset)
+        n = len(assets)
+        if half_life:
+            now = time.time() if now is None else now
+            age = np.maximum(now - self.ts, 0.0)
+            weight = 0.5 ** (age / half_life)
+        else:
+            weight = np.ones(len(self))
+        bull = self.direction == 1
+        bear = self.direction == -1
+        ws = weight * self.strength
+
+        count = np.bincount(group, minlength=n)
+        weight_sum = np.bincount(group, weights=weight, minlength=n)
+        bull_count = np.bincount(group, weights=weight * bull, minlength=n)
+        bear_count = np.bincount(group, weights=weight * bear, minlength=n)
+        total_strength = np.bincount(group, weights=ws, minlength=n)
+        factor_sum = np.bincount(group, weights=ws * self.factor, minlength=n)
+        bull_strength = np.bincount(group, weights=ws * bull, minlength=n)
+        bear_strength = np.bincount(group, weights=ws * bear, minlength=n)
+
+        positive = total_strength > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_strength = np.where(positive, total_strength / weight_sum, DEFAULT_STRENGTH)
+            avg_factor = np.where(positive, factor_sum / total_strength, DEFAULT_FACTOR)
+            bull_ratio = np.where(positive, bull_strength / total_strength, 0.0)
+            bear_ratio = np.where(positive, bear_strength / total_strength, 0.0)
+        conflict = (bull_count > 0) & (bear_count > 0)
+        bull_wins = conflict & (bull_count > bear_count)
+        bear_wins = conflict & (bear_count > bull_count)
+        avg_factor = np.where(bull_wins, avg_factor * (1 - bear_ratio * CONFLICT_WEIGHT), avg_factor)
+        avg_factor = np.where(bear_wins, avg_factor * (1 + bull_ratio * CONFLICT_WEIGHT), avg_factor)
+        keep = ~conflict | bull_wins | bear_wins
+        is_bull = np.where(conflict, bull_wins, bull_count > 0)
+
+        reasons = self._first_reasons(group, n)
+        sources = self._sources(group, n)
+        merged = []
+        for g in np.flatnonzero(keep):
+            merged.append({
+                'asset': str(assets[g]),
+                'direction': 'bull' if is_bull[g] else 'bear',
+                'factor': round(float(avg_factor[g]), 2),
+                'strength': round(float(avg_strength[g]), 1) if positive[g] else DEFAULT_STRENGTH,
+                'reason': "；".join(reasons[g]),
+                'sources': sources[g],
+                'count': int(count[g]),
+            })
+        return merged
+
+    def _first_reasons(self, group, n, limit=3):
+        """每组按原顺序的前 limit 条非空理由"""
+        out = [[] for _ in range(n)]
+        idx = np.flatnonzero(self.reason.astype(bool))
+        if not len(idx):
+            return out
+        order = idx[np.argsort(group[idx], kind='stable')]
+        g = group[order]
+        starts = np.searchsorted(g, g, side='left')
+        for i in order[np.arange(len(order)) - starts < limit]:
+            out[group[i]].append(self.reason[i])
+        return out
+
+    def _sources(self, group, n):
+        """每组去重后的来源（按首次出现的顺序）"""
+        out = [[] for _ in range(n)]
+        names, src = _factorize(self.source)
+        _, first = np.unique(group * len(names) + src, return_index=True)
+        for i in np.sort(first):
+            out[group[i]].append(self.source[i])
+        return out
+
+def _factorize(values):
+    """对象数组 -> (排序后的不重复值, 每个元素在其中的下标)；比 np.unique 先转定长字符串快"""
+    index = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype='int64', count=len(values))
+    names = list(index)
+    order = sorted(range(len(names)), key=lambda i: str(names[i]))
+    rank = np.empty(len(names), dtype='int64')
+    rank[order] = np.arange(len(names))
+    return [names[i] for i in order], rank[codes]
+
+def _timestamp(value, default):
+    """time 字段（'YYYY-MM-DD HH:MM:SS' / 'YYYY-MM-DD' / 秒）-> 时间戳，缺失或无法解析时用 default"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    from datetime import datetime
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(str(value), fmt).timestamp()
+        except ValueError:
+            continue
+    return default
+
+def update_history(current, path=HISTORY_FILE, max_days=HISTORY_DAYS, now=None):
+    """
+    把本次读取的建议并入多日历史并保存，返回合并后的历史
+    同一天内 (asset, source, direction, reason) 相同的建议只保留最新一条（重复运行不重复计数）
+    没有 time 的建议无法判断生成日期，跳过不并入
+    """
+    now = time.time() if now is None else now
+    undated = np.isnan(current.ts)
+    if undated.any():
+        print(f"⚠️ {int(undated.sum())} 条干预建议缺少 time 字段，不参与衰减合并")
+        current = current.take(np.flatnonzero(~undated))
+    store = InterventionStore.concat([InterventionStore.load(path), current])
+    store = store.take(np.flatnonzero(store.ts >= now - max_days * 86400))
+    days = ((store.ts - time.timezone) // 86400).astype('int64')     # 本地自然日
+    last = {}
+    for i, key in enumerate(zip(store.asset, store.source, store.direction, store.reason, days)):
+        last[key] = i
+    store = store.take(np.sort(np.fromiter(last.values(), dtype='int64', count=len(last))))
+    store.save(path)
+    return store
@@ -6,9 +6,15 @@
 输出：intraday_alerts.json
 """
 
-import requests
+import os
 import json
+import asyncio
+import argparse
 from datetime import datetime
+from adx_stream import StreamingADX
+import sina_quotes
+from sina_quotes import sina_code
+import tracing
 
 # 资产与ETF代码映射（与你的资产池一致）
 ETF_MAP = {
@@ -21,49 +27,74 @@ ETF_MAP = {
     '159995': '半导体',
 }
 
+# 市场状态（ADX）盘中预估：读取 momentum.py 保存的增量 ADX 状态
+MARKET_INDEX = 'sz.399006'          # 创业板指（baostock 代码，用于补齐缺失的日线）
+MARKET_INDEX_QUOTE = '399006'       # 新浪行情代码
+ADX_STATE_FILE = os.path.join('cache', 'adx_state.json')
+ADX_TREND_THRESHOLD = 25
+
 def get_realtime_prices(codes):
-    """获取多个ETF的实时行情（新浪接口）"""
-    # 新浪接口要求前缀：深市 sz，沪市 sh
-    code_str = ','.join([('sz' + code if code.startswith('15') or code.startswith('30') else 'sh' + code) for code in codes])
-    url = f"https://hq.sinajs.cn/list={code_str}"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Referer': 'https://finance.sina.com.cn'
-    }
+    """获取多个ETF的实时行情（新浪接口，批量并行 + 长连接，见 sina_quotes）"""
+    return sina_quotes.default_client.quotes(codes)
+
+def load_market_adx_state():
+    """读取 momentum.py 保存的 ADX 状态并补齐到昨日收盘，状态缺失时返回 None"""
+    state = StreamingADX.load(ADX_STATE_FILE)
+    if state is None or state.last_date is None:
+        print("⚠️ 无 ADX 状态文件，跳过市场状态预估")
+        return None
+    today = datetime.now().strftime('%Y-%m-%d')
+    # 补齐状态之后、今天之前已收盘的日线（momentum.py 只提交到运行前一日）
     try:
-        resp = requests.get(url, headers=headers, timeout=10)
-        resp.encoding = 'gbk'
-        lines = resp.text.strip().split('\n')
-        data = {}
-        for line in lines:
-            if not line.startswith('var'):
-                continue
-            # 解析 var hq_str_sz159915="...";
-            parts = line.split('="')
-            if len(parts) < 2:
-                continue
-            code = parts[0].split('_')[-1]  # 提取代码
-            values = parts[1].strip('";').split(',')
-            if len(values) < 30:
-                continue
-            name = values[0]
-            try:
-                price = float(values[3])   # 当前价
-                pre_close = float(values[2])  # 昨收
-                change = price - pre_close
-                pct = change / pre_close * 100 if pre_close != 0 else 0
-            except:
-                continue
-            data[code] = {
-                'name': name,
-                'price': price,
-                'pct': pct,
-                'time': values[30] if len(values) > 30 else ''
-            }
-        return data
+        from index_provider import default_provider
+        df = default_provider.get(MARKET_INDEX, days=30)
+        if df is not None:
+            days = df['date'].dt.strftime('%Y-%m-%d')
+            state.warm_up(df[(days > state.last_date) & (days < today)].reset_index(drop=True))
+            state.save(ADX_STATE_FILE)
     except Exception as e:
-        print(f"❌ 获取实时行情失败: {e}")
-        return {}
+        print(f"⚠️ 补齐指数日线失败，使用已有状态: {e}")
+    return state
+
+def preview_market_adx():
+    """用实时指数行情预估收盘时的市场 ADX，返回 (已收盘ADX, 盘中预估ADX)，状态缺失时返回 None"""
+    state = load_market_adx_state()
+    if state is None:
+        return None
+    quote = get_realtime_prices([MARKET_INDEX_QUOTE]).get('sz' + MARKET_INDEX_QUOTE)
+    if not quote:
+        return None
+    adx_now = state.on_tick(quote['price'], quote['high'] or None, quote['low'] or None)
+    return state.value, adx_now
+
+def watch_main(args):
+    """持续监控模式：交易时段内轮询，预警实时追加到 intraday_alerts.json"""
+    from intraday_watch import watch
+    print("="*60)
+    print("📈 盘中持续监控（新浪实时行情）")
+    print(f"⏳ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("="*60)
+    codes = [sina_code(c) for c in ETF_MAP]
+    names = {sina_code(c): asset for c, asset in ETF_MAP.items()}
+    if args.universe_file:
+        # 额外监控的品种（JSON 列表：6 位代码或新浪代码）
+        with open(args.universe_file, 'r', encoding='utf-8') as f:
+            extra = [sina_code(str(c)) for c in json.load(f)]
+        codes += [c for c in dict.fromkeys(extra) if c not in names]
+    fired = asyncio.run(watch(
+        codes,
+        get_realtime_prices,
+        names=names,
+        adx_state=load_market_adx_state(),
+        index_quote=sina_code(MARKET_INDEX_QUOTE),
+        adx_threshold=ADX_TREND_THRESHOLD,
+        interval=args.interval,
+        window=args.window,
+        respect_hours=not args.ignore_hours,
+        max_polls=args.max_polls,
+    ))
+    print(f"📊 本次监控共触发 {len(fired)} 条预警")
+    print("="*60)
 
 def main():
     print("="*60)
@@ -88,6 +119,22 @@ def main():
                 'factor': 1.1 if pct > 0 else 0.9
             })
     
+    # 市场状态（ADX）盘中变化
+    adx = preview_market_adx()
+    if adx:
+        adx_prev, adx_now = adx
+        print(f"📐 市场 ADX：昨收 {adx_prev:.1f} → 盘中预估 {adx_now:.1f}")
+        if (adx_prev >= ADX_TREND_THRESHOLD) != (adx_now >= ADX_TREND_THRESHOLD):
+            trending = adx_now >= ADX_TREND_THRESHOLD
+            alerts.append({
+                'type': '市场状态',
+                'level': 'high',
+                'msg': f"市场 ADX 盘中预估 {adx_now:.1f}，{'转为趋势市' if trending else '转为震荡市，收盘可能强制空仓'}",
+                'asset': '创业板',
+                'direction': 'bull' if trending else 'bear',
+                'factor': 1.0
+            })
+
     # 保存预警到文件
     with open('intraday_alerts.json', 'w', encoding='utf-8') as f:
         json.dump(alerts, f, ensure_ascii=False, indent=2)
@@ -96,4 +143,16 @@ def main():
     print("="*60)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='盘中监控')
+    parser.add_argument('--watch', action='store_true', help='交易时段内持续监控（默认只检查一次）')
+    parser.add_argument('--interval', type=float, default=15, help='轮询间隔（秒）')
+    parser.add_argument('--window', type=int, default=300, help='急涨急跌/加速度窗口（秒）')
+    parser.add_argument('--ignore-hours', action='store_true', help='忽略交易时段（测试用）')
+    parser.add_argument('--max-polls', type=int, default=None)
+    parser.add_argument('--universe-file', help='额外监控的代码列表（JSON），可监控全部 ETF')
+    args = parser.parse_args()
+    if args.watch:
+        watch_main(args)
+    else:
+        with tracing.maybe_session('intraday'):     # ETF_TRACE=1 时记录新浪行情请求
+            main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+盘中持续监控（asyncio 轮询新浪行情）
+交易时段内每 interval 秒取一次行情，每个 ETF 用固定长度的环形缓冲区保存最近的价格，计算：
+    - 窗口涨跌（最近 window 秒的收益）
+    - 滚动波动率（相邻两次报价对数收益的标准差）
+    - 加速度（最近窗口收益 - 前一个窗口收益）
+样本时间取行情自带的日期/时间（新浪 date、time 字段），行情时间未前进的报价不计入窗口；
+触发的预警经过去抖（同一品种同类预警在冷却时间内只在级别升高时再次触发），
+随即追加到 intraday_alerts.json
+用法：python intraday_monitor.py --watch [--interval 15] [--window 300]
+"""
+
+import os
+import json
+import math
+import asyncio
+from datetime import datetime, time as dtime
+import numpy as np
+
+# ====================== 配置 ======================
+POLL_INTERVAL = 15                  # 轮询间隔（秒）
+WINDOW_SECONDS = 300                # 窗口涨跌 / 加速度的窗口长度（秒）
+BUFFER_SIZE = 512                   # 每个品种保留的最近报价数（15 秒一次约 2 小时）
+DAY_MOVE_PCT = 3.0                  # 当日涨跌幅预警（%），与单次检查的规则一致
+WINDOW_MOVE = 0.01                  # 窗口内涨跌超过 1% 视为急涨急跌
+WINDOW_ZSCORE = 3.0                 # 且超过滚动波动率的 3 倍
+ACCEL_THRESHOLD = 0.008             # 窗口收益变化超过 0.8% 视为加速
+COOLDOWN_SECONDS = 900              # 同类预警冷却时间
+ALERTS_FILE = 'intraday_alerts.json'
+SESSIONS = [(dtime(9, 30), dtime(11, 30)), (dtime(13, 0), dtime(15, 0))]
+
+# ====================== 环形缓冲区 ======================
+class RingBuffer:
+    """固定容量的 float 环形缓冲区，写满后覆盖最旧的数据"""
+    def __init__(self, size):
+        self._data = np.full(size, np.nan)
+        self._size = size
+        self._n = 0                 # 累计写入次数
+
+    def __len__(self):
+        return min(self._n, self._size)
+
+    def append(self, value):
+        self._data[self._n % self._size] = value
+        self._n += 1
+
+    def last(self, k=1):
+        """最近 k 个值，按时间顺序"""
+        k = min(k, len(self))
+        idx = (np.arange(self._n - k, self._n)) % self._size
+        return self._data[idx]
+
+    def values(self):
+        return self.last(len(self))
+
+class EtfStats:
+    """单个品种的盘中滚动统计"""
+    def __init__(self, size=BUFFER_SIZE):
+        self.ts = RingBuffer(size)
+        self.price = RingBuffer(size)
+        self.pct = math.nan
+
+    def update(self, ts, price, pct=math.nan):
+        if len(self.ts) and ts <= self.ts.last()[0]:
+            return False            # 行情未更新（或时间倒退）
+        self.ts.append(ts)
+        self.price.append(price)
+        self.pct = pct
+        return True
+
+    def window_return(self, window, offset=0):
+        """[now - offset - window, now - offset] 内的收益，数据不足返回 NaN"""
+        ts = self.ts.values()
+        price = self.price.values()
+        if len(ts) < 2:
+            return math.nan
+        end_t = ts[-1] - offset
+        i_end = np.searchsorted(ts, end_t, side='right') - 1
+        i_start = np.searchsorted(ts, end_t - window, side='left')
+        if i_end <= i_start or (i_start == 0 and ts[0] > end_t - window):
+            return math.nan
+        return price[i_end] / price[i_start] - 1
+
+    def volatility(self):
+        """相邻报价对数收益的标准差"""
+        price = self.price.values()
+        if len(price) < 3:
+            return math.nan
+        return float(np.std(np.diff(np.log(price)), ddof=1))
+
+    def acceleration(self, window):
+        return self.window_return(window) - self.window_return(window, offset=window)
+
+    def snapshot(self, window):
+        ret = self.window_return(window)
+        vol = self.volatility()
+        ts = self.ts.values()
+        n = max(1, int(np.sum(ts > ts[-1] - window))) if len(ts) else 1
+        z = abs(ret) / (vol * math.sqrt(n)) if vol and not math.isnan(vol) and not math.isnan(ret) else math.nan
+        return {'pct': self.pct, 'ret': ret, 'vol': vol, 'z': z, 'accel': self.acceleration(window)}
+
+# ====================== 去抖 ======================
+class AlertDebouncer:
+    """同一 key 的预警：首次触发；冷却期内只有级别升高才再次触发；冷却期过后可再次触发"""
+    def __init__(self, cooldown=COOLDOWN_SECONDS):
+        self.cooldown = cooldown
+        self._last = {}             # key -> (时间戳, 级别)
+
+    def should_fire(self, key, level, now):
+        prev = self._last.get(key)
+        if prev is None or level > prev[1] or now - prev[0] >= self.cooldown:
+            self._last[key] = (now, level)
+            return True
+        return False
+
+def append_alerts(alerts, path=ALERTS_FILE):
+    """把新预警追加到预警文件（先写临时文件再替换）"""
+    if not alerts:
+        return
+    existing = load_alerts(path)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(existing + alerts, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def load_alerts(path=ALERTS_FILE):
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            return data if isinstance(data, list) else []
+    except Exception:
+        return []
+
+def reset_alerts_for_today(path=ALERTS_FILE, today=None):
+    """启动时只保留当天（带 time 字段）的预警，文件不会跨日累积"""
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    kept = [a for a in load_alerts(path) if str(a.get('time', '')).startswith(today)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(kept, f, ensure_ascii=False, indent=2)
+    return kept
+
+# ====================== 规则 ======================
+def evaluate(code, name, asset, s, debouncer, now, window=WINDOW_SECONDS):
+    """根据一个品种的滚动统计生成（去抖后的）预警列表"""
+    alerts = []
+    stamp = datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S')
+
+    def fire(kind, level, value, msg, direction, factor, severity):
+        if debouncer.should_fire((code, kind, direction), level, now):
+            alerts.append({
+                'type': kind,
+                'level': severity,
+                'msg': msg,
+                'asset': asset,
+                'direction': direction,
+                'factor': factor,
+                'code': code,
+                'value': round(float(value), 4),
+                'time': stamp,
+            })
+
+    pct = s['pct']
+    if not math.isnan(pct) and abs(pct) > DAY_MOVE_PCT:
+        direction = 'bull' if pct > 0 else 'bear'
+        fire('价格异动', int(abs(pct)), pct, f"{name} 当日涨跌幅 {pct:.1f}%，波动较大",
+             direction, 1.1 if pct > 0 else 0.9, 'medium')
+
+    ret, z = s['ret'], s['z']
+    if not math.isnan(ret) and abs(ret) > WINDOW_MOVE and not math.isnan(z) and z > WINDOW_ZSCORE:
+        direction = 'bull' if ret > 0 else 'bear'
+        fire('急涨急跌', int(abs(ret) / WINDOW_MOVE), ret,
+             f"{name} {_fmt_window(window)}内{'急涨' if ret > 0 else '急跌'} {ret:.2%}（{z:.1f} 倍波动）",
+             direction, 1.05 if ret > 0 else 0.95, 'high')
+
+    accel = s['accel']
+    if not math.isnan(accel) and abs(accel) > ACCEL_THRESHOLD:
+        direction = 'bull' if accel > 0 else 'bear'
+        fire('加速', int(abs(accel) / ACCEL_THRESHOLD), accel,
+             f"{name} 走势{'向上' if accel > 0 else '向下'}加速（窗口收益变化 {accel:+.2%}）",
+             direction, 1.0, 'low')
+    return alerts
+
+def _fmt_window(window):
+    return f"{window // 60:g} 分钟" if window >= 60 and window % 60 == 0 else f"{window:g} 秒"
+
+# ====================== 主循环 ======================
+def quote_timestamp(q, default):
+    """行情自带的 date + time -> 时间戳；字段缺失或无法解析时用 default（轮询时间）"""
+    try:
+        return datetime.strptime(f"{q['date']} {q['time']}", '%Y-%m-%d %H:%M:%S').timestamp()
+    except (KeyError, ValueError):
+        return default
+
+def in_session(now):
+    t = now.time()
+    return now.weekday() < 5 and any(start <= t <= end for start, end in SESSIONS)
+
+def seconds_to_next_session(now):
+    """距下一个交易时段开始的秒数；当日已收盘返回 None"""
+    t = now.time()
+    for start, _ in SESSIONS:
+        if t < start:
+            return (datetime.combine(now.date(), start) - now).total_seconds()
+    return None
+
+async def watch(codes, fetch_quotes, names=None, adx_state=None, index_quote=None, adx_threshold=25,
+                interval=POLL_INTERVAL, window=WINDOW_SECONDS, alerts_file=ALERTS_FILE,
+                respect_hours=True, max_polls=None):
+    """
+    codes: 新浪行情代码（如 sz159915）；fetch_quotes(codes) -> {代码: {name, price, pct, high, low, date, time}}
+    （阻塞函数，在线程池中执行；date/time 为行情时间，同一行情时间的报价只计一次）
+    adx_state / index_quote：StreamingADX 状态与指数行情代码，提供时同时监控市场 ADX 是否穿越 adx_threshold
+    respect_hours=False 时忽略交易时段（测试/回放用）；max_polls 限制轮询次数
+    返回本次触发的全部预警
+    """
+    loop = asyncio.get_running_loop()
+    names = names or {}
+    stats = {code: EtfStats() for code in codes}
+    debouncer = AlertDebouncer()
+    request_codes = list(codes) + ([index_quote] if index_quote else [])
+    adx_prev = adx_state.value if adx_state is not None else math.nan
+    fired = []
+    polls = 0
+    reset_alerts_for_today(alerts_file)
+    print(f"👀 持续监控 {len(codes)} 个品种，每 {interval}s 轮询一次，预警追加至 {alerts_file}")
+
+    while max_polls is None or polls < max_polls:
+        now = datetime.now()
+        if respect_hours and not in_session(now):
+            wait = seconds_to_next_session(now)
+            if wait is None or now.weekday() >= 5:
+                print("🏁 已收盘，结束监控")
+                break
+            await asyncio.sleep(min(wait, 60))
+            continue
+
+        started = loop.time()
+        quotes = await loop.run_in_executor(None, fetch_quotes, request_codes)
+        polls += 1
+        ts = now.timestamp()
+        new_alerts = []
+        for code in codes:
+            q = quotes.get(code)
+            if not q:
+                continue
+            quote_ts = quote_timestamp(q, ts)
+            if stats[code].update(quote_ts, q['price'], q['pct']):
+                name = q.get('name') or code
+                new_alerts += evaluate(code, name, names.get(code, name), stats[code].snapshot(window),
+                                       debouncer, quote_ts, window)
+
+        if adx_state is not None and index_quote and quotes.get(index_quote):
+            q = quotes[index_quote]
+            adx_now = adx_state.on_tick(q['price'], q.get('high') or None, q.get('low') or None)
+            crossed = not math.isnan(adx_prev) and not math.isnan(adx_now) \
+                and (adx_prev >= adx_threshold) != (adx_now >= adx_threshold)
+            trending = not math.isnan(adx_now) and adx_now >= adx_threshold
+            # 在阈值附近来回穿越时按方向去抖
+            if crossed and debouncer.should_fire((index_quote, '市场状态', trending), 1, ts):
+                new_alerts.append({
+                    'type': '市场状态',
+                    'level': 'high',
+                    'msg': f"市场 ADX 盘中预估 {adx_now:.1f}，{'转为趋势市' if trending else '转为震荡市，收盘可能强制空仓'}",
+                    'asset': '创业板',
+                    'direction': 'bull' if trending else 'bear',
+                    'factor': 1.0,
+                    'time': now.strftime('%Y-%m-%d %H:%M:%S'),
+                })
+            if not math.isnan(adx_now):
+                adx_prev = adx_now
+
+        if new_alerts:
+            append_alerts(new_alerts, alerts_file)
+            fired += new_alerts
+            for a in new_alerts:
+                print(f"🚨 [{a['time'][11:]}] {a['type']}：{a['msg']}")
+        await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+    return fired
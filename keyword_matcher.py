@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多关键词单遍匹配（Aho-Corasick 自动机）
+所有词表一次构建成自动机，对文本只扫描一遍，返回全部命中（含重叠命中，如“芯片”与“AI芯片”）
+扫描代价只与文本长度和命中数有关，不随关键词数量增长
+用法：
+    m = KeywordMatcher([('芯片', ('asset', '半导体')), ('利好', ('pos', None))])
+    m.find_all('芯片板块迎利好')  ->  [(0, '芯片', ('asset', '半导体')), (5, '利好', ('pos', None))]
+"""
+
+from collections import deque
+
+class KeywordMatcher:
+    def __init__(self, keywords=(), ignore_case=True):
+        """keywords: [(关键词, 标签)]，同一个词可以带多个标签（多次 add）"""
+        self.ignore_case = ignore_case
+        self._goto = [{}]           # 每个节点的字符 -> 子节点
+        self._fail = [0]
+        self._own = [[]]            # 以该节点结尾的 (关键词, 标签)
+        self._out = None            # 构建后：本节点及后缀链上的全部命中
+        self._built = False
+        for word, tag in keywords:
+            self.add(word, tag)
+
+    def add(self, word, tag=None):
+        if not word:
+            return
+        key = word.lower() if self.ignore_case else word
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+            node = nxt
+        self._own[node].append((word, tag))
+        self._built = False
+
+    def build(self):
+        """按层（BFS）计算失败指针，并把后缀节点的命中并入当前节点"""
+        self._out = [list(o) for o in self._own]
+        queue = deque(self._goto[0].values())
+        for child in queue:
+            self._fail[child] = 0
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                if self._out[self._fail[child]]:
+                    self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+        self._built = True
+        return self
+
+    def find_all(self, text):
+        """返回 [(起始位置, 关键词, 标签)]，按结束位置排序"""
+        if not self._built:
+            self.build()
+        if self.ignore_case:
+            text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                for word, tag in out[node]:
+                    hits.append((i - len(word) + 1, word, tag))
+        return hits
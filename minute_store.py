@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ETF 分钟线本地存储（按日分区的定长 mmap 数组）
+每个品种、每个周期、每个交易日一个 .npy 文件：
+    cache/minute/513310_SH/1m/2024-06-03.npy   形状 (240, 6)
+    cache/minute/513310_SH/5m/2024-06-03.npy   形状 (48, 6)
+列依次为 open / high / low / close / volume / amount，行号由 bar 的结束时间决定（槽位固定），
+没有数据的槽位为 NaN。因此：
+- 追加 / 盘中重复写入只改对应槽位（mmap 原地写），不重写整个文件
+- 读取单日为零拷贝视图（day()）；跨日读取只映射涉及的日期，内存不随历史长度增长
+- 15/30/60 分钟与日线由 1m/5m 直接 reshape 聚合得到（两个时段各 120 分钟，都能整除）
+用法：python minute_store.py [--freq 1 5] [--bars 800]   # 为 momentum.ASSETS 增量拉取分钟线
+"""
+
+import os
+import warnings
+import numpy as np
+
+# ====================== 配置 ======================
+MINUTE_DIR = os.environ.get('ETF_MINUTE_CACHE_DIR', os.path.join('cache', 'minute'))
+FIELDS = ['open', 'high', 'low', 'close', 'volume', 'amount']
+OPEN, HIGH, LOW, CLOSE, VOLUME, AMOUNT = range(len(FIELDS))
+SESSION_MINUTES = 120               # 上午 9:30-11:30、下午 13:00-15:00 各 120 分钟
+DAY_MINUTES = 2 * SESSION_MINUTES
+STORED_FREQS = (1, 5)               # 本地保存的周期（分钟）
+TDX_FREQUENCY = {1: 8, 5: 0}        # mootdx bars 的 frequency 参数：8 = 1 分钟，0 = 5 分钟
+DAILY = 'D'
+
+def slots_per_day(freq):
+    return DAY_MINUTES // freq
+
+def slot_index(minute_of_day, freq):
+    """
+    minute_of_day：bar 结束时间距 9:30 的交易分钟数（下午从 120 起算）
+    9:31 的 1 分钟 bar -> 0；集合竞价等早于首个 bar 的时间并入第 0 个槽位
+    """
+    return np.clip(np.ceil(np.asarray(minute_of_day) / freq).astype(int) - 1, 0, slots_per_day(freq) - 1)
+
+def trading_minutes(times):
+    """DatetimeIndex/Series -> 距 9:30 的交易分钟数（11:30 之后按下午计）"""
+    import pandas as pd
+    times = pd.DatetimeIndex(times)
+    m = times.hour.to_numpy() * 60 + times.minute.to_numpy()
+    return np.where(m <= 11 * 60 + 30, m - (9 * 60 + 30), m - 13 * 60 + SESSION_MINUTES)
+
+def slot_times(day, freq):
+    """某日各槽位的 bar 结束时间"""
+    ends = (np.arange(slots_per_day(freq)) + 1) * freq
+    offset = np.where(ends <= SESSION_MINUTES, 9 * 60 + 30 + ends, 13 * 60 + ends - SESSION_MINUTES)
+    return np.datetime64(day, 'm') + offset.astype('timedelta64[m]')
+
+# ====================== 存储 ======================
+class MinuteBarStore:
+    def __init__(self, root=None):
+        self.root = root or MINUTE_DIR
+
+    def _dir(self, etf_code, freq):
+        return os.path.join(self.root, etf_code.replace('.', '_'), f'{freq}m')
+
+    def _path(self, etf_code, freq, day):
+        return os.path.join(self._dir(etf_code, freq), f'{day}.npy')
+
+    def days(self, etf_code, freq, start=None, end=None):
+        """已保存的交易日（YYYY-MM-DD，升序），可按 [start, end] 过滤"""
+        d = self._dir(etf_code, freq)
+        if not os.path.isdir(d):
+            return []
+        days = sorted(name[:-4] for name in os.listdir(d) if name.endswith('.npy'))
+        return [x for x in days if (start is None or x >= str(start)[:10]) and (end is None or x <= str(end)[:10])]
+
+    def day(self, etf_code, freq, day):
+        """单日数组（slots × 6）的只读 mmap 视图，不存在返回 None"""
+        path = self._path(etf_code, freq, str(day)[:10])
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode='r')
+
+    # ---------- 写入 ----------
+    def write(self, etf_code, freq, df):
+        """
+        df：DataFrame[datetime, open, high, low, close, volume, amount]（或以时间为索引），可跨多日
+        按日打开/创建定长文件，只写入对应槽位；返回写入的 bar 数
+        """
+        import pandas as pd
+        from numpy.lib.format import open_memmap
+        if freq not in STORED_FREQS:
+            raise ValueError(f"只保存 {STORED_FREQS} 分钟线，收到 {freq}")
+        if df is None or df.empty:
+            return 0
+        times = pd.DatetimeIndex(df['datetime'] if 'datetime' in df.columns else df.index)
+        values = np.column_stack([df[f].to_numpy(dtype='float64') if f in df.columns else np.full(len(df), np.nan)
+                                  for f in FIELDS])
+        slots = slot_index(trading_minutes(times), freq)
+        days = times.strftime('%Y-%m-%d').to_numpy()
+        os.makedirs(self._dir(etf_code, freq), exist_ok=True)
+        for day in np.unique(days):
+            rows = days == day
+            path = self._path(etf_code, freq, day)
+            if os.path.exists(path):
+                arr = open_memmap(path, mode='r+')
+            else:
+                tmp = path + '.tmp'
+                arr = open_memmap(tmp, mode='w+', dtype='float64', shape=(slots_per_day(freq), len(FIELDS)))
+                arr[:] = np.nan
+                arr.flush()
+                del arr
+                os.replace(tmp, path)
+                arr = open_memmap(path, mode='r+')
+            arr[slots[rows]] = values[rows]
+            arr.flush()
+            del arr
+        return len(df)
+
+    # ---------- 读取 ----------
+    def stack(self, etf_code, freq, start=None, end=None, last_days=None):
+        """(日期列表, days × slots × 6 数组)；只读取涉及的日期"""
+        days = self.days(etf_code, freq, start, end)
+        if last_days:
+            days = days[-last_days:]
+        if not days:
+            return [], np.empty((0, slots_per_day(freq), len(FIELDS)))
+        return days, np.stack([self.day(etf_code, freq, d) for d in days])
+
+    def load(self, etf_code, freq=1, bar=None, start=None, end=None, last_days=None):
+        """
+        读取 [start, end] 的分钟线，按 bar 重采样：None = 原周期，15/30/60 = 分钟线，'D' = 日线
+        bar 必须是 freq 的整数倍；返回 DataFrame[datetime, open, high, low, close, volume, amount]（去掉空槽位）
+        """
+        import pandas as pd
+        days, data = self.stack(etf_code, freq, start, end, last_days)
+        k = resample_factor(freq, bar)
+        data = resample(data, k)
+        day_starts = np.array(days, dtype='datetime64[m]')
+        if bar == DAILY:
+            times = day_starts
+        else:
+            offsets = slot_times('2000-01-01', freq * k) - np.datetime64('2000-01-01', 'm')
+            times = (day_starts[:, None] + offsets[None, :]).ravel()
+        flat = data.reshape(-1, len(FIELDS))
+        keep = ~np.isnan(flat[:, CLOSE])
+        df = pd.DataFrame(flat[keep], columns=FIELDS)
+        df.insert(0, 'datetime', pd.to_datetime(times[keep]))
+        return df
+
+    def closes(self, codes, freq=1, bar=None, last_days=5):
+        """多品种最近 last_days 个交易日的收盘价序列 {code: 一维数组}（按 bar 重采样，去掉空槽位）"""
+        k = resample_factor(freq, bar)
+        out = {}
+        for code in codes:
+            _, data = self.stack(code, freq, last_days=last_days)
+            close = resample(data, k)[..., CLOSE].ravel()
+            out[code] = close[~np.isnan(close)]
+        return out
+
+    def intraday_returns(self, codes, periods, freq=1, bar=None, last_days=5):
+        """
+        各品种最近 periods 根 bar（按 bar 重采样）的涨幅，用于日内动量排序
+        数据不足的品种为 NaN，顺序与 codes 一致
+        """
+        closes = self.closes(codes, freq, bar, last_days)
+        out = np.full(len(codes), np.nan)
+        for i, code in enumerate(codes):
+            c = closes[code]
+            if len(c) > periods and c[-periods - 1] != 0:
+                out[i] = c[-1] / c[-periods - 1] - 1
+        return out
+
+# ====================== 重采样 ======================
+def resample_factor(freq, bar):
+    """bar 相对于存储周期的倍数；bar=None 为 1，'D' 为整日"""
+    if bar is None:
+        return 1
+    if bar == DAILY:
+        return slots_per_day(freq)
+    if bar % freq or SESSION_MINUTES % bar:
+        raise ValueError(f"{bar} 分钟线无法由 {freq} 分钟线聚合（需为 {freq} 的倍数且整除 {SESSION_MINUTES}）")
+    return bar // freq
+
+def resample(data, k):
+    """
+    data：days × slots × 6，把相邻 k 个槽位聚合为一个（槽位定长，直接 reshape）
+    open 取首个有效值、close 取最后一个有效值、high/low 取极值、volume/amount 求和；全空的组保持 NaN
+    """
+    if k == 1:
+        return data
+    d, slots, f = data.shape
+    g = data.reshape(d, slots // k, k, f)
+    valid = ~np.isnan(g[..., CLOSE])
+    any_valid = valid.any(axis=-1)
+    first = np.argmax(valid, axis=-1)
+    last = k - 1 - np.argmax(valid[..., ::-1], axis=-1)
+    out = np.full((d, slots // k, f), np.nan)
+    take = lambda col, idx: np.take_along_axis(g[..., col], idx[..., None], axis=-1)[..., 0]
+    out[..., OPEN] = take(OPEN, first)
+    out[..., CLOSE] = take(CLOSE, last)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)     # 全 NaN 组的 nanmax/nanmin
+        out[..., HIGH] = np.nanmax(g[..., HIGH], axis=-1)
+        out[..., LOW] = np.nanmin(g[..., LOW], axis=-1)
+    out[..., VOLUME] = np.nansum(g[..., VOLUME], axis=-1)
+    out[..., AMOUNT] = np.nansum(g[..., AMOUNT], axis=-1)
+    out[~any_valid] = np.nan
+    return out
+
+# ====================== 通达信拉取 ======================
+def fetch_minute_bars(etf_code, freq, offset=800, pool=None, timeout=30):
+    """从通达信拉取最近 offset 根 freq 分钟线，返回 DataFrame[datetime, open, high, low, close, volume, amount]"""
+    import pandas as pd
+    if pool is None:
+        from momentum import get_tdx_pool
+        pool = get_tdx_pool()
+    with pool.client(timeout=timeout) as client:
+        df = client.bars(symbol=etf_code.split('.')[0], frequency=TDX_FREQUENCY[freq], offset=offset, start=0)
+    if df is None or df.empty:
+        return None
+    df = df.reset_index()
+    time_col = 'datetime' if 'datetime' in df.columns else 'index'
+    df = df.rename(columns={time_col: 'datetime', 'vol': 'volume'})
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    for col in FIELDS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df[['datetime'] + [c for c in FIELDS if c in df.columns]].dropna(subset=['close'])
+
+def update(codes, freqs=STORED_FREQS, offset=800, pool=None, store=None, workers=4, timeout=30):
+    """并发拉取并写入分钟线（重复拉到的 bar 覆盖同一槽位），返回 {(code, freq): 写入条数}"""
+    from tdx_pool import fetch_parallel
+    if pool is None:
+        from momentum import get_tdx_pool
+        pool = get_tdx_pool(size=workers)
+    store = store or MinuteBarStore()
+    keys = [(code, freq) for code in codes for freq in freqs]
+    frames = fetch_parallel(
+        keys,
+        lambda key: fetch_minute_bars(key[0], key[1], offset, pool, timeout),
+        max_workers=workers,
+        timeout=timeout,
+    )
+    return {key: store.write(key[0], key[1], df) for key, df in frames.items() if df is not None}
+
+def main():
+    import argparse
+    import momentum
+    parser = argparse.ArgumentParser(description='增量拉取 ETF 分钟线到本地存储')
+    parser.add_argument('--freq', type=int, nargs='+', default=list(STORED_FREQS), choices=list(STORED_FREQS))
+    parser.add_argument('--bars', type=int, default=800, help='每个品种每个周期拉取的根数（通达信单次上限 800）')
+    args = parser.parse_args()
+    codes = [a['etf_code'] for a in momentum.ASSETS]
+    pool = momentum.get_tdx_pool()
+    written = update(codes, args.freq, args.bars, pool=pool)
+    pool.close_all()
+    for (code, freq), n in sorted(written.items()):
+        print(f"✅ {code} {freq}m 写入 {n} 根")
+    missing = len(codes) * len(args.freq) - len(written)
+    if missing:
+        print(f"⚠️ {missing} 个品种/周期拉取失败")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,18 @@
-import baostock as bs
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-import sys
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多品种动量轮动 + 健康预警
+可直接运行（python momentum.py），也可作为库导入：
+    from momentum import run_pipeline, calc_adx, decide
+    run_pipeline({'BUY_THRESHOLD': 0.1})
+流水线分为 fetch（取数）→ compute（计算）→ decide（决策）→ render（输出）四个阶段
+导入本模块没有任何副作用；numpy/pandas/mootdx/baostock 只在用到时才导入
+"""
+
 import os
 import json
-import time
-from collections import defaultdict
-from mootdx.quotes import Quotes
+from datetime import datetime
+import tracing
 
 # ====================== 配置参数 ======================
 # 使用通达信数据源（ETF必须带市场后缀 .SZ 或 .SH）
@@ -33,30 +38,100 @@ SELL_THRESHOLD = 0.02               # 卖出阈值
 ADX_PERIOD = 14
 ADX_TREND_THRESHOLD = 25            # 低于此值视为震荡市，强制空仓
 MARKET_INDEX = "sz.399006"          # 创业板指，用于计算市场状态（仍用 baostock）
-
-# 常用通达信服务器IP（提高连接速度）
-TDX_IPS = ['119.147.212.81', '121.14.110.210', '180.153.18.170', '180.153.18.171']
+ADX_STATE_FILE = os.path.join('cache', 'adx_state.json')   # 增量 ADX 状态
+ADX_HISTORY_DAYS = 600              # ADX 过滤使用的指数历史天数
+HEALTH_HISTORY_DAYS = 800           # 健康度评估使用的指数历史天数
+ETF_HISTORY_DAYS = 600              # ETF 日线拉取根数
+
+# 常用通达信服务器IP：按测速延迟与失败率排序使用，故障服务器自动熔断（见 tdx_pool.ServerHealth）
+TDX_IPS = [
+    '119.147.212.81', '121.14.110.210', '180.153.18.170', '180.153.18.171',
+    '180.153.18.172', '202.108.253.130', '202.108.253.131', '60.191.117.167',
+    '115.238.56.198', '115.238.90.165', '218.75.126.9', '14.17.75.71',
+]
+FETCH_WORKERS = 4                   # 并发拉取线程数（同时也是长连接数）
+FETCH_TIMEOUT = 30                  # 单个品种最长等待秒数
+
+EVENTS_FILE = 'events_config.json'
+INTERVENTION_FILES = ['news_interventions.json', 'north_interventions.json',
+                      'flow_interventions.json', 'commodity_interventions.json']
+INTERVENTION_HALF_LIFE_DAYS = None  # 干预建议的衰减半衰期（天），None 表示只看当前文件、不衰减
+INTERVENTION_HISTORY_FILE = os.path.join('cache', 'interventions.npz')
+HTML_FILE = os.path.join('docs', 'index.html')
+TRACE = bool(os.environ.get('ETF_TRACE'))  # 记录各阶段耗时/CPU/内存与网络请求（见 tracing.py），也可用 --trace 开启
+
+# 全市场筛选（python momentum.py --universe）
+UNIVERSE_TOP_K = 20                 # 输出前 K 名
+UNIVERSE_MIN_AMOUNT = 1e7           # 近 20 日成交额中位数下限（元），低于此值视为流动性不足
+UNIVERSE_HISTORY_DAYS = 60          # 每个品种拉取的日线根数（需覆盖动量周期与流动性窗口）
+UNIVERSE_WORKERS = 8                # 全市场拉取的并发数
+UNIVERSE_FILE = os.path.join('docs', 'universe_top.csv')
+
+def default_config():
+    """当前模块级配置的副本，run_pipeline(config) 中的键会覆盖这些默认值"""
+    return {
+        'ASSETS': list(ASSETS),
+        'ETF_SAFE': ETF_SAFE,
+        'MOMENTUM_PERIOD': MOMENTUM_PERIOD,
+        'BUY_THRESHOLD': BUY_THRESHOLD,
+        'SELL_THRESHOLD': SELL_THRESHOLD,
+        'ADX_PERIOD': ADX_PERIOD,
+        'ADX_TREND_THRESHOLD': ADX_TREND_THRESHOLD,
+        'MARKET_INDEX': MARKET_INDEX,
+        'ADX_STATE_FILE': ADX_STATE_FILE,
+        'ADX_HISTORY_DAYS': ADX_HISTORY_DAYS,
+        'HEALTH_HISTORY_DAYS': HEALTH_HISTORY_DAYS,
+        'ETF_HISTORY_DAYS': ETF_HISTORY_DAYS,
+        'TDX_IPS': list(TDX_IPS),
+        'FETCH_WORKERS': FETCH_WORKERS,
+        'FETCH_TIMEOUT': FETCH_TIMEOUT,
+        'EVENTS_FILE': EVENTS_FILE,
+        'INTERVENTION_FILES': list(INTERVENTION_FILES),
+        'INTERVENTION_HALF_LIFE_DAYS': INTERVENTION_HALF_LIFE_DAYS,
+        'INTERVENTION_HISTORY_FILE': INTERVENTION_HISTORY_FILE,
+        'HTML_FILE': HTML_FILE,
+        'TRACE': TRACE,
+        'UNIVERSE_TOP_K': UNIVERSE_TOP_K,
+        'UNIVERSE_MIN_AMOUNT': UNIVERSE_MIN_AMOUNT,
+        'UNIVERSE_HISTORY_DAYS': UNIVERSE_HISTORY_DAYS,
+        'UNIVERSE_WORKERS': UNIVERSE_WORKERS,
+        'UNIVERSE_FILE': UNIVERSE_FILE,
+    }
 
 # ====================== 通达信数据获取函数 ======================
-def fetch_etf_data_tdx(etf_code, days=600, retries=2):
+_tdx_pool = None
+
+def get_tdx_pool(ips=None, size=FETCH_WORKERS):
+    """进程内共享的通达信长连接池（首次使用时创建）"""
+    global _tdx_pool
+    if _tdx_pool is None:
+        from tdx_pool import TdxClientPool
+        _tdx_pool = TdxClientPool(ips or TDX_IPS, size=size)
+    return _tdx_pool
+
+def _fetch_bars_tdx(etf_code, offset, retries=2, pool=None, extra_columns=()):
     """
-    从通达信获取 ETF 净值数据（使用 mootdx）
-    增加重试机制，并正确处理返回的DataFrame
+    从通达信获取最近 offset 根日线（使用 mootdx 长连接池）
+    增加重试机制，并正确处理返回的DataFrame；连接出错时换下一个服务器立即重试
+    extra_columns：除 close/high/low 外额外保留的列（如 amount），返回中缺失时忽略
     """
+    import pandas as pd
+    pool = pool or get_tdx_pool()
     for attempt in range(retries):
         try:
-            # 使用指定IP快速连接，避免每次测速
-            client = Quotes.factory(market='std', bestip=False, ip=TDX_IPS[attempt % len(TDX_IPS)])
             code = etf_code.split('.')[0]
-            df = client.bars(
-                symbol=code,
-                frequency=9,    # 9 = 日线
-                offset=days,
-                start=0
-            )
+            with pool.client(timeout=FETCH_TIMEOUT) as client, \
+                    tracing.span('tdx.bars', 'net', code=etf_code, offset=offset) as sp:
+                df = client.bars(
+                    symbol=code,
+                    frequency=9,    # 9 = 日线
+                    offset=offset,
+                    start=0
+                )
+                if tracing.enabled():
+                    sp.set(bytes=_frame_bytes(df))
             if df is None or df.empty:
                 print(f"警告：{etf_code} 返回空数据，尝试 {attempt+1}/{retries}")
-                time.sleep(1)
                 continue
 
             # 重置索引，将日期从索引变为列
@@ -71,50 +146,65 @@ def fetch_etf_data_tdx(etf_code, days=600, retries=2):
                 df['date'] = df.index
             df['date'] = pd.to_datetime(df['date'])
             # 确保浮点类型
-            for col in ['close', 'high', 'low']:
+            columns = ['close', 'high', 'low'] + [c for c in extra_columns if c in df.columns]
+            for col in columns:
                 if col in df.columns:
                     df[col] = pd.to_numeric(df[col], errors='coerce')
-            df = df[['date', 'close', 'high', 'low']].dropna()
+            df = df[['date'] + columns].dropna()
             return df
         except Exception as e:
             print(f"通达信数据获取失败 {etf_code} (尝试 {attempt+1}/{retries}): {e}")
-            time.sleep(2)
     return None
 
+def _frame_bytes(df):
+    """响应大小按返回 DataFrame 的内存估算（mootdx 不暴露原始报文长度）"""
+    return int(df.memory_usage(index=True).sum()) if df is not None else 0
+
+def fetch_etf_data_tdx(etf_code, days=600, retries=2, use_cache=True, pool=None):
+    """
+    获取 ETF 日线：先读本地缓存，再只补拉最后缓存日之后的 bar
+    通达信不可用时退回缓存数据
+    """
+    import bar_cache
+    cached = bar_cache.load_bars(etf_code) if use_cache else None
+    meta = bar_cache.load_meta(etf_code) if cached is not None else {}
+    # 无缓存或缓存深度不足时全量拉取
+    if cached is None or meta.get('full_depth', 0) < days:
+        df = _fetch_bars_tdx(etf_code, days, retries, pool)
+        if df is None or df.empty:
+            if cached is not None:
+                print(f"⚠️ {etf_code} 全量拉取失败，使用缓存数据（截至 {meta.get('last_date')}）")
+                return cached.tail(days).reset_index(drop=True)
+            return None
+        df = bar_cache.merge_bars(cached, df)
+        if use_cache:
+            bar_cache.save_bars(etf_code, df, full_depth=days)
+        return df.tail(days).reset_index(drop=True)
+
+    last_date = cached['date'].iloc[-1]
+    fresh = _fetch_bars_tdx(etf_code, bar_cache.bars_to_request(last_date), retries, pool)
+    if fresh is None or fresh.empty:
+        print(f"⚠️ {etf_code} 增量拉取失败，使用缓存数据（截至 {last_date:%Y-%m-%d}）")
+        return cached.tail(days).reset_index(drop=True)
+    if fresh['date'].iloc[0] > last_date:
+        # 补拉的数据与缓存不衔接（缓存过旧），改为全量拉取
+        full = _fetch_bars_tdx(etf_code, days, retries, pool)
+        if full is not None and not full.empty:
+            fresh = full
+    df = bar_cache.merge_bars(cached, fresh)
+    bar_cache.save_bars(etf_code, df)
+    return df.tail(days).reset_index(drop=True)
+
 # ====================== 指数数据获取（用于ADX和健康度，仍用baostock）======================
 def fetch_index_data_baostock(index_code, days=600):
-    """使用 baostock 获取指数日线数据"""
-    try:
-        lg = bs.login()
-        if lg.error_code != '0':
-            raise Exception("baostock 登录失败")
-        end = datetime.now().strftime('%Y-%m-%d')
-        start = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-        rs = bs.query_history_k_data_plus(
-            index_code,
-            "date,close,high,low",
-            start_date=start,
-            end_date=end,
-            frequency="d"
-        )
-        data = []
-        while (rs.error_code == '0') & rs.next():
-            data.append(rs.get_row_data())
-        bs.logout()
-        if not data:
-            return None
-        df = pd.DataFrame(data, columns=['date','close','high','low'])
-        for col in ['close','high','low']:
-            df[col] = pd.to_numeric(df[col])
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date').reset_index(drop=True)
-        return df
-    except Exception as e:
-        print(f"baostock 获取 {index_code} 失败: {e}")
-        return None
+    """使用 baostock 获取指数日线数据（进程内单会话，按窗口切片）"""
+    from index_provider import default_provider
+    return default_provider.get(index_code, days)
 
 # ====================== 计算 ADX ======================
 def calc_adx(df, period=14):
+    import numpy as np
+    import pandas as pd
     high = df['high']
     low = df['low']
     close = df['close']
@@ -133,45 +223,56 @@ def calc_adx(df, period=14):
     adx = dx.rolling(period).mean()
     return adx
 
-# ====================== 获取市场 ADX ======================
-market_df = fetch_index_data_baostock(MARKET_INDEX, days=600)
-if market_df is None or len(market_df) < ADX_PERIOD + 50:
-    print("无法获取市场指数数据，ADX 过滤将失效")
-    market_adx = None
-else:
-    adx_series = calc_adx(market_df, ADX_PERIOD)
-    market_adx = adx_series.iloc[-1]
-
-# ====================== 获取所有资产的最新动量 ======================
-asset_momentums = []
-latest_date = None
-
-for asset in ASSETS:
-    df = fetch_etf_data_tdx(asset["etf_code"], days=600)
-    if df is None or len(df) < MOMENTUM_PERIOD + 1:
-        print(f"警告：{asset['name']} 数据不足，跳过")
-        continue
-    # 计算20日和10日涨幅
-    df['return_20d'] = df['close'].pct_change(periods=MOMENTUM_PERIOD)
-    df['return_10d'] = df['close'].pct_change(periods=10)
-    latest = df.iloc[-1]
-    momentum = latest['return_20d']
-    momentum_10d = latest['return_10d'] if len(df) >= 11 else None
-    last_close = latest['close']
-    asset_momentums.append({
-        "name": asset["name"],
-        "etf_code": asset["etf_code"],
-        "momentum": momentum,
-        "momentum_10d": momentum_10d,
-        "close": last_close,
-        "date": latest['date'].strftime('%Y-%m-%d')
-    })
-    if latest_date is None:
-        latest_date = latest['date'].strftime('%Y-%m-%d')
+@tracing.traced('step')
+def compute_market_adx(market_df, period=ADX_PERIOD, state_file=ADX_STATE_FILE):
+    """市场 ADX：数据不足返回 None；已收盘 bar 增量提交到状态文件，最后一根（盘中）只做预估"""
+    if market_df is None or len(market_df) < period + 50:
+        print("无法获取市场指数数据，ADX 过滤将失效")
+        return None
+    from adx_stream import market_adx_from_state
+    return market_adx_from_state(market_df, state_file, period)
+
+# ====================== 各资产动量 ======================
+@tracing.traced('step')
+def compute_momentum(etf_bars, assets, event_factors=None, momentum_period=MOMENTUM_PERIOD):
+    """
+    按公共交易日历对齐成价格面板（日期 × 品种），一次算出所有品种的涨幅并排序
+    返回 (asset_momentums 按调整后动量降序, panel, 参与排序的列号, 最新日期)
+    """
+    import numpy as np
+    from price_panel import PricePanel, rank_desc
+    event_factors = event_factors or {}
+    panel = PricePanel.from_frames(etf_bars, [a["etf_code"] for a in assets])
+    enough = panel.valid_counts() >= momentum_period + 1
+    for asset in assets:
+        code = asset["etf_code"]
+        if code not in panel.codes or not enough[panel.column(code)]:
+            print(f"警告：{asset['name']} 数据不足，跳过")
+    momentum_cols = np.flatnonzero(enough)
+    asset_by_code = {a["etf_code"]: a for a in assets}
+    momentum_assets = [asset_by_code[panel.codes[j]] for j in momentum_cols]
+    return_20d = panel.returns(momentum_period)[momentum_cols]
+    return_10d = panel.returns(10)[momentum_cols]
+    last_close = panel.close[-1, momentum_cols] if len(panel) else np.array([])
+    latest_date = str(panel.dates[-1]) if len(momentum_cols) else None
+
+    factor_vec = np.array([event_factors.get(a['name'], 1.0) for a in momentum_assets], dtype='float64')
+    adjusted_momentum = return_20d * factor_vec
+    asset_momentums = []
+    for j in rank_desc(adjusted_momentum):
+        asset_momentums.append({
+            "name": momentum_assets[j]["name"],
+            "etf_code": momentum_assets[j]["etf_code"],
+            "momentum": float(return_20d[j]),
+            "momentum_10d": None if np.isnan(return_10d[j]) else float(return_10d[j]),
+            "adjusted_momentum": float(adjusted_momentum[j]),
+            "close": float(last_close[j]),
+            "date": latest_date
+        })
+    return asset_momentums, panel, momentum_cols, latest_date
 
 # ====================== 读取人工干预事件 ======================
-def load_events():
-    config_path = 'events_config.json'
+def load_events(config_path=EVENTS_FILE):
     if not os.path.exists(config_path):
         return []
     with open(config_path, 'r', encoding='utf-8') as f:
@@ -180,161 +281,162 @@ def load_events():
         except:
             return []
 
-events = load_events()
-today_str = datetime.now().strftime('%Y-%m-%d')
-current_events = [e for e in events if e.get('start_date', '') <= today_str <= e.get('end_date', '')]
-
-event_factors = {}
-event_force = {}
-
-for e in current_events:
-    for asset_name in e.get('affected_assets', []):
-        if 'factor' in e:
-            event_factors[asset_name] = event_factors.get(asset_name, 1.0) * e['factor']
-        if 'force_ratio' in e:
-            event_force[asset_name] = e['force_ratio']
-
-for asset in asset_momentums:
-    name = asset['name']
-    asset['adjusted_momentum'] = asset['momentum'] * event_factors.get(name, 1.0)
-
-asset_momentums.sort(key=lambda x: x['adjusted_momentum'], reverse=True)
+def active_events(events, today_str=None):
+    today_str = today_str or datetime.now().strftime('%Y-%m-%d')
+    return [e for e in events if e.get('start_date', '') <= today_str <= e.get('end_date', '')]
+
+def event_adjustments(current_events):
+    """返回 (event_factors, event_force)：各资产动量乘数与强制仓位比例"""
+    event_factors = {}
+    event_force = {}
+    for e in current_events:
+        for asset_name in e.get('affected_assets', []):
+            if 'factor' in e:
+                event_factors[asset_name] = event_factors.get(asset_name, 1.0) * e['factor']
+            if 'force_ratio' in e:
+                event_force[asset_name] = e['force_ratio']
+    return event_factors, event_force
 
 # ====================== 轮动决策 ======================
-best = None
-forced_asset = None
-forced_ratio = 0
-for name, ratio in event_force.items():
-    if any(a['name'] == name for a in asset_momentums):
-        forced_asset = name
-        forced_ratio = ratio
-        break
-
-if forced_asset:
-    best = next(a for a in asset_momentums if a['name'] == forced_asset)
-    signal = f"人工干预：配置 {best['name']}"
-    position = f"配置 {best['etf_code']} ({best['name']}) {forced_ratio:.0%} 仓位"
-    best_etf = best['etf_code']
-else:
-    if asset_momentums:
-        top = asset_momentums[0]
-        market_ok = (market_adx is not None and market_adx >= ADX_TREND_THRESHOLD) or (market_adx is None)
-        if top['adjusted_momentum'] > BUY_THRESHOLD and market_ok:
-            best = top
-        elif top['adjusted_momentum'] > SELL_THRESHOLD and market_ok:
-            best = top
+def decide(asset_momentums, market_adx, event_force=None, buy_threshold=BUY_THRESHOLD,
+           sell_threshold=SELL_THRESHOLD, adx_threshold=ADX_TREND_THRESHOLD, etf_safe=ETF_SAFE):
+    """
+    根据排序后的动量、市场 ADX 和强制事件给出当日决策
+    返回 dict: best（选中资产或 None）/ best_etf / signal / position
+    """
+    event_force = event_force or {}
+    best = None
+    forced_asset = None
+    forced_ratio = 0
+    for name, ratio in event_force.items():
+        if any(a['name'] == name for a in asset_momentums):
+            forced_asset = name
+            forced_ratio = ratio
+            break
+
+    if forced_asset:
+        best = next(a for a in asset_momentums if a['name'] == forced_asset)
+        signal = f"人工干预：配置 {best['name']}"
+        position = f"配置 {best['etf_code']} ({best['name']}) {forced_ratio:.0%} 仓位"
+        best_etf = best['etf_code']
+    else:
+        if asset_momentums:
+            top = asset_momentums[0]
+            market_ok = (market_adx is not None and market_adx >= adx_threshold) or (market_adx is None)
+            if top['adjusted_momentum'] > buy_threshold and market_ok:
+                best = top
+            elif top['adjusted_momentum'] > sell_threshold and market_ok:
+                best = top
+            else:
+                best = None
         else:
             best = None
-    else:
-        best = None
 
-    if best:
-        if best['adjusted_momentum'] > BUY_THRESHOLD:
-            signal = f"强烈买入 {best['name']}"
+        if best:
+            if best['adjusted_momentum'] > buy_threshold:
+                signal = f"强烈买入 {best['name']}"
+            else:
+                signal = f"谨慎持有 {best['name']}"
+            position = f"全仓 {best['etf_code']} ({best['name']})"
+            best_etf = best['etf_code']
         else:
-            signal = f"谨慎持有 {best['name']}"
-        position = f"全仓 {best['etf_code']} ({best['name']})"
-        best_etf = best['etf_code']
-    else:
-        reason = []
-        if market_adx is not None and market_adx < ADX_TREND_THRESHOLD:
-            reason.append("市场震荡")
-        if asset_momentums and asset_momentums[0]['momentum'] <= SELL_THRESHOLD:
-            reason.append("最强动量过低")
-        reason_str = " / ".join(reason) if reason else "无合适标的"
-        signal = f"空仓 ({reason_str})"
-        position = f"全仓 {ETF_SAFE} (银华日利)"
-        best_etf = ETF_SAFE
+            reason = []
+            if market_adx is not None and market_adx < adx_threshold:
+                reason.append("市场震荡")
+            if asset_momentums and asset_momentums[0]['momentum'] <= sell_threshold:
+                reason.append("最强动量过低")
+            reason_str = " / ".join(reason) if reason else "无合适标的"
+            signal = f"空仓 ({reason_str})"
+            position = f"全仓 {etf_safe} (银华日利)"
+            best_etf = etf_safe
+    return {'best': best, 'best_etf': best_etf, 'signal': signal, 'position': position}
 
 # ====================== 策略健康度评估 ======================
-def calculate_health_score():
-    df_market = fetch_index_data_baostock(MARKET_INDEX, days=800)
+@tracing.traced('step')
+def calculate_health_score(df_market):
     if df_market is None or len(df_market) < 200:
         return 50, 0, 0, 0, 0
-    df_market['return_20d'] = df_market['close'].pct_change(periods=20)
-    df_market['signal'] = (df_market['return_20d'] > 0).astype(int)
-    df_market['strategy_return'] = df_market['signal'].shift(1) * df_market['close'].pct_change()
-    df_market['nav'] = (1 + df_market['strategy_return']).cumprod()
-    df_market['signal_change'] = df_market['signal'] != df_market['signal'].shift(1)
-    trades = df_market[df_market['signal_change']].copy()
-    trade_returns = []
-    for i in range(len(trades)-1):
-        start = trades.index[i]
-        end = trades.index[i+1]
-        ret = (df_market.loc[end, 'close'] / df_market.loc[start, 'close']) - 1
-        if trades.iloc[i]['signal'] == 0:
-            ret = 0.0
-        trade_returns.append(ret)
-    recent = trade_returns[-10:] if len(trade_returns) >= 10 else trade_returns
-    win_rate = sum(1 for r in recent if r > 0) / len(recent) if recent else 0
-    cons_loss = 0
-    for r in reversed(trade_returns):
-        if r <= 0:
-            cons_loss += 1
-        else:
-            break
-    peak = df_market['nav'].expanding().max()
-    drawdown = (df_market['nav'] - peak) / peak
-    current_drawdown = drawdown.iloc[-1]
-    ret_series = df_market['strategy_return'].dropna()
-    if len(ret_series) > 0:
-        excess_ret = ret_series.mean() * 252 - 0.02
-        vol = ret_series.std() * np.sqrt(252)
-        sharpe = excess_ret / vol if vol != 0 else 0
+    from strategy_metrics import signal_metrics, health_scores
+    m = signal_metrics(df_market['close'].to_numpy(), period=20)
+    score = int(health_scores(m)[0])
+    return score, m['win_rate'][0], int(m['cons_loss'][0]), m['current_drawdown'][0], m['sharpe'][0]
+
+def health_status_of(health_score):
+    """健康分 -> (状态, 颜色, 建议)"""
+    if health_score >= 70:
+        return "健康", "green", "策略运行正常，按信号执行。"
+    elif health_score >= 40:
+        return "警惕", "orange", "近期表现偏弱，密切关注回撤，但暂不停止。"
     else:
-        sharpe = 0
-
-    score = 0
-    if win_rate >= 0.4: score += 30
-    elif win_rate >= 0.35: score += 20
-    elif win_rate >= 0.3: score += 10
-    else: score += 0
-
-    if cons_loss <= 2: score += 25
-    elif cons_loss <= 4: score += 15
-    elif cons_loss <= 5: score += 5
-    else: score += 0
-
-    if current_drawdown >= -0.05: score += 25
-    elif current_drawdown >= -0.10: score += 15
-    elif current_drawdown >= -0.15: score += 5
-    else: score += 0
-
-    if sharpe >= 1.0: score += 20
-    elif sharpe >= 0.5: score += 10
-    elif sharpe >= 0: score += 5
-    else: score += 0
-
-    return score, win_rate, cons_loss, current_drawdown, sharpe
-
-health_score, health_win_rate, health_cons_loss, health_drawdown, health_sharpe = calculate_health_score()
-
-if health_score >= 70:
-    health_status = "健康"
-    health_color = "green"
-    health_advice = "策略运行正常，按信号执行。"
-elif health_score >= 40:
-    health_status = "警惕"
-    health_color = "orange"
-    health_advice = "近期表现偏弱，密切关注回撤，但暂不停止。"
-else:
-    health_status = "警告"
-    health_color = "red"
-    health_advice = "⚠️ 策略可能失效，建议暂停交易，进入观察模式！"
+        return "警告", "red", "⚠️ 策略可能失效，建议暂停交易，进入观察模式！"
+
+# ====================== 轮动策略回测（实盘决策逻辑重放）======================
+@tracing.traced('step')
+def run_rotation_backtest(panel, momentum_cols, market_df, market_adx, cfg, events=None):
+    """events 不为空时按区间索引逐日重放历史事件的动量因子与强制仓位"""
+    from price_panel import PricePanel
+    from backtest import run_backtest, align_to_dates, summarize as summarize_backtest
+    if not len(momentum_cols):
+        return None
+    rotation_panel = PricePanel(panel.dates, [panel.codes[j] for j in momentum_cols], panel.close[:, momentum_cols])
+    rotation_adx = None
+    if market_adx is not None:
+        adx_series = calc_adx(market_df, cfg['ADX_PERIOD'])
+        rotation_adx = align_to_dates(rotation_panel.dates, market_df['date'].to_numpy(), adx_series.to_numpy())
+    factors = force = force_priority = None
+    if events:
+        from event_index import EventIndex
+        names = {a['etf_code']: a['name'] for a in cfg['ASSETS']}
+        factors, force, force_priority = EventIndex(events).matrices(
+            rotation_panel.dates, [names.get(c, c) for c in rotation_panel.codes])
+    rotation_result = run_backtest(
+        rotation_panel,
+        momentum_period=cfg['MOMENTUM_PERIOD'],
+        buy_threshold=cfg['BUY_THRESHOLD'],
+        sell_threshold=cfg['SELL_THRESHOLD'],
+        adx=rotation_adx,
+        adx_threshold=cfg['ADX_TREND_THRESHOLD'],
+        factors=factors,
+        force=force,
+        force_priority=force_priority,
+    )
+    if rotation_result:
+        summary = summarize_backtest(rotation_result)
+        print(f"📈 轮动回测：总收益 {summary['total_return']:.2%}，年化 {summary['annual_return']:.2%}，"
+              f"最大回撤 {summary['max_drawdown']:.2%}，交易 {summary['trades']} 段")
+    return rotation_result
+
+# ====================== 各品种及轮动净值健康度（同一套指标，面板一次算完）======================
+@tracing.traced('step')
+def compute_asset_health(panel, momentum_cols, rotation_result=None):
+    """返回 {etf_code: 健康分}，并打印轮动净值的健康度"""
+    from strategy_metrics import signal_metrics, position_metrics, health_scores
+    asset_health = {}
+    if len(momentum_cols):
+        asset_metrics = signal_metrics(panel.close[:, momentum_cols], period=20)
+        for code, score in zip([panel.codes[j] for j in momentum_cols], health_scores(asset_metrics)):
+            asset_health[code] = int(score)
+    if rotation_result:
+        rotation_metrics = position_metrics(rotation_result['positions'], rotation_result['nav'], rotation_result['returns'])
+        rotation_health = int(health_scores(rotation_metrics)[0])
+        print(f"🧠 轮动净值健康度：{rotation_health} 分（胜率 {rotation_metrics['win_rate'][0]:.0%}，"
+              f"连亏 {rotation_metrics['cons_loss'][0]} 笔，回撤 {rotation_metrics['current_drawdown'][0]:.2%}，"
+              f"夏普 {rotation_metrics['sharpe'][0]:.2f}）")
+    return asset_health
 
 # ====================== 动态仓位建议 =======================
-if best and best_etf != ETF_SAFE:
-    mom = best['adjusted_momentum']
-    if mom > 0.15:
-        suggested_position = "80-100%"
-    elif mom > 0.08:
-        suggested_position = "50-80%"
-    elif mom > 0.02:
-        suggested_position = "20-50%"
-    else:
-        suggested_position = "0%"
-else:
-    suggested_position = "0%"
+def suggest_position(best, best_etf, etf_safe=ETF_SAFE):
+    if best and best_etf != etf_safe:
+        mom = best['adjusted_momentum']
+        if mom > 0.15:
+            return "80-100%"
+        elif mom > 0.08:
+            return "50-80%"
+        elif mom > 0.02:
+            return "20-50%"
+        else:
+            return "0%"
+    return "0%"
 
 # ====================== 读取干预建议（模拟版，可保留后续接入真实因子）======================
 def load_interventions(filename):
@@ -347,359 +449,178 @@ def load_interventions(filename):
     except:
         return []
 
-news = load_interventions('news_interventions.json')
-north = load_interventions('north_interventions.json')
-flow = load_interventions('flow_interventions.json')
-commodity = load_interventions('commodity_interventions.json')
-all_suggestions = news + north + flow + commodity
-
-asset_groups = defaultdict(list)
-for s in all_suggestions:
-    asset = s.get('asset')
-    if asset:
-        asset_groups[asset].append(s)
-
-def merge_asset_suggestions(suggestions):
+def merge_asset_suggestions(asset, suggestions):
+    """合并单个品种的多条建议（口径见 intervention_store.InterventionStore.merge），分歧或无建议返回 None"""
+    from intervention_store import InterventionStore
     if not suggestions:
         return None
-    bull_count = sum(1 for s in suggestions if s.get('direction') == 'bull')
-    bear_count = sum(1 for s in suggestions if s.get('direction') == 'bear')
-    total_strength = 0
-    weighted_factor_sum = 0
-    for s in suggestions:
-        strength = s.get('strength', 3)
-        factor = s.get('factor', 1.0)
-        total_strength += strength
-        weighted_factor_sum += strength * factor
-    avg_strength = total_strength / len(suggestions) if total_strength > 0 else 3
-    avg_factor = weighted_factor_sum / total_strength if total_strength > 0 else 1.0
-    if bull_count > 0 and bear_count > 0:
-        if bull_count > bear_count:
-            direction = 'bull'
-            bear_strength = sum(s.get('strength',3) for s in suggestions if s.get('direction')=='bear')
-            conflict_ratio = bear_strength / total_strength if total_strength>0 else 0
-            avg_factor = avg_factor * (1 - conflict_ratio * 0.3)
-        elif bear_count > bull_count:
-            direction = 'bear'
-            bull_strength = sum(s.get('strength',3) for s in suggestions if s.get('direction')=='bull')
-            conflict_ratio = bull_strength / total_strength if total_strength>0 else 0
-            avg_factor = avg_factor * (1 + conflict_ratio * 0.3)
-        else:
-            return None
-    else:
-        direction = 'bull' if bull_count > 0 else 'bear'
-    reasons = [s.get('reason', '') for s in suggestions if s.get('reason')]
-    reason_combined = "；".join(reasons[:3])
-    sources = list(set(s.get('source', '未知') for s in suggestions))
+    merged = InterventionStore.from_records([{**s, 'asset': asset} for s in suggestions]).merge()
+    return merged[0] if merged else None
+
+def merge_interventions(filenames=INTERVENTION_FILES, half_life_days=None, history_file=None, now=None):
+    """
+    读取全部干预文件，按品种一次性分组合并，返回按品种排序的合并结果列表
+    half_life_days 不为空时并入多日历史（history_file），按建议时间做指数衰减
+    """
+    from intervention_store import InterventionStore, update_history, HISTORY_FILE
+    store = InterventionStore.from_files(filenames)
+    if not half_life_days:
+        return store.merge()
+    store = update_history(store, history_file or HISTORY_FILE, now=now)
+    return store.merge(now=now, half_life=half_life_days * 86400)
+
+@tracing.traced('step')
+def build_intervention_text(filenames=INTERVENTION_FILES, half_life_days=None, history_file=None):
+    merged_list = merge_interventions(filenames, half_life_days, history_file)
+
+    intervention_lines = ["【今日干预信息】"]
+    for m in merged_list:
+        direction_cn = "利多" if m['direction'] == 'bull' else "利空"
+        sources_cn = "、".join(m['sources'])
+        line = f"- {m['asset']}：{direction_cn}，建议因子 {m['factor']}，强度 {m['strength']}（{sources_cn}）"
+        intervention_lines.append(line)
+
+    if not merged_list:
+        intervention_lines.append("无有效干预建议。")
+
+    return "\n".join(intervention_lines)
+
+# ====================== 流水线各阶段 ======================
+@tracing.traced('stage')
+def fetch_stage(cfg):
+    """取数：市场指数（ADX/健康度共用一次下载）+ 全部 ETF 日线（并发）"""
+    from index_provider import default_provider
+    from tdx_pool import fetch_parallel
+    # 同一指数只下载一次最大窗口，ADX 与健康度各自切片使用
+    default_provider.require(cfg['MARKET_INDEX'], cfg['ADX_HISTORY_DAYS'])
+    default_provider.require(cfg['MARKET_INDEX'], cfg['HEALTH_HISTORY_DAYS'])
+    with tracing.span('market_index'):
+        market_df = fetch_index_data_baostock(cfg['MARKET_INDEX'], days=cfg['ADX_HISTORY_DAYS'])
+        health_df = fetch_index_data_baostock(cfg['MARKET_INDEX'], days=cfg['HEALTH_HISTORY_DAYS'])
+
+    with tracing.span('etf_bars', assets=len(cfg['ASSETS'])):
+        pool = get_tdx_pool(cfg['TDX_IPS'], size=cfg['FETCH_WORKERS'])
+        etf_bars = fetch_parallel(
+            [a["etf_code"] for a in cfg['ASSETS']],
+            lambda code: fetch_etf_data_tdx(code, days=cfg['ETF_HISTORY_DAYS'], pool=pool),
+            max_workers=cfg['FETCH_WORKERS'],
+            timeout=cfg['FETCH_TIMEOUT'],
+        )
+        pool.close_all()
+    return {'market_df': market_df, 'health_df': health_df, 'etf_bars': etf_bars}
+
+@tracing.traced('stage')
+def compute_stage(data, cfg, today_str=None):
+    """计算：市场 ADX、事件调整后的动量排序、健康度、轮动回测"""
+    market_df = data['market_df']
+    market_adx = compute_market_adx(market_df, cfg['ADX_PERIOD'], cfg['ADX_STATE_FILE'])
+
+    events = load_events(cfg['EVENTS_FILE'])
+    current_events = active_events(events, today_str)
+    event_factors, event_force = event_adjustments(current_events)
+    asset_momentums, panel, momentum_cols, latest_date = compute_momentum(
+        data['etf_bars'], cfg['ASSETS'], event_factors, cfg['MOMENTUM_PERIOD'])
+
+    health_score, health_win_rate, health_cons_loss, health_drawdown, health_sharpe = calculate_health_score(data['health_df'])
+    health_status, health_color, health_advice = health_status_of(health_score)
+
+    rotation_result = run_rotation_backtest(panel, momentum_cols, market_df, market_adx, cfg, events)
+    asset_health = compute_asset_health(panel, momentum_cols, rotation_result)
     return {
-        'asset': asset,
-        'direction': direction,
-        'factor': round(avg_factor, 2),
-        'strength': round(avg_strength, 1),
-        'reason': reason_combined,
-        'sources': sources,
-        'count': len(suggestions)
+        'market_adx': market_adx,
+        'current_events': current_events,
+        'event_factors': event_factors,
+        'event_force': event_force,
+        'asset_momentums': asset_momentums,
+        'panel': panel,
+        'latest_date': latest_date,
+        'health_score': health_score,
+        'health_status': health_status,
+        'health_color': health_color,
+        'health_advice': health_advice,
+        'rotation_result': rotation_result,
+        'asset_health': asset_health,
     }
 
-merged_list = []
-for asset, sugs in asset_groups.items():
-    merged = merge_asset_suggestions(sugs)
-    if merged:
-        merged_list.append(merged)
-
-merged_list.sort(key=lambda x: x['asset'])
-
-intervention_lines = ["【今日干预信息】"]
-for m in merged_list:
-    direction_cn = "利多" if m['direction'] == 'bull' else "利空"
-    sources_cn = "、".join(m['sources'])
-    line = f"- {m['asset']}：{direction_cn}，建议因子 {m['factor']}，强度 {m['strength']}（{sources_cn}）"
-    intervention_lines.append(line)
-
-if not merged_list:
-    intervention_lines.append("无有效干预建议。")
-
-intervention_text = "\n".join(intervention_lines)
-
-# ====================== 生成 HTML 页面（注意处理 asset_momentums 可能为空）======================
-if asset_momentums:
-    # 正常有数据的情况
-    signal_class = 'strong-buy' if best and best['adjusted_momentum'] > BUY_THRESHOLD else ('buy' if best else 'sell')
-    market_adx_display = f"{market_adx:.1f} {'✅趋势' if market_adx and market_adx >= ADX_TREND_THRESHOLD else '❌震荡' if market_adx else '未知'}"
-    market_adx_color = '#166534' if market_adx and market_adx >= ADX_TREND_THRESHOLD else '#991b1b'
-
-    buy_threshold_display = f"最强 {asset_momentums[0]['adjusted_momentum']:.1%} {'✅满足' if best and best['adjusted_momentum'] > BUY_THRESHOLD else '❌不满足' if best else '无'}"
-    buy_threshold_color = '#166534' if best and best['adjusted_momentum'] > BUY_THRESHOLD else '#991b1b'
-
-    sell_threshold_display = f"{asset_momentums[0]['adjusted_momentum']:.1%} {'❌空仓' if best is None else '✅持有'}"
-    sell_threshold_color = '#991b1b' if best is None else '#166534'
-
-    if current_events:
-        events_list = ''.join([f"<div>• {e['name']}: {e['description']}</div>" for e in current_events])
-        events_html = f'<div style="background:#fef9c3; border-radius:20px; padding:15px; margin:15px 0;"><div style="font-weight:600; margin-bottom:8px;">📢 当前生效事件</div>{events_list}</div>'
+@tracing.traced('stage')
+def decide_stage(ctx, cfg):
+    """决策：在计算结果上加入 best / best_etf / signal / position / suggested_position"""
+    decision = decide(ctx['asset_momentums'], ctx['market_adx'], ctx['event_force'],
+                      cfg['BUY_THRESHOLD'], cfg['SELL_THRESHOLD'], cfg['ADX_TREND_THRESHOLD'], cfg['ETF_SAFE'])
+    decision['suggested_position'] = suggest_position(decision['best'], decision['best_etf'], cfg['ETF_SAFE'])
+    return {**ctx, **decision}
+
+@tracing.traced('stage')
+def render_stage(ctx, cfg):
+    """输出：信号历史（SQLite upsert 后导出 CSV）+ 页面（首页、每日归档页、标的页，只重写有变化的页面）"""
+    from signal_store import SignalStore
+    from dashboard import render_site
+    ctx = {**ctx, 'intervention_text': build_intervention_text(
+        cfg['INTERVENTION_FILES'], cfg['INTERVENTION_HALF_LIFE_DAYS'], cfg['INTERVENTION_HISTORY_FILE'])}
+
+    best = ctx['best']
+    asset_momentums = ctx['asset_momentums']
+    with tracing.span('signal_store'), SignalStore() as store:
+        store.upsert({
+            'date': ctx['latest_date'] if ctx['latest_date'] else datetime.now().strftime('%Y-%m-%d'),
+            'selected': best['name'] if best else '空仓',
+            'etf': ctx['best_etf'],
+            'market_adx': ctx['market_adx'],
+            'top_momentum': asset_momentums[0]['momentum'] if asset_momentums else 0,
+            'health_score': ctx['health_score'],
+            'health_status': ctx['health_status']
+        })
+        store.export_csv()
+        history = store.query()
+
+    with tracing.span('render_site'):
+        render_site(ctx, cfg, history, root=os.path.dirname(cfg['HTML_FILE']) or '.')
+    return ctx
+
+def run_pipeline(config=None):
+    """完整运行一次：fetch → compute → decide → render，返回最终上下文 dict；cfg['TRACE'] 为真时记录 trace"""
+    cfg = {**default_config(), **(config or {})}
+    with tracing.maybe_session('pipeline', cfg['TRACE']):
+        return _run_stages(cfg)
+
+def _run_stages(cfg):
+    data = fetch_stage(cfg)
+    ctx = compute_stage(data, cfg)
+    ctx = decide_stage(ctx, cfg)
+    return render_stage(ctx, cfg)
+
+@tracing.traced('stage')
+def universe_stage(cfg):
+    """全市场筛选：枚举全部 ETF → 并发拉取日线 → 流动性过滤 → N 日涨幅前 K 名（不影响轮动信号）"""
+    import etf_universe
+    pool = get_tdx_pool(cfg['TDX_IPS'], size=cfg['UNIVERSE_WORKERS'])
+    etfs = etf_universe.list_etfs(pool)
+    print(f"📋 全市场 ETF {len(etfs)} 只，开始拉取日线...")
+    bars = etf_universe.fetch_universe_bars(
+        etfs, pool, cfg['UNIVERSE_HISTORY_DAYS'], cfg['UNIVERSE_WORKERS'], cfg['FETCH_TIMEOUT'])
+    pool.close_all()
+    top, counts = etf_universe.screen(etfs, bars, cfg['MOMENTUM_PERIOD'], cfg['UNIVERSE_TOP_K'],
+                                      cfg['UNIVERSE_MIN_AMOUNT'])
+    print(f"🔎 获取 {counts['fetched']} 只，流动性达标 {counts.get('liquid', 0)} 只，"
+          f"参与排名 {counts.get('screened', 0)} 只")
+    for row in top:
+        ret_10 = f"{row['momentum_10d']:+.2%}" if row['momentum_10d'] is not None else '  -  '
+        print(f"{row['rank']:>3}. {row['name']:<12} {row['etf_code']}  "
+              f"{cfg['MOMENTUM_PERIOD']}日 {row['momentum']:+.2%}  10日 {ret_10}  "
+              f"成交额 {row['amount'] / 1e8:.2f} 亿")
+    etf_universe.save_csv(top, cfg['UNIVERSE_FILE'])
+    print(f"💾 前 {len(top)} 名已保存至 {cfg['UNIVERSE_FILE']}")
+    return {'universe_top': top, 'universe_counts': counts}
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='多品种动量轮动 + 健康预警')
+    parser.add_argument('--universe', action='store_true', help='全市场 ETF 动量筛选（不生成轮动信号）')
+    parser.add_argument('--top', type=int, default=UNIVERSE_TOP_K, help='全市场筛选输出的前 K 名')
+    parser.add_argument('--trace', action='store_true', help='记录各阶段与网络请求的耗时/内存，写出 traces/ 下的 trace 与汇总')
+    args = parser.parse_args()
+    if args.universe:
+        with tracing.maybe_session('universe', args.trace or TRACE):
+            universe_stage({**default_config(), 'UNIVERSE_TOP_K': args.top})
     else:
-        events_html = ''
-
-    table_rows = ''
-    for a in asset_momentums:
-        selected_class = 'selected' if a == best else ''
-        momentum_class = 'positive' if a['momentum'] > 0 else 'negative'
-        momentum_10d_class = 'positive' if a.get('momentum_10d') and a['momentum_10d'] > 0 else 'negative' if a.get('momentum_10d') else ''
-        selected_mark = '✅ 选中' if a == best else ''
-        momentum_10d_str = f"{a['momentum_10d']:.2%}" if a['momentum_10d'] is not None else "N/A"
-        table_rows += f'<tr class="{selected_class}"><td>{a["name"]}</td><td class="{momentum_class}">{a["momentum"]:.2%}</td><td class="{momentum_10d_class}">{momentum_10d_str}</td><td>{a["adjusted_momentum"]:.2%}</td><td>{selected_mark}</td></tr>'
-else:
-    # 无任何资产数据时的占位显示
-    signal_class = 'sell'
-    market_adx_display = '无数据'
-    market_adx_color = '#991b1b'
-    buy_threshold_display = '无数据'
-    buy_threshold_color = '#991b1b'
-    sell_threshold_display = '无数据'
-    sell_threshold_color = '#991b1b'
-    events_html = ''
-    table_rows = '<tr><td colspan="5" style="text-align:center;">暂无有效资产数据</td></tr>'
-
-html_template = """<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>多品种动量轮动+健康预警</title>
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(145deg, #f0f2f5 0%, #e6e9f0 100%);
-            margin: 0;
-            padding: 20px;
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-        }}
-        .card {{
-            background: rgba(255,255,255,0.9);
-            backdrop-filter: blur(8px);
-            border-radius: 36px;
-            padding: 30px 25px;
-            box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-            max-width: 450px;
-            width: 100%;
-        }}
-        h1 {{ font-size: 22px; text-align: center; color: #1e293b; margin: 0 0 10px; }}
-        .badge {{
-            background: #0f172a; color: white; padding: 6px 14px; border-radius: 40px;
-            font-size: 14px; display: inline-block; margin-bottom: 15px;
-        }}
-        .health-bar {{
-            background-color: {health_color};
-            color: white; padding: 12px 18px;
-            border-radius: 40px; margin-bottom: 20px;
-            display: flex; justify-content: space-between; align-items: center;
-        }}
-        .health-text {{ font-size: 16px; font-weight: 700; }}
-        .health-score {{ font-size: 20px; font-weight: 800; }}
-        .advice-box {{
-            background: #f1f5f9; padding: 12px; border-radius: 24px;
-            margin: 15px 0; font-size: 15px; color: #1e293b;
-        }}
-        .signal {{
-            font-size: 40px; font-weight: 800; padding: 20px; border-radius: 48px;
-            text-align: center; margin: 15px 0;
-        }}
-        .strong-buy {{ background: #1e7e34; color: white; box-shadow: 0 8px 0 #0f4d1f; }}
-        .buy {{ background: #4caf50; color: white; box-shadow: 0 8px 0 #2e7d32; }}
-        .sell {{ background: #f44336; color: white; box-shadow: 0 8px 0 #b71c1c; }}
-        .position {{
-            background: #f1f5f9; padding: 18px; border-radius: 30px;
-            font-size: 18px; font-weight: 500; margin: 20px 0;
-            border: 1px solid #cbd5e1; text-align: center;
-        }}
-        .filter-info {{
-            background: #e9eef3; border-radius: 20px; padding: 15px; margin: 15px 0;
-        }}
-        .filter-item {{
-            display: flex; justify-content: space-between; margin: 5px 0;
-        }}
-        .asset-table {{
-            background: #ffffffcc; border-radius: 20px; padding: 15px; margin-top: 20px;
-        }}
-        table {{ width: 100%; border-collapse: collapse; font-size: 15px; }}
-        th, td {{ padding: 10px 5px; text-align: center; border-bottom: 1px solid #cbd5e1; }}
-        th {{ font-weight: 600; color: #334155; }}
-        .positive {{ color: #166534; font-weight: 600; }}
-        .negative {{ color: #991b1b; font-weight: 600; }}
-        .selected {{ background-color: #dcfce7; font-weight: 700; }}
-        .footer {{ font-size: 14px; color: #64748b; text-align: center; margin-top: 25px; }}
-        .event-link {{
-            margin-top: 20px;
-            text-align: center;
-        }}
-        .event-link a {{
-            background: #0f172a;
-            color: white;
-            padding: 8px 16px;
-            border-radius: 30px;
-            text-decoration: none;
-            font-size: 14px;
-            display: inline-block;
-        }}
-        .event-link a:hover {{
-            background: #1e293b;
-        }}
-        .intervention-area {{
-            margin-top: 20px;
-            background: #f0f0f0;
-            padding: 15px;
-            border-radius: 10px;
-        }}
-        .intervention-area h4 {{
-            margin-top: 0;
-            color: #0f172a;
-        }}
-        .intervention-text {{
-            white-space: pre-wrap;
-            font-size: 14px;
-            background: white;
-            padding: 10px;
-            border-radius: 5px;
-            border: 1px solid #ccc;
-        }}
-        .copy-btn {{
-            margin-top: 8px;
-            padding: 8px 16px;
-            background: #0f172a;
-            color: white;
-            border: none;
-            border-radius: 5px;
-            cursor: pointer;
-        }}
-    </style>
-</head>
-<body>
-<div class="card">
-    <div style="display: flex; justify-content: space-between;">
-        <span class="badge">📊 多品种轮动+健康预警</span>
-        <span class="badge" style="background:#334155;">更新 {latest_date}</span>
-    </div>
-
-    <div class="health-bar">
-        <span class="health-text">🧠 策略状态：{health_status}</span>
-        <span class="health-score">{health_score} 分</span>
-    </div>
-    <div class="advice-box">
-        {health_advice}<br>
-        <span style="font-size:13px; color:#475569;">（基于创业板指数模拟，仅供参考）</span>
-    </div>
-
-    <h1>今日信号</h1>
-    <div class="signal {signal_class}">{signal}</div>
-    <div class="position">⚡ {position}</div>
-
-    <div style="background: #e9eef3; border-radius: 20px; padding: 15px; margin: 15px 0;">
-        <div style="font-weight:600; margin-bottom:10px;">💰 建议仓位</div>
-        <div style="font-size: 32px; font-weight: 800; text-align: center;">{suggested_position}</div>
-    </div>
-
-    <div class="filter-info">
-        <div style="font-weight:600; margin-bottom:8px;">🛡️ 过滤条件</div>
-        <div class="filter-item">
-            <span>市场状态 (ADX)</span>
-            <span style="color:{market_adx_color};">{market_adx_display}</span>
-        </div>
-        <div class="filter-item">
-            <span>买入阈值 >{BUY_THRESHOLD:.0%}</span>
-            <span style="color:{buy_threshold_color};">{buy_threshold_display}</span>
-        </div>
-        <div class="filter-item">
-            <span>卖出阈值 <{SELL_THRESHOLD:.0%}</span>
-            <span style="color:{sell_threshold_color};">{sell_threshold_display}</span>
-        </div>
-    </div>
-
-    <!-- 当前生效事件展示 -->
-    {events_html}
-
-    <div class="asset-table">
-        <div style="font-weight:600; margin-bottom:10px;">📋 各品种动量排序（调整后）</div>
-        <table>
-            <tr><th>品种</th><th>20日涨幅</th><th>10日涨幅</th><th>调整后</th><th>状态</th></tr>
-            {table_rows}
-        </table>
-    </div>
-
-    <!-- 人工干预链接 -->
-    <div class="event-link">
-        <a href="https://github.com/feihudie2026/etf-momentum-v2/edit/main/events_config.json" target="_blank">
-            ✏️ 管理人工干预事件
-        </a>
-    </div>
-
-    <!-- 今日干预信息 -->
-    <div class="intervention-area">
-        <h4>💬 今日干预信息（复制后发给我）</h4>
-        <div class="intervention-text" id="interventionText">{intervention_text}</div>
-        <button class="copy-btn" onclick="copyIntervention()">📋 复制提示词</button>
-    </div>
-
-    <div class="footer">
-        🤖 每日14:30更新 · 执行时间 14:50<br>
-        空仓时持有 {ETF_SAFE} (银华日利)<br>
-        健康度指标基于创业板指数模拟，非实盘收益。
-    </div>
-</div>
-<script>
-function copyIntervention() {{
-    var text = document.getElementById('interventionText').innerText;
-    navigator.clipboard.writeText(text).then(function() {{
-        alert('提示词已复制，请粘贴到与AI的对话中');
-    }});
-}}
-</script>
-</body>
-</html>
-"""
-
-# 填充模板
-html_content = html_template.format(
-    health_color=health_color,
-    latest_date=latest_date if latest_date else datetime.now().strftime('%Y-%m-%d'),
-    health_status=health_status,
-    health_score=health_score,
-    health_advice=health_advice,
-    signal_class=signal_class,
-    signal=signal,
-    position=position,
-    suggested_position=suggested_position,
-    BUY_THRESHOLD=BUY_THRESHOLD,
-    SELL_THRESHOLD=SELL_THRESHOLD,
-    market_adx_color=market_adx_color,
-    market_adx_display=market_adx_display,
-    buy_threshold_color=buy_threshold_color,
-    buy_threshold_display=buy_threshold_display,
-    sell_threshold_color=sell_threshold_color,
-    sell_threshold_display=sell_threshold_display,
-    events_html=events_html,
-    table_rows=table_rows,
-    ETF_SAFE=ETF_SAFE,
-    intervention_text=intervention_text
-)
-
-with open('docs/index.html', 'w', encoding='utf-8') as f:
-    f.write(html_content)
-
-record = pd.DataFrame([{
-    'date': latest_date if latest_date else datetime.now().strftime('%Y-%m-%d'),
-    'selected': best['name'] if best else '空仓',
-    'etf': best_etf,
-    'market_adx': market_adx,
-    'top_momentum': asset_momentums[0]['momentum'] if asset_momentums else 0,
-    'health_score': health_score,
-    'health_status': health_status
-}])
-csv_path = 'docs/signals.csv'
-if os.path.exists(csv_path):
-    old = pd.read_csv(csv_path)
-    combined = pd.concat([old, record], ignore_index=True)
-else:
-    combined = record
-combined.to_csv(csv_path, index=False)
+        run_pipeline({'TRACE': True} if args.trace else None)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+新闻去重存储（SQLite，按哈希索引）
+- `h in store`：只看最近 window_days 天内出现过的哈希（主键查找，O(1)）
+- add_many()：追加本次入选的新闻哈希，不重写已有数据
+- compact()：删除窗口外的记录并整理数据库文件，打开时每天最多自动执行一次
+首次创建时自动导入旧版 news_history.csv
+"""
+
+import os
+import csv
+import sqlite3
+from datetime import datetime, timedelta
+
+DB_FILE = 'news_history.db'
+LEGACY_CSV = 'news_history.csv'
+WINDOW_DAYS = 3
+COMPACT_INTERVAL_DAYS = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS news_hashes (
+    hash     TEXT PRIMARY KEY,
+    seen_at  TEXT NOT NULL,
+    title    TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_news_hashes_seen_at ON news_hashes (seen_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT
+);
+"""
+
+class NewsDedupeStore:
+    def __init__(self, path=DB_FILE, window_days=WINDOW_DAYS, legacy_csv=LEGACY_CSV, now=None):
+        is_new = not os.path.exists(path)
+        self.path = path
+        self.window_days = window_days
+        self.now = now or datetime.now()
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        if is_new and legacy_csv and os.path.exists(legacy_csv):
+            n = self.import_csv(legacy_csv)
+            print(f"📥 已从 {legacy_csv} 导入 {n} 条窗口内新闻哈希")
+        if self._compact_due():
+            self.compact()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- 查询 ----------
+    def cutoff(self):
+        """窗口起点：seen_at（YYYY-MM-DD）晚于此时刻的记录视为有效，口径与原 load_history 一致"""
+        return (self.now - timedelta(days=self.window_days)).strftime('%Y-%m-%d %H:%M:%S')
+
+    def __contains__(self, h):
+        row = self.conn.execute(
+            "SELECT 1 FROM news_hashes WHERE hash = ? AND seen_at > ?", (h, self.cutoff())).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM news_hashes WHERE seen_at > ?", (self.cutoff(),)).fetchone()[0]
+
+    # ---------- 写入 ----------
+    def add_many(self, news_items):
+        """news_items: [{hash, title}]，同一哈希再次出现时刷新日期"""
+        today = self.now.strftime('%Y-%m-%d')
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO news_hashes (hash, seen_at, title) VALUES (?, ?, ?) "
+                "ON CONFLICT(hash) DO UPDATE SET seen_at = excluded.seen_at, title = excluded.title",
+                [(item['hash'], today, item.get('title', '')[:50]) for item in news_items])
+
+    def import_csv(self, path):
+        """导入旧版 news_history.csv（date, hash, title），只保留窗口内的记录"""
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = [r for r in csv.DictReader(f) if r.get('hash') and r.get('date', '') > self.cutoff()]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO news_hashes (hash, seen_at, title) VALUES (?, ?, ?) "
+                "ON CONFLICT(hash) DO UPDATE SET seen_at = MAX(seen_at, excluded.seen_at)",
+                [(r['hash'], r['date'][:10], (r.get('title') or '')[:50]) for r in rows])
+        return len(rows)
+
+    # ---------- 整理 ----------
+    def _compact_due(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'last_compact'").fetchone()
+        if row is None:
+            return True
+        last = datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S')
+        return self.now - last >= timedelta(days=COMPACT_INTERVAL_DAYS)
+
+    def compact(self):
+        """删除窗口外的哈希并回收空间，返回删除条数"""
+        with self.conn:
+            deleted = self.conn.execute("DELETE FROM news_hashes WHERE seen_at <= ?", (self.cutoff(),)).rowcount
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('last_compact', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (self.now.strftime('%Y-%m-%d %H:%M:%S'),))
+        if deleted:
+            self.conn.execute("VACUUM")
+        return deleted
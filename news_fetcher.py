@@ -7,11 +7,13 @@
 
 import os
 import json
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import hashlib
+import threading
 from collections import defaultdict
-from apify_client import ApifyClient
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
+from news_dedupe import NewsDedupeStore
+import tracing
 
 # ====================== 配置 ======================
 # 资产池（与你的系统一致）
@@ -43,75 +45,106 @@ NEGATIVE_WORDS = ['下跌', '大跌', '暴跌', '利空', '打压', '下挫', '
 
 # Apify 配置
 APIFY_TOKEN = os.environ.get('APIFY_TOKEN')
-if not APIFY_TOKEN:
-    raise ValueError("❌ 环境变量 APIFY_TOKEN 未设置！请在 GitHub Secrets 中添加。")
-
-# 初始化 Apify 客户端
-client = ApifyClient(APIFY_TOKEN)
+_client = None
+
+def get_client():
+    """首次使用时初始化 Apify 客户端（导入本模块不需要 token，便于分类函数单独复用）"""
+    global _client
+    if _client is None:
+        if not APIFY_TOKEN:
+            raise ValueError("❌ 环境变量 APIFY_TOKEN 未设置！请在 GitHub Secrets 中添加。")
+        from apify_client import ApifyClient
+        _client = ApifyClient(APIFY_TOKEN)
+    return _client
+
+# 并发抓取：同时运行的 Actor 数量，以及整批抓取的最长等待秒数（超时的关键词放弃，不影响其他关键词）
+APIFY_WORKERS = 8
+APIFY_TIMEOUT = 300
+APIFY_RUN_TIMEOUT = 240             # 单次 Actor 运行的超时（秒），由 Apify 平台终止
+
+# 抓取结果缓存：同一关键词在同一天内 TTL 秒内直接复用；过期但未超过 STALE 秒时先用旧结果、后台刷新
+# （APIFY_CACHE_TTL=0 关闭缓存）
+APIFY_CACHE_DIR = os.environ.get('APIFY_CACHE_DIR', os.path.join('cache', 'apify'))
+APIFY_CACHE_TTL = int(os.environ.get('APIFY_CACHE_TTL', 6 * 3600))
+APIFY_CACHE_STALE = int(os.environ.get('APIFY_CACHE_STALE', 12 * 3600))
+APIFY_CACHE_BUCKET = 86400          # 时间桶（秒），默认按自然日
+APIFY_ACTOR = "powerai/google-news-search-scraper"
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """全局唯一的抓取缓存；首次调用可能来自多个抓取线程，加锁保证只创建一个实例"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from response_cache import ResponseCache
+                _cache = ResponseCache(APIFY_CACHE_DIR, APIFY_CACHE_TTL, APIFY_CACHE_STALE, APIFY_CACHE_BUCKET,
+                                       max_refresh=APIFY_WORKERS)
+    return _cache
 
 # 输出文件
 OUTPUT_FILE = 'news_interventions.json'
-HISTORY_FILE = 'news_history.csv'  # 用于去重
+HISTORY_FILE = 'news_history.db'   # 用于去重（最近 3 天出现过的新闻哈希）
 
 # ====================== 工具函数 ======================
 def calculate_hash(text):
     """计算文本哈希用于去重"""
     return hashlib.md5(text.encode('utf-8')).hexdigest()
 
-def load_history(days=3):
-    """加载最近 days 天的历史新闻哈希"""
-    if not os.path.exists(HISTORY_FILE):
-        return set()
-    try:
-        df = pd.read_csv(HISTORY_FILE)
-        cutoff = datetime.now() - timedelta(days=days)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df[df['date'] > cutoff]
-        return set(df['hash'].tolist())
-    except Exception as e:
-        print(f"⚠️ 加载历史记录失败: {e}")
-        return set()
-
-def save_history(news_items):
-    """保存新闻哈希到历史文件"""
-    if not news_items:
-        return
-    df = pd.DataFrame([{
-        'date': datetime.now().strftime('%Y-%m-%d'),
-        'hash': item['hash'],
-        'title': item['title'][:50]
-    } for item in news_items])
-    if os.path.exists(HISTORY_FILE):
-        old_df = pd.read_csv(HISTORY_FILE)
-        df = pd.concat([old_df, df], ignore_index=True)
-    df.to_csv(HISTORY_FILE, index=False, encoding='utf-8-sig')
-
 # ====================== 新闻分类 ======================
+_matcher = None
+
+def get_matcher():
+    """由全部词表构建的单遍匹配器（首次使用时构建；修改词表后调用 reset_matcher()）"""
+    global _matcher
+    if _matcher is None:
+        from keyword_matcher import KeywordMatcher
+        m = KeywordMatcher()
+        for asset, keywords in ASSET_KEYWORDS.items():
+            for kw in keywords:
+                m.add(kw, ('asset', asset))
+        for kw in MACRO_KEYWORDS:
+            m.add(kw, ('macro', None))
+        for w in POSITIVE_WORDS:
+            m.add(w, ('positive', None))
+        for w in NEGATIVE_WORDS:
+            m.add(w, ('negative', None))
+        _matcher = m.build()
+    return _matcher
+
+def reset_matcher():
+    global _matcher
+    _matcher = None
+
+def scan_news(title, content):
+    """
+    对“标题 + 空格 + 正文”扫描一遍，返回各类命中及位置：
+    {'asset': [(位置, 关键词, 资产)], 'macro': [(位置, 关键词)], 'positive': [...], 'negative': [...]}
+    """
+    hits = {'asset': [], 'macro': [], 'positive': [], 'negative': []}
+    for start, word, (kind, asset) in get_matcher().find_all(title + ' ' + content):
+        hits[kind].append((start, word, asset) if kind == 'asset' else (start, word))
+    return hits
+
 def classify_news(title, content):
     """分析单条新闻，返回 (asset, direction, strength, factor, reason) 或 None"""
-    text = (title + ' ' + content).lower()
-    matched_assets = []
+    hits = scan_news(title, content)
 
-    # 1. 匹配具体资产
-    for asset, keywords in ASSET_KEYWORDS.items():
-        for kw in keywords:
-            if kw in text:
-                matched_assets.append(asset)
-                break
+    # 1. 匹配具体资产（多个资产命中时按 ASSET_KEYWORDS 中的顺序取第一个）
+    hit_assets = {asset for _, _, asset in hits['asset']}
+    matched_assets = [asset for asset in ASSET_KEYWORDS if asset in hit_assets]
 
     # 2. 若无具体资产，尝试宏观关键词
-    if not matched_assets:
-        for kw in MACRO_KEYWORDS:
-            if kw in text:
-                matched_assets.append('沪深300')
-                break
+    if not matched_assets and hits['macro']:
+        matched_assets.append('沪深300')
 
     if not matched_assets:
         return None  # 无关新闻
 
-    # 3. 情感分析（简单词频）
-    pos = sum(1 for w in POSITIVE_WORDS if w in text)
-    neg = sum(1 for w in NEGATIVE_WORDS if w in text)
+    # 3. 情感分析（命中的不同情感词个数）
+    pos = len({w for _, w in hits['positive']})
+    neg = len({w for _, w in hits['negative']})
 
     if pos > neg:
         direction = 'bull'
@@ -140,27 +173,62 @@ def classify_news(title, content):
 
 # ====================== 从 Apify 抓取新闻 ======================
 def fetch_from_apify(keyword, max_items=10):
-    """使用 Apify Google News Scraper 抓取单个关键词的新闻"""
-    print(f"🔍 正在抓取关键词: {keyword}")
+    """
+    使用 Apify Google News Scraper 抓取单个关键词的新闻，返回 (items, 状态文字)
+    在抓取线程中运行，不直接打印，状态由主线程按提交顺序输出
+    """
     run_input = {
         "searchQuery": keyword,
         "maxItems": max_items,
         "locale": "zh-cn",
         "outputFormat": "json",
     }
-    try:
-        # 调用 Actor（这里使用广泛使用的 google-news-scraper，你也可以选择其他）
-        run = client.actor("powerai/google-news-search-scraper").call(run_input=run_input)
-        # 获取结果数据集
-        items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
-        print(f"   ✅ 获取 {len(items)} 条")
+
+    def run_actor():
+        client = get_client()
+        with tracing.span('apify.actor', 'net', keyword=keyword) as sp:
+            # 调用 Actor（这里使用广泛使用的 google-news-scraper，你也可以选择其他）
+            run = client.actor(APIFY_ACTOR).call(run_input=run_input, timeout_secs=APIFY_RUN_TIMEOUT)
+            # 获取结果数据集
+            items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
+            if tracing.enabled():
+                sp.set(bytes=len(json.dumps(items, ensure_ascii=False, default=str).encode('utf-8')))
         return items
+
+    try:
+        # 缓存键：Actor + 查询参数（含 locale）+ 当天时间桶
+        items, origin = get_cache().fetch([APIFY_ACTOR, run_input], run_actor)
+        label = {'fresh': '（缓存）', 'stale': '（旧缓存，后台刷新）', 'network': ''}[origin]
+        return items, f"   ✅ {keyword} 获取 {len(items)} 条{label}"
     except Exception as e:
-        print(f"   ❌ 抓取失败: {e}")
-        return []
+        return [], f"   ❌ 抓取失败 {keyword}: {e}"
+
+def collect_news(keywords, max_items=10, workers=APIFY_WORKERS, timeout=APIFY_TIMEOUT):
+    """
+    并发抓取多个关键词，按完成先后逐个产出 (keyword, items, status)，status 由调用方（主线程）打印
+    最多 workers 个 Actor 同时运行；timeout 秒后仍未返回的关键词放弃
+    """
+    if not keywords:
+        return
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {}
+    for kw in keywords:
+        print(f"🔍 正在抓取关键词: {kw}")
+        futures[executor.submit(fetch_from_apify, kw, max_items)] = kw
+    try:
+        for fut in as_completed(futures, timeout=timeout):
+            items, status = fut.result()
+            yield futures[fut], items, status
+    except FutureTimeout:
+        late = [kw for fut, kw in futures.items() if not fut.done()]
+        print(f"⚠️ {len(late)} 个关键词超过 {timeout}s 未返回，放弃: {'、'.join(late)}")
+    finally:
+        # 未开始的任务取消，运行中的任务结束后线程自行退出
+        executor.shutdown(wait=False, cancel_futures=True)
 
 # ====================== 主流程 ======================
 def main():
+    get_client()    # 未配置 token 时直接退出
     print("="*60)
     print("📰 新闻抓取模块启动 (Apify)")
     print(f"🕒 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -171,10 +239,12 @@ def main():
     # 为避免 API 调用过多，先取前5个（可根据需要调整）
     # 这里为了覆盖全，循环所有关键词（Apify 免费额度足够，每个关键词调用一次）
     all_raw_news = []
-    history_hashes = load_history()
+    seen = NewsDedupeStore(HISTORY_FILE)
+    run_hashes = set()
 
-    for kw in search_keywords:
-        items = fetch_from_apify(kw, max_items=5)  # 每个关键词5条
+    # 所有关键词同时抓取，哪个先返回先输出状态并分类
+    for kw, items, status in collect_news(search_keywords, max_items=5):  # 每个关键词5条
+        print(status)
         for item in items:
             title = item.get('headline', '')
             content = item.get('description', '')
@@ -182,7 +252,7 @@ def main():
                 continue
             # 去重
             h = calculate_hash(title + content)
-            if h in history_hashes:
+            if h in run_hashes or h in seen:
                 continue
             # 分类
             classification = classify_news(title, content)
@@ -197,13 +267,14 @@ def main():
                     **classification
                 }
                 all_raw_news.append(news_record)
-                history_hashes.add(h)
+                run_hashes.add(h)
                 print(f"  ✅ 归类: {classification['asset']} {classification['direction']} factor={classification['factor']}")
 
     print(f"\n📊 共获取 {len(all_raw_news)} 条有效新闻")
 
     # 2. 保存原始新闻到历史
-    save_history(all_raw_news)
+    seen.add_many(all_raw_news)
+    seen.close()
 
     # 3. 按资产合并，生成干预建议
     by_asset = defaultdict(list)
@@ -211,6 +282,7 @@ def main():
         by_asset[n['asset']].append(n)
 
     interventions = []
+    generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     for asset, items in by_asset.items():
         # 计算平均强度和因子
         avg_strength = sum(i['strength'] for i in items) / len(items)
@@ -238,7 +310,8 @@ def main():
             'factor': round(avg_factor, 2),
             'reason': reason_summary,
             'source': 'news',
-            'news_count': len(items)
+            'news_count': len(items),
+            'time': generated_at
         })
 
     # 4. 保存干预建议
@@ -246,7 +319,11 @@ def main():
         json.dump(interventions, f, ensure_ascii=False, indent=2)
 
     print(f"\n✅ 已生成 {len(interventions)} 条干预建议，保存至 {OUTPUT_FILE}")
+    # 结果已保存，再等待后台刷新的缓存写完，下次运行直接使用
+    if not get_cache().wait(timeout=APIFY_TIMEOUT):
+        print("⚠️ 部分缓存后台刷新未完成")
     print("="*60)
 
 if __name__ == "__main__":
-    main()
+    with tracing.maybe_session('news'):     # ETF_TRACE=1 时记录每次 Apify 调用
+        main()
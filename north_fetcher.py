@@ -95,6 +95,7 @@ def generate_interventions(flow_data):
     
     avg_turnover = flow_data.get('avg_turnover_5d', 0)
     interventions = []
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
     # 根据成交额判断资金活跃度[citation:1][citation:7]
     # 成交额越大，说明北向资金越活跃
@@ -106,7 +107,8 @@ def generate_interventions(flow_data):
             'strength': 5,
             'factor': 1.2,
             'reason': f"北向资金近期成交活跃，5日平均成交额 {avg_turnover:.0f} 亿",
-            'source': 'north'
+            'source': 'north',
+            'time': now
         })
     elif avg_turnover > 3000:  # 成交额大于3000亿，较为活跃
         interventions.append({
@@ -115,7 +117,8 @@ def generate_interventions(flow_data):
             'strength': 4,
             'factor': 1.1,
             'reason': f"北向资金成交活跃，5日平均成交额 {avg_turnover:.0f} 亿",
-            'source': 'north'
+            'source': 'north',
+            'time': now
         })
     elif avg_turnover < 2500:  # 成交额小于2500亿，低迷
         interventions.append({
@@ -124,7 +127,8 @@ def generate_interventions(flow_data):
             'strength': 3,
             'factor': 0.95,
             'reason': f"北向资金成交额下降至 {avg_turnover:.0f} 亿，交投清淡",
-            'source': 'north'
+            'source': 'north',
+            'time': now
         })
     
     return interventions
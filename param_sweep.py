@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+参数敏感性扫描（多进程）
+对 MOMENTUM_PERIOD / SELL_THRESHOLD / ADX_PERIOD / ADX_TREND_THRESHOLD 的组合做回测：
+- BUY_THRESHOLD 只决定信号标签（强烈买入/谨慎持有），不改变持仓和收益，不参与扫描
+- ADX_TREND_THRESHOLD 为 0（不过滤）时 ADX_PERIOD 无影响，只保留一个取值
+- 所有组合从同一天（最长动量周期之后）开始计收益，保证按相同区间比较
+- 价格面板和指数数据放入共享内存，各进程只读映射，不做 pickle 传输
+- 每个进程按 ADX_PERIOD 缓存 ADX 序列，组合按块分发
+- 结果按夏普排序写入 CSV
+用法：python param_sweep.py [--index sz.399006] [--days 2000] [--out sweep_results.csv]
+"""
+
+import os
+import sys
+import argparse
+import itertools
+from datetime import datetime
+from multiprocessing import Pool, shared_memory
+import numpy as np
+import pandas as pd
+
+from price_panel import PricePanel
+from backtest import run_backtest, summarize, calc_adx_array, align_to_dates
+
+# ====================== 默认扫描网格 ======================
+DEFAULT_GRID = {
+    'momentum_period': [10, 15, 20, 25, 30, 40, 60],
+    'sell_threshold': [0.0, 0.01, 0.02, 0.03, 0.05],
+    'adx_period': [10, 14, 20],
+    'adx_threshold': [0, 15, 20, 25, 30],
+}
+BUY_THRESHOLD = 0.08                # 只影响 strong_ratio 一列
+CHUNK_SIZE = 64
+OUTPUT_FILE = 'sweep_results.csv'
+
+# ====================== 共享内存 ======================
+def _to_shared(arr):
+    """把数组复制进一块共享内存，返回 (SharedMemory, 描述信息)"""
+    arr = np.ascontiguousarray(arr)
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return shm, (shm.name, arr.shape, arr.dtype.str)
+
+def _attach(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    arr.flags.writeable = False
+    return shm, arr
+
+# ====================== 子进程 ======================
+_worker = {}
+
+def _init_worker(specs, dates, codes, index_dates, start):
+    """子进程启动时映射共享内存（只读），后续组合直接复用"""
+    handles = {}
+    arrays = {}
+    for key, spec in specs.items():
+        handles[key], arrays[key] = _attach(spec)
+    _worker['handles'] = handles        # 保持引用，防止共享内存被提前关闭
+    _worker['panel'] = PricePanel(dates, codes, arrays['close'])
+    _worker['index'] = arrays.get('index')
+    _worker['index_dates'] = index_dates
+    _worker['adx'] = {}
+    _worker['start'] = start
+
+def _worker_adx(adx_period):
+    if _worker['index'] is None:
+        return None
+    cache = _worker['adx']
+    if adx_period not in cache:
+        high, low, close = _worker['index']
+        adx = calc_adx_array(high, low, close, adx_period)
+        cache[adx_period] = align_to_dates(_worker['panel'].dates, _worker['index_dates'], adx)
+    return cache[adx_period]
+
+def _run_chunk(combos):
+    rows = []
+    panel = _worker['panel']
+    for params in combos:
+        adx = _worker_adx(params['adx_period']) if params['adx_threshold'] > 0 else None
+        result = run_backtest(
+            panel,
+            momentum_period=params['momentum_period'],
+            buy_threshold=params.get('buy_threshold', BUY_THRESHOLD),
+            sell_threshold=params['sell_threshold'],
+            adx=adx,
+            adx_threshold=params['adx_threshold'],
+            start=_worker['start'],
+            with_trades=False,
+        )
+        if result is None:
+            continue
+        rows.append({**params, **summarize(result)})
+    return rows
+
+# ====================== 主流程 ======================
+def iter_combos(grid):
+    keys = list(grid)
+    for values in itertools.product(*(grid[k] for k in keys)):
+        params = dict(zip(keys, values))
+        # 卖出阈值不应高于买入阈值（自定义网格含 buy_threshold 时）
+        if params['sell_threshold'] > params.get('buy_threshold', np.inf):
+            continue
+        # 不做 ADX 过滤时各 ADX 周期结果相同
+        if params['adx_threshold'] <= 0 and params['adx_period'] != grid['adx_period'][0]:
+            continue
+        yield params
+
+def run_sweep(panel, index_df=None, grid=None, processes=None, chunk_size=CHUNK_SIZE):
+    """panel: PricePanel；index_df: 市场指数 DataFrame[date, high, low, close]，None 表示不做 ADX 过滤"""
+    grid = grid or DEFAULT_GRID
+    combos = list(iter_combos(grid))
+    start = max(grid['momentum_period'])
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+
+    shms = []
+    specs = {}
+    shm, specs['close'] = _to_shared(panel.close)
+    shms.append(shm)
+    index_dates = None
+    if index_df is not None:
+        index_arr = np.vstack([index_df['high'].to_numpy(dtype='float64'),
+                               index_df['low'].to_numpy(dtype='float64'),
+                               index_df['close'].to_numpy(dtype='float64')])
+        shm, specs['index'] = _to_shared(index_arr)
+        shms.append(shm)
+        index_dates = index_df['date'].to_numpy(dtype='datetime64[D]')
+
+    rows = []
+    try:
+        with Pool(processes=processes, initializer=_init_worker,
+                  initargs=(specs, panel.dates, panel.codes, index_dates, start)) as pool:
+            for chunk_rows in pool.imap_unordered(_run_chunk, chunks):
+                rows.extend(chunk_rows)
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df = df.sort_values(['sharpe', 'annual_return'], ascending=False).reset_index(drop=True)
+        df.insert(0, 'rank', np.arange(1, len(df) + 1))
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description='轮动策略参数扫描')
+    parser.add_argument('--index', default='sz.399006', help='市场指数代码（baostock），用于 ADX 过滤')
+    parser.add_argument('--days', type=int, default=2000, help='指数历史天数')
+    parser.add_argument('--processes', type=int, default=None, help='进程数，默认使用全部 CPU')
+    parser.add_argument('--out', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🔬 参数扫描启动")
+    print(f"🕒 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("="*60)
+
+    import bar_cache
+    codes = bar_cache.list_cached_codes()
+    frames = {c: bar_cache.load_bars(c) for c in codes}
+    panel = PricePanel.from_frames(frames, codes)
+    if not panel.codes:
+        print("❌ 本地无缓存日线，请先运行 momentum.py")
+        sys.exit(1)
+
+    from index_provider import default_provider
+    index_df = default_provider.get(args.index, args.days)
+    if index_df is None:
+        print("⚠️ 无法获取指数数据，ADX 过滤将失效")
+
+    n = sum(1 for _ in iter_combos(DEFAULT_GRID))
+    print(f"📊 {len(panel.codes)} 个品种 × {len(panel)} 天，{n} 组参数，{args.processes or os.cpu_count()} 个进程")
+    print(f"ℹ️ BUY_THRESHOLD 只影响信号强弱、不改变持仓，未参与扫描（strong_ratio 按 {BUY_THRESHOLD} 计）；"
+          f"收益统一从第 {max(DEFAULT_GRID['momentum_period'])} 个交易日起算")
+    df = run_sweep(panel, index_df, processes=args.processes)
+    df.to_csv(args.out, index=False, encoding='utf-8-sig')
+    print(f"✅ 结果已保存至 {args.out}")
+    if not df.empty:
+        print(df.head(10).to_string(index=False))
+    print("="*60)
+
+if __name__ == "__main__":
+    main()
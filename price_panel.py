@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多品种价格面板（日期 × 品种）
+- 各品种日线按公共交易日历对齐，停牌日向前填充，上市前保持 NaN
+- 一次 NumPy 运算得到所有品种的 N 日涨幅，并用 argsort/argpartition 排序
+"""
+
+import numpy as np
+
+class PricePanel:
+    def __init__(self, dates, codes, close, high=None, low=None):
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.codes = list(codes)
+        self.close = np.asarray(close, dtype='float64')
+        self.high = None if high is None else np.asarray(high, dtype='float64')
+        self.low = None if low is None else np.asarray(low, dtype='float64')
+        self._col = {c: i for i, c in enumerate(self.codes)}
+
+    @classmethod
+    def from_frames(cls, frames, codes=None):
+        """frames: {code: DataFrame[date, close, high, low]}，None 或空表的品种被跳过"""
+        codes = [c for c in (codes or list(frames)) if frames.get(c) is not None and not frames[c].empty]
+        if not codes:
+            return cls(np.array([], dtype='datetime64[D]'), [], np.empty((0, 0)))
+        days = {c: frames[c]['date'].to_numpy(dtype='datetime64[D]') for c in codes}
+        dates = np.unique(np.concatenate(list(days.values())))
+        fields = {}
+        for field in ['close', 'high', 'low']:
+            if not all(field in frames[c].columns for c in codes):
+                fields[field] = None
+                continue
+            values = np.full((len(dates), len(codes)), np.nan)
+            for j, c in enumerate(codes):
+                # 同一天多条时以最后一条为准（searchsorted 后依次写入）
+                rows = np.searchsorted(dates, days[c])
+                values[rows, j] = frames[c][field].to_numpy(dtype='float64')
+            fields[field] = _ffill(values)
+        return cls(dates, codes, fields['close'], fields['high'], fields['low'])
+
+    def __len__(self):
+        return len(self.dates)
+
+    def column(self, code):
+        return self._col[code]
+
+    def frame(self, code):
+        """取出单个品种的 DataFrame[date, close, high, low]（去掉上市前的空行）"""
+        import pandas as pd
+        j = self._col[code]
+        df = pd.DataFrame({'date': pd.to_datetime(self.dates), 'close': self.close[:, j]})
+        if self.high is not None:
+            df['high'] = self.high[:, j]
+            df['low'] = self.low[:, j]
+        return df[~np.isnan(self.close[:, j])].reset_index(drop=True)
+
+    def valid_counts(self):
+        """每个品种的有效 bar 数"""
+        return np.count_nonzero(~np.isnan(self.close), axis=0)
+
+    def returns(self, period, end=None):
+        """所有品种截至 end 行（默认最后一行）的 period 日涨幅，数据不足为 NaN"""
+        end = len(self.dates) - 1 if end is None else end
+        if end - period < 0:
+            return np.full(len(self.codes), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.close[end] / self.close[end - period] - 1
+
+    def rolling_returns(self, period):
+        """整张面板的 period 日涨幅（T × N），前 period 行为 NaN"""
+        out = np.full_like(self.close, np.nan)
+        if len(self.dates) > period:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out[period:] = self.close[period:] / self.close[:-period] - 1
+        return out
+
+def rank_desc(values, top_k=None):
+    """按值从大到小返回下标，NaN 排在最后；top_k 小于总数时只对前 top_k 做部分排序"""
+    values = np.asarray(values, dtype='float64')
+    keyed = np.where(np.isnan(values), -np.inf, values)
+    n = len(keyed)
+    if top_k is not None and 0 < top_k < n:
+        part = np.argpartition(-keyed, top_k - 1)[:top_k]
+        order = part[np.argsort(-keyed[part], kind='stable')]
+    else:
+        order = np.argsort(-keyed, kind='stable')
+    return order
+
+def _ffill(values):
+    """按列向前填充 NaN（上市前的 NaN 保持不变）"""
+    mask = np.isnan(values)
+    idx = np.where(~mask, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    # 首个有效值之前 idx 指向第 0 行（NaN），保持为空
+    return values[idx, np.arange(values.shape[1])]
@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线回放环境：用本地数据替换四个外部服务，在不联网的情况下计时和压测完整流程
+- 通达信（mootdx Quotes）     -> FakeTdxClient
+- baostock                    -> FakeBaostock
+- 新浪行情 hq.sinajs.cn       -> FakeSina
+- Apify Google News Scraper   -> FakeApifyClient
+每个服务可单独配置 NetworkProfile：延迟、抖动、错误注入比例、每秒调用上限、带宽上限
+数据来源（Fixtures）：合成数据，或本地缓存的真实日线（cache/bars），可保存为文件重复使用
+用法：
+    python replay.py --target momentum --latency 0.2 --jitter 0.1 --error-rate 0.05
+    python replay.py --target all --assets 200 --runs 3 --rate-limit 20
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import synthetic_data
+
+# ====================== 网络条件 ======================
+class InjectedError(ConnectionError):
+    """回放环境按 error_rate 注入的故障"""
+
+class NetworkProfile:
+    """
+    latency / jitter：每次调用的基础延迟和随机抖动（秒，抖动为 ±jitter 均匀分布）
+    error_rate：调用失败的概率（失败前同样计入延迟）
+    rate_limit：每秒最多调用次数（超出则排队等待），None 表示不限
+    bandwidth：每秒字节数，按响应大小追加传输时间，None 表示不限
+    """
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None, bandwidth=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.bandwidth = bandwidth
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def _reserve(self):
+        """计算本次调用的排队时间和延迟，并决定是否注入错误（线程安全）"""
+        with self._lock:
+            wait = 0.0
+            if self.rate_limit:
+                now = time.monotonic()
+                slot = max(now, self._next_slot)
+                self._next_slot = slot + 1.0 / self.rate_limit
+                wait = slot - now
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            fail = self._rng.random() < self.error_rate
+        return wait, delay, fail
+
+    def transfer_time(self, n_bytes):
+        return n_bytes / self.bandwidth if self.bandwidth else 0.0
+
+class ServiceStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.bytes = 0
+        self.waited = 0.0           # 排队 + 延迟 + 传输的总秒数
+
+    def record(self, waited, n_bytes=0, error=False):
+        with self._lock:
+            self.calls += 1
+            self.errors += int(error)
+            self.bytes += n_bytes
+            self.waited += waited
+
+    def as_dict(self):
+        return {'calls': self.calls, 'errors': self.errors, 'bytes': self.bytes, 'waited': round(self.waited, 3)}
+
+class _Service:
+    def __init__(self, name, profile=None):
+        self.name = name
+        self.profile = profile or NetworkProfile()
+        self.stats = ServiceStats()
+
+    def call(self, payload_fn):
+        """模拟一次网络调用：排队、延迟、（可能）失败，成功则返回 payload_fn() 的结果"""
+        wait, delay, fail = self.profile._reserve()
+        time.sleep(wait + delay)
+        if fail:
+            self.stats.record(wait + delay, error=True)
+            raise InjectedError(f"{self.name} 注入故障")
+        payload = payload_fn()
+        n_bytes = _payload_size(payload)
+        transfer = self.profile.transfer_time(n_bytes)
+        if transfer:
+            time.sleep(transfer)
+        self.stats.record(wait + delay + transfer, n_bytes)
+        return payload
+
+def _payload_size(payload):
+    if isinstance(payload, FakeResponse):
+        return len(payload.content)
+    if isinstance(payload, (str, bytes)):
+        return len(payload.encode('utf-8') if isinstance(payload, str) else payload)
+    if isinstance(payload, pd.DataFrame):
+        return int(payload.memory_usage(index=True).sum())
+    if isinstance(payload, list):
+        return len(json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8'))
+    return 0
+
+# ====================== 数据 ======================
+class Fixtures:
+    """
+    bars：{6 位代码: DataFrame[date, open, close, high, low, volume]}（ETF 与新浪行情共用）
+    index：{baostock 代码: DataFrame[date, open, high, low, close, volume]}
+    news：[{title, content}]
+    assets：回放时使用的品种列表（格式同 momentum.ASSETS）
+    """
+    def __init__(self, bars, index, news, assets):
+        self.bars = bars
+        self.index = index
+        self.news = news
+        self.assets = assets
+
+    @classmethod
+    def synthetic(cls, n_assets=11, n_bars=800, n_news=300, seed=0, end=None, market_index='sz.399006'):
+        """合成数据，默认截止到今天（各模块按当前日期计算取数窗口）"""
+        end = end or pd.Timestamp.now().normalize()
+        assets = synthetic_data.make_assets(n_assets)
+        frames = synthetic_data.make_bars(assets, n_bars, seed, end=end)
+        return cls(
+            bars={code.split('.')[0]: df for code, df in frames.items()},
+            index={market_index: synthetic_data.make_index(n_bars, seed, end=end)},
+            news=synthetic_data.make_news(n_news, seed),
+            assets=assets,
+        )
+
+    @classmethod
+    def from_cache(cls, assets, cache_dir=None, n_news=300, seed=0, market_index='sz.399006'):
+        """使用本地缓存的真实日线（bar_cache），指数与新闻仍为合成数据"""
+        import bar_cache
+        bars = {}
+        for a in assets:
+            df = bar_cache.load_bars(a['etf_code'], cache_dir)
+            if df is not None:
+                bars[a['etf_code'].split('.')[0]] = df.assign(open=df['close'], volume=0.0)
+        end = max(df['date'].iloc[-1] for df in bars.values()) if bars else None
+        n_bars = max(len(df) for df in bars.values()) if bars else 800
+        return cls(
+            bars=bars,
+            index={market_index: synthetic_data.make_index(n_bars, seed, end=end or pd.Timestamp.now().normalize())},
+            news=synthetic_data.make_news(n_news, seed),
+            assets=[a for a in assets if a['etf_code'].split('.')[0] in bars],
+        )
+
+    def save(self, path):
+        pd.to_pickle({'bars': self.bars, 'index': self.index, 'news': self.news, 'assets': self.assets}, path)
+
+    @classmethod
+    def load(cls, path):
+        return cls(**pd.read_pickle(path))
+
+# ====================== 通达信 ======================
+class FakeTdxClient:
+    """与 mootdx Quotes 客户端同接口的 bars() / stocks()，bars 返回以日期为（无名）索引的 DataFrame"""
+    def __init__(self, fixtures, service, ip=None):
+        self.fixtures = fixtures
+        self.service = service
+        self.ip = ip
+        self.closed = False
+
+    def bars(self, symbol='000001', frequency=9, offset=800, start=0, **kwargs):
+        def payload():
+            df = self.fixtures.bars.get(str(symbol))
+            if df is None:
+                return pd.DataFrame()
+            end = len(df) - start
+            out = df.iloc[max(0, end - offset):end]
+            return pd.DataFrame({
+                'open': out['open'].to_numpy(),
+                'close': out['close'].to_numpy(),
+                'high': out['high'].to_numpy(),
+                'low': out['low'].to_numpy(),
+                'vol': out['volume'].to_numpy(),
+                'amount': out['volume'].to_numpy() * out['close'].to_numpy() * 100,
+            }, index=pd.DatetimeIndex(out['date'].to_numpy()))
+        return self.service.call(payload)
+
+    def stocks(self, market=1):
+        """证券列表：按代码前缀划分市场（与 sina_quotes.sina_code 口径一致），0 = 深市，1 = 沪市"""
+        def payload():
+            names = {a['etf_code'].split('.')[0]: a['name'] for a in self.fixtures.assets}
+            codes = [c for c in self.fixtures.bars
+                     if (0 if c.startswith(('15', '16', '18', '30', '39')) else 1) == market]
+            return pd.DataFrame({'code': codes, 'name': [names.get(c, c) for c in codes]})
+        return self.service.call(payload)
+
+    def close(self):
+        self.closed = True
+
+class FakeQuotes:
+    fixtures = None
+    service = None
+    dead_ips = frozenset()          # 不可达的服务器：等满连接超时后失败
+
+    @classmethod
+    def factory(cls, market='std', bestip=False, ip=None, timeout=None, **kwargs):
+        if ip in cls.dead_ips:
+            time.sleep(timeout or 0)
+            raise ConnectionError(f"{ip} 连接超时")
+        cls.service.call(lambda: None)              # 建立连接同样有延迟，也可能失败
+        return FakeTdxClient(cls.fixtures, cls.service, ip)
+
+# ====================== baostock ======================
+class _BsResult:
+    def __init__(self, rows=None, fields=None, error_code='0', error_msg='success'):
+        self.rows = rows or []
+        self.fields = fields or []
+        self.error_code = error_code
+        self.error_msg = error_msg
+        self._i = -1
+
+    def next(self):
+        self._i += 1
+        return self._i < len(self.rows)
+
+    def get_row_data(self):
+        return self.rows[self._i]
+
+class FakeBaostock(types.ModuleType):
+    """替换 sys.modules['baostock']；失败时与 baostock 一样返回非 '0' 的 error_code 而不是抛异常"""
+    def __init__(self, fixtures, service):
+        super().__init__('baostock')
+        self.fixtures = fixtures
+        self.service = service
+
+    def login(self, *args, **kwargs):
+        try:
+            self.service.call(lambda: None)
+        except InjectedError as e:
+            return _BsResult(error_code='10001001', error_msg=str(e))
+        return _BsResult()
+
+    def logout(self, *args, **kwargs):
+        return _BsResult()
+
+    def query_history_k_data_plus(self, code, fields, start_date=None, end_date=None, frequency='d', adjustflag='3'):
+        names = [f.strip() for f in fields.split(',')]
+
+        def payload():
+            df = self.fixtures.index.get(code)
+            if df is None:
+                return []
+            dates = df['date'].dt.strftime('%Y-%m-%d')
+            mask = np.ones(len(df), dtype=bool)
+            if start_date:
+                mask &= (dates >= start_date).to_numpy()
+            if end_date:
+                mask &= (dates <= end_date).to_numpy()
+            out = df[mask].assign(date=dates[mask])
+            return [[str(v) for v in row] for row in out[names].itertuples(index=False)]
+        try:
+            rows = self.service.call(payload)
+        except InjectedError as e:
+            return _BsResult(fields=names, error_code='10002007', error_msg=str(e))
+        return _BsResult(rows, names)
+
+# ====================== 新浪行情 ======================
+class FakeResponse:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+        self.encoding = 'gbk'
+        self.content = text.encode('gbk', errors='replace')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise ConnectionError(f"HTTP {self.status_code}")
+
+class FakeSina:
+    """作为 sina_quotes 客户端的 session 访问 hq.sinajs.cn：按最后一根日线生成盘中价格（每次请求随机游走一步）"""
+    def __init__(self, fixtures, service, seed=0):
+        self.fixtures = fixtures
+        self.service = service
+        self._rng = random.Random(seed)
+        self._last = {}
+
+    def _frame(self, code):
+        if code in self.fixtures.bars:
+            return self.fixtures.bars[code]
+        for key, df in self.fixtures.index.items():
+            if key.split('.')[-1] == code:
+                return df
+        return None
+
+    def _line(self, symbol):
+        code = symbol[2:]
+        df = self._frame(code)
+        if df is None or len(df) < 2:
+            return f'var hq_str_{symbol}="";'
+        pre_close = float(df['close'].iloc[-2])
+        price = self._last.get(code, float(df['open'].iloc[-1])) * (1 + self._rng.gauss(0, 0.002))
+        self._last[code] = price
+        high = max(float(df['high'].iloc[-1]), price)
+        low = min(float(df['low'].iloc[-1]), price)
+        now = datetime.now()
+        values = [f"合成{code}", f"{df['open'].iloc[-1]:.3f}", f"{pre_close:.3f}", f"{price:.3f}",
+                  f"{high:.3f}", f"{low:.3f}", f"{price:.3f}", f"{price:.3f}", '1000000', '1000000.000']
+        values += ['100', f"{price:.3f}"] * 10                   # 买一~卖五
+        values += [now.strftime('%Y-%m-%d'), now.strftime('%H:%M:%S'), '00']
+        return f'var hq_str_{symbol}="{",".join(values)}";'
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        symbols = [s for s in url.split('list=', 1)[-1].split(',') if s]
+        return self.service.call(lambda: FakeResponse('\n'.join(self._line(s) for s in symbols) + '\n'))
+
+# ====================== Apify ======================
+class FakeApifyClient:
+    """与 ApifyClient 同接口的 actor(...).call() 和 dataset(...).iterate_items()"""
+    def __init__(self, fixtures, service, seed=0):
+        self.fixtures = fixtures
+        self.service = service
+        self._rng = random.Random(seed)
+        self._datasets = {}
+        self._lock = threading.Lock()
+
+    def actor(self, actor_id):
+        client = self
+
+        class _Actor:
+            def call(self, run_input=None, **kwargs):
+                return client._run(run_input or {})
+        return _Actor()
+
+    def _run(self, run_input):
+        query = run_input.get('searchQuery', '')
+        n = int(run_input.get('maxItems', 10))
+
+        def payload():
+            news = self.fixtures.news
+            with self._lock:
+                picked = [news[self._rng.randrange(len(news))] for _ in range(n)] if news else []
+                dataset_id = f"ds{len(self._datasets)}"
+                self._datasets[dataset_id] = [{
+                    'headline': f"{query} {item['title']}",
+                    'description': item['content'],
+                    'publisherName': '合成新闻',
+                    'articleUrl': f"https://example.invalid/{dataset_id}/{i}",
+                    'publishedAt': datetime.now().isoformat(timespec='seconds'),
+                } for i, item in enumerate(picked)]
+            return {'defaultDatasetId': dataset_id}
+        return self.service.call(payload)
+
+    def dataset(self, dataset_id):
+        client = self
+
+        class _Dataset:
+            def iterate_items(self):
+                return iter(client.service.call(lambda: list(client._datasets.get(dataset_id, []))))
+        return _Dataset()
+
+# ====================== 安装 / 还原 ======================
+SERVICES = ['tdx', 'baostock', 'sina', 'apify']
+
+class ReplayEnv:
+    def __init__(self, fixtures, profiles=None, seed=0, dead_ips=()):
+        """profiles: {服务名: NetworkProfile}，未指定的服务无延迟无故障；dead_ips：不可达的通达信服务器"""
+        profiles = profiles or {}
+        self.fixtures = fixtures
+        self.dead_ips = frozenset(dead_ips)
+        self.services = {name: _Service(name, profiles.get(name)) for name in SERVICES}
+        self.sina = FakeSina(fixtures, self.services['sina'], seed)
+        self.apify = FakeApifyClient(fixtures, self.services['apify'], seed)
+        self.baostock = FakeBaostock(fixtures, self.services['baostock'])
+
+    def stats(self):
+        return {name: s.stats.as_dict() for name, s in self.services.items()}
+
+    @contextlib.contextmanager
+    def installed(self):
+        """替换各模块使用的客户端，退出时还原"""
+        import momentum
+        import index_provider
+        import news_fetcher
+        import sina_quotes
+
+        quotes = types.ModuleType('mootdx.quotes')
+        quotes.Quotes = type('Quotes', (FakeQuotes,), {'fixtures': self.fixtures, 'service': self.services['tdx'],
+                                                       'dead_ips': self.dead_ips})
+        mootdx = types.ModuleType('mootdx')
+        mootdx.quotes = quotes
+
+        saved_modules = {k: sys.modules.get(k) for k in ('mootdx', 'mootdx.quotes', 'baostock')}
+        saved = [
+            (momentum, '_tdx_pool', momentum._tdx_pool),
+            (index_provider, 'default_provider', index_provider.default_provider),
+            (news_fetcher, '_client', news_fetcher._client),
+            (sina_quotes, 'default_client', sina_quotes.default_client),
+        ]
+        sys.modules.update({'mootdx': mootdx, 'mootdx.quotes': quotes, 'baostock': self.baostock})
+        momentum._tdx_pool = None
+        provider = index_provider.default_provider = index_provider.BaostockIndexProvider()
+        news_fetcher._client = self.apify
+        sina_quotes.default_client = sina_quotes.SinaQuoteClient(session=self.sina)
+        try:
+            yield self
+        finally:
+            provider.close()                        # 在还原 baostock 之前登出，避免 atexit 时找不到模块
+            for module, attr, value in saved:
+                setattr(module, attr, value)
+            for k, v in saved_modules.items():
+                if v is None:
+                    sys.modules.pop(k, None)
+                else:
+                    sys.modules[k] = v
+
+# ====================== 回放 ======================
+@contextlib.contextmanager
+def _workdir(path):
+    """各脚本使用相对路径（cache/、docs/、signals.db 等），回放时切换到独立目录"""
+    old = os.getcwd()
+    os.makedirs(os.path.join(path, 'docs'), exist_ok=True)
+    os.chdir(path)
+    try:
+        yield path
+    finally:
+        os.chdir(old)
+
+def run_target(target, env, config=None):
+    """在已安装的回放环境中运行一个流程，返回耗时秒数"""
+    t0 = time.perf_counter()
+    if target == 'momentum':
+        import momentum
+        momentum.run_pipeline({'ASSETS': env.fixtures.assets, **(config or {})})
+    elif target == 'universe':
+        import momentum
+        momentum.universe_stage({**momentum.default_config(), **(config or {})})
+    elif target == 'news':
+        import news_fetcher
+        news_fetcher.main()
+    elif target == 'intraday':
+        import intraday_monitor
+        intraday_monitor.main()
+    else:
+        raise ValueError(f"未知流程: {target}")
+    return time.perf_counter() - t0
+
+def replay(targets, fixtures, profiles=None, runs=1, workdir=None, keep_cache=True, config=None, quiet=True,
+           dead_ips=()):
+    """
+    依次运行 targets（可多轮），返回 [{run, target, seconds, stats}]
+    keep_cache=True 时各轮共用工作目录（第二轮起为增量拉取），否则每轮清空
+    """
+    results = []
+    root = workdir or tempfile.mkdtemp(prefix='replay_')
+    try:
+        for i in range(runs):
+            if not keep_cache and os.path.exists(root):
+                shutil.rmtree(root)
+            env = ReplayEnv(fixtures, profiles, seed=i, dead_ips=dead_ips)
+            with _workdir(root), env.installed():
+                for target in targets:
+                    before = env.stats()
+                    out = open(os.devnull, 'w', encoding='utf-8') if quiet else None
+                    with contextlib.redirect_stdout(out) if out else contextlib.nullcontext():
+                        seconds = run_target(target, env, config)
+                    if out:
+                        out.close()
+                    after = env.stats()
+                    stats = {name: {k: round(after[name][k] - before[name][k], 3) for k in after[name]} for name in after}
+                    results.append({'run': i + 1, 'target': target, 'seconds': seconds, 'stats': stats})
+    finally:
+        if workdir is None:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='离线回放：替换外部服务后计时/压测完整流程')
+    parser.add_argument('--target', choices=['momentum', 'universe', 'news', 'intraday', 'all'], default='momentum')
+    parser.add_argument('--assets', type=int, default=11)
+    parser.add_argument('--bars', type=int, default=800)
+    parser.add_argument('--news', type=int, default=300)
+    parser.add_argument('--fixtures', help='Fixtures 文件（Fixtures.save 保存），不指定则使用合成数据')
+    parser.add_argument('--from-cache', action='store_true', help='ETF 日线使用本地缓存的真实数据')
+    parser.add_argument('--save-fixtures', help='把本次使用的数据保存到文件')
+    parser.add_argument('--latency', type=float, default=0.05, help='每次调用延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=None, help='每秒调用上限')
+    parser.add_argument('--bandwidth', type=float, default=None, help='每秒字节数上限')
+    parser.add_argument('--dead-ips', type=int, default=0, help='前 N 个通达信服务器不可达（连接超时）')
+    parser.add_argument('--runs', type=int, default=1)
+    parser.add_argument('--cold', action='store_true', help='每轮清空本地缓存')
+    parser.add_argument('--workdir', help='工作目录（默认临时目录，结束后删除）')
+    parser.add_argument('--verbose', action='store_true', help='显示各流程自身的输出')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.fixtures:
+        fixtures = Fixtures.load(args.fixtures)
+    elif args.from_cache:
+        import momentum
+        fixtures = Fixtures.from_cache(momentum.ASSETS, n_news=args.news, seed=args.seed)
+    else:
+        fixtures = Fixtures.synthetic(args.assets, args.bars, args.news, args.seed)
+    if args.save_fixtures:
+        fixtures.save(args.save_fixtures)
+
+    profile = dict(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                   rate_limit=args.rate_limit, bandwidth=args.bandwidth)
+    profiles = {name: NetworkProfile(seed=args.seed + i, **profile) for i, name in enumerate(SERVICES)}
+    targets = ['momentum', 'news', 'intraday'] if args.target == 'all' else [args.target]
+
+    print("="*60)
+    print(f"🔁 离线回放：{', '.join(targets)} × {args.runs} 轮，{len(fixtures.assets)} 个品种")
+    print(f"🌐 延迟 {args.latency}s ± {args.jitter}s，错误率 {args.error_rate:.0%}，"
+          f"限速 {args.rate_limit or '不限'} 次/秒，带宽 {args.bandwidth or '不限'} B/s")
+    print("="*60)
+    import momentum
+    results = replay(targets, fixtures, profiles, args.runs, args.workdir, not args.cold, quiet=not args.verbose,
+                     dead_ips=momentum.TDX_IPS[:args.dead_ips])
+    for r in results:
+        print(f"第 {r['run']} 轮 {r['target']:<9} 耗时 {r['seconds']:.2f}s")
+        for name, s in r['stats'].items():
+            if s['calls']:
+                print(f"    {name:<9} 调用 {int(s['calls'])} 次，失败 {int(s['errors'])} 次，"
+                      f"网络等待 {s['waited']:.2f}s，{s['bytes'] / 1e3:.1f}KB")
+    print("="*60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+外部接口响应的本地 TTL 缓存（每个键一个 JSON 文件）
+键由调用参数 + 时间桶组成（默认按自然日），新的一天自动换键
+- 未过期（age < ttl）：直接返回缓存
+- 已过期但在 stale_ttl 内：先返回旧结果，后台线程刷新（stale-while-revalidate）
+- 未命中或超出 stale_ttl：同步调用，成功后写入缓存；调用失败时退回同一时间桶内的旧结果
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+
+_EPOCH = datetime(2000, 1, 1)
+
+class ResponseCache:
+    def __init__(self, cache_dir, ttl, stale_ttl=0, bucket_seconds=86400, max_refresh=4):
+        """ttl / stale_ttl / bucket_seconds 单位为秒；ttl <= 0 表示不使用缓存；max_refresh 为后台刷新并发上限"""
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.bucket_seconds = bucket_seconds
+        self._lock = threading.Lock()
+        self._refreshing = {}       # key -> 后台刷新线程
+        self._refresh_slots = threading.BoundedSemaphore(max_refresh)
+
+    # ---------- 键与文件 ----------
+    def bucket(self, now=None):
+        """按本地时间划分的时间桶编号（bucket_seconds=86400 时与自然日对齐）"""
+        now = now or datetime.now()
+        return int((now - _EPOCH).total_seconds() // self.bucket_seconds)
+
+    def key(self, parts, now=None):
+        raw = json.dumps([parts, self.bucket(now)], ensure_ascii=False, sort_keys=True)
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def get(self, key):
+        """返回 (value, 已缓存秒数)，不存在或损坏时返回 (None, None)"""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None, None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except Exception:
+            return None, None
+        return entry['value'], time.time() - entry['fetched_at']
+
+    def put(self, key, value, parts=None):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'parts': parts, 'fetched_at': time.time(), 'value': value}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    # ---------- 读取 ----------
+    def fetch(self, parts, fetch_fn):
+        """
+        返回 (value, 来源)，来源为 'fresh' / 'stale' / 'network'
+        fetch_fn 失败时抛出异常；有同一时间桶的旧结果则返回旧结果（来源 'stale'）
+        """
+        if self.ttl <= 0:
+            return fetch_fn(), 'network'
+        key = self.key(parts)
+        value, age = self.get(key)
+        if value is not None and age < self.ttl:
+            return value, 'fresh'
+        if value is not None and age < self.stale_ttl:
+            self._revalidate(key, parts, fetch_fn)
+            return value, 'stale'
+        try:
+            fresh = fetch_fn()
+        except Exception:
+            if value is not None:
+                return value, 'stale'
+            raise
+        self.put(key, fresh, parts)
+        return fresh, 'network'
+
+    def _revalidate(self, key, parts, fetch_fn):
+        """同一个键同时只有一个后台刷新"""
+        def run():
+            try:
+                with self._refresh_slots:
+                    self.put(key, fetch_fn(), parts)
+            except Exception as e:
+                print(f"⚠️ 后台刷新失败 {parts}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.pop(key, None)
+
+        with self._lock:
+            if key in self._refreshing:
+                return
+            t = threading.Thread(target=run, daemon=True)
+            self._refreshing[key] = t
+        t.start()
+
+    def wait(self, timeout=None):
+        """等待后台刷新完成（脚本退出前调用，保证下次运行拿到新结果）"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                threads = list(self._refreshing.values())
+            if not threads:
+                return True
+            for t in threads:
+                t.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if deadline is not None and time.monotonic() >= deadline:
+                with self._lock:
+                    return not self._refreshing
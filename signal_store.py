@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+信号历史存储（SQLite，按日期索引）
+- upsert()：按日期写入，同一天重复运行只保留最后一次结果
+- query()：按日期区间查询；latest()：最近 n 条
+- export_csv()：导出 docs/signals.csv 供页面使用（列与原 CSV 一致）
+首次创建时自动导入已有的 signals.csv（同日多行取最后一行）
+"""
+
+import os
+import csv
+import sqlite3
+from datetime import datetime
+
+DB_FILE = 'signals.db'
+CSV_FILE = os.path.join('docs', 'signals.csv')
+COLUMNS = ['date', 'selected', 'etf', 'market_adx', 'top_momentum', 'health_score', 'health_status']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    date          TEXT PRIMARY KEY,
+    selected      TEXT,
+    etf           TEXT,
+    market_adx    REAL,
+    top_momentum  REAL,
+    health_score  INTEGER,
+    health_status TEXT,
+    updated_at    TEXT
+)
+"""
+
+class SignalStore:
+    def __init__(self, path=DB_FILE, legacy_csv=CSV_FILE):
+        is_new = not os.path.exists(path)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(_SCHEMA)
+        if is_new and legacy_csv and os.path.exists(legacy_csv):
+            n = self.import_csv(legacy_csv)
+            print(f"📥 已从 {legacy_csv} 导入 {n} 天历史信号")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- 写入 ----------
+    def upsert(self, record):
+        """按 date 写入一条信号，已存在则覆盖"""
+        row = {c: _clean(record.get(c)) for c in COLUMNS}
+        row['date'] = str(row['date'])[:10]
+        row['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        cols = COLUMNS + ['updated_at']
+        sql = (
+            f"INSERT INTO signals ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)}) "
+            f"ON CONFLICT(date) DO UPDATE SET "
+            + ', '.join(f"{c} = excluded.{c}" for c in cols[1:])
+        )
+        with self.conn:
+            self.conn.execute(sql, [row[c] for c in cols])
+
+    def import_csv(self, path):
+        """导入旧版 signals.csv，同一日期以文件中最后一行为准"""
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+        by_date = {}
+        for r in rows:
+            if r.get('date'):
+                by_date[r['date'][:10]] = r
+        for r in by_date.values():
+            self.upsert({
+                'date': r['date'],
+                'selected': r.get('selected'),
+                'etf': r.get('etf'),
+                'market_adx': _to_float(r.get('market_adx')),
+                'top_momentum': _to_float(r.get('top_momentum')),
+                'health_score': _to_int(r.get('health_score')),
+                'health_status': r.get('health_status'),
+            })
+        return len(by_date)
+
+    # ---------- 查询 ----------
+    def query(self, start=None, end=None):
+        """返回 [start, end] 区间内的信号（按日期升序），参数为 YYYY-MM-DD，None 表示不限"""
+        sql = f"SELECT {', '.join(COLUMNS)} FROM signals WHERE 1=1"
+        args = []
+        if start:
+            sql += " AND date >= ?"
+            args.append(str(start)[:10])
+        if end:
+            sql += " AND date <= ?"
+            args.append(str(end)[:10])
+        sql += " ORDER BY date"
+        return [dict(r) for r in self.conn.execute(sql, args)]
+
+    def get(self, date):
+        r = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM signals WHERE date = ?", (str(date)[:10],)).fetchone()
+        return dict(r) if r else None
+
+    def latest(self, n=1):
+        rows = self.conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM signals ORDER BY date DESC LIMIT ?", (n,)).fetchall()
+        return [dict(r) for r in reversed(rows)]
+
+    # ---------- 导出 ----------
+    def export_csv(self, path=CSV_FILE):
+        """导出全部信号为 CSV（先写临时文件再替换）"""
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for r in self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM signals ORDER BY date"):
+                writer.writerow(['' if v is None else v for v in r])
+        os.replace(tmp, path)
+
+# ====================== 工具函数 ======================
+def _clean(v):
+    """numpy 标量转成 Python 类型，NaN 存为 NULL"""
+    if hasattr(v, 'item'):
+        v = v.item()
+    if isinstance(v, float) and v != v:
+        return None
+    return v
+
+def _to_float(v):
+    try:
+        return float(v) if v not in (None, '') else None
+    except ValueError:
+        return None
+
+def _to_int(v):
+    f = _to_float(v)
+    return int(f) if f is not None else None
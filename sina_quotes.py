@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+新浪实时行情批量客户端
+- 代码按批拆分（每批 batch_size 个，保证 URL 长度在接口限制内），多批并行请求
+- 使用 requests.Session 长连接（连接池大小 = 并发数），避免每次重新握手
+- parse_hq() 按固定格式解析 hq_str_ 返回：每行只做一次 find + 一次 split
+返回 {新浪代码（如 sz159915）: {name, open, pre_close, price, high, low, volume, amount, pct, date, time}}
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import tracing
+
+HQ_URL = "https://hq.sinajs.cn/list="
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Referer': 'https://finance.sina.com.cn'
+}
+BATCH_SIZE = 500                    # 每个请求的代码数（约 4.5KB URL）
+WORKERS = 4                         # 并行请求数（也是长连接数）
+TIMEOUT = 10
+
+def sina_code(code):
+    """6 位代码 -> 新浪代码：深市 sz（15/16/18/30/39 开头），其余 sh；已带前缀的原样返回"""
+    if code[:2] in ('sh', 'sz', 'bj'):
+        return code
+    return ('sz' + code if code.startswith(('15', '16', '18', '30', '39')) else 'sh' + code)
+
+# ====================== 解析 ======================
+# 字段位置（股票/ETF 行情格式）
+_NAME, _OPEN, _PRE_CLOSE, _PRICE, _HIGH, _LOW = 0, 1, 2, 3, 4, 5
+_VOLUME, _AMOUNT, _DATE, _TIME = 8, 9, 30, 31
+_MIN_FIELDS = 30
+
+def parse_hq(text):
+    """解析 var hq_str_sh510300="...";（每行一个品种），无效或停牌（价格为 0）的行跳过"""
+    data = {}
+    for line in text.split('\n'):
+        # 'var hq_str_' 共 11 个字符，代码到 '=' 为止
+        eq = line.find('="', 11)
+        if eq < 0 or not line.startswith('var hq_str_'):
+            continue
+        values = line[eq + 2:].rstrip('";\r ').split(',')
+        if len(values) < _MIN_FIELDS:
+            continue
+        try:
+            price = float(values[_PRICE])
+            pre_close = float(values[_PRE_CLOSE])
+            high = float(values[_HIGH])
+            low = float(values[_LOW])
+        except ValueError:
+            continue
+        if price == 0:
+            continue                # 停牌或未开盘：现价为 0
+        data[line[11:eq]] = {
+            'name': values[_NAME],
+            'open': _float(values[_OPEN]),
+            'pre_close': pre_close,
+            'price': price,
+            'high': high,
+            'low': low,
+            'volume': _float(values[_VOLUME]),
+            'amount': _float(values[_AMOUNT]),
+            'pct': (price - pre_close) / pre_close * 100 if pre_close != 0 else 0,
+            'date': values[_DATE] if len(values) > _DATE else '',
+            'time': values[_TIME] if len(values) > _TIME else '',
+        }
+    return data
+
+def _float(v):
+    try:
+        return float(v)
+    except ValueError:
+        return 0.0
+
+# ====================== 客户端 ======================
+class SinaQuoteClient:
+    def __init__(self, batch_size=BATCH_SIZE, workers=WORKERS, timeout=TIMEOUT, session=None):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.timeout = timeout
+        self._session = session
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+            s.mount('https://', adapter)
+            s.mount('http://', adapter)
+            s.headers.update(HEADERS)
+            self._session = s
+        return self._session
+
+    def _fetch_batch(self, codes):
+        with tracing.span('sina.hq', 'net', codes=len(codes)) as sp:
+            resp = self.session.get(HQ_URL + ','.join(codes), headers=HEADERS, timeout=self.timeout)
+            sp.set(bytes=len(resp.content))
+        resp.encoding = 'gbk'
+        return parse_hq(resp.text)
+
+    def quotes(self, codes):
+        """批量获取行情；单批失败只丢失该批并打印提示"""
+        codes = [sina_code(c) for c in codes]
+        batches = [codes[i:i + self.batch_size] for i in range(0, len(codes), self.batch_size)]
+        if not batches:
+            return {}
+        data = {}
+        if len(batches) == 1:
+            results = [self._safe_fetch(batches[0])]
+        else:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            results = self._executor.map(self._safe_fetch, batches)
+        for part in results:
+            data.update(part)
+        return data
+
+    def _safe_fetch(self, codes):
+        try:
+            return self._fetch_batch(codes)
+        except Exception as e:
+            print(f"❌ 获取实时行情失败（{len(codes)} 个代码，{codes[0]} 起）: {e}")
+            return {}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._session is not None and hasattr(self._session, 'close'):
+            self._session.close()
+
+# 进程内共享的默认客户端
+default_client = SinaQuoteClient()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+策略健康度指标（面板向量化版）
+对价格/净值面板（日期 × 列）的每一列同时计算：
+    近 10 笔胜率、末尾连续亏损笔数、当前回撤、最大回撤、夏普
+交易段通过持仓变化点切分（np.flatnonzero），段内聚合用 reduceat，不逐列循环
+口径与原 calculate_health_score 一致：
+    - 空仓段（state == flat）计为收益 0 的一笔交易
+    - 最后一段未平仓交易不计入
+"""
+
+import numpy as np
+
+RISK_FREE = 0.02
+RECENT_TRADES = 10
+
+# ====================== 交易段 ======================
+def segment_returns(state, price, flat=0):
+    """
+    state: T × N 持仓状态（整数，flat 表示空仓）；price: T × N 价格或净值
+    返回 (cols, ret)：按列、按时间排序的已平仓交易所属列号和收益
+    """
+    state = np.asarray(state)
+    price = np.asarray(price, dtype='float64')
+    n_days = state.shape[0]
+    change = np.ones(state.shape, dtype=bool)
+    change[1:] = state[1:] != state[:-1]
+    # 按列展开（列优先），相邻两个变化点属于同一列即构成一笔已平仓交易
+    starts = np.flatnonzero(change.T)
+    cols = starts // n_days
+    rows = starts % n_days
+    closed = cols[1:] == cols[:-1]
+    t_cols = cols[:-1][closed]
+    t_start = rows[:-1][closed]
+    t_end = rows[1:][closed]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret = price[t_end, t_cols] / price[t_start, t_cols] - 1
+    ret = np.where(state[t_start, t_cols] == flat, 0.0, ret)
+    return t_cols, ret
+
+def trade_stats(cols, ret, n_cols, recent=RECENT_TRADES):
+    """每列近 recent 笔胜率与末尾连续亏损笔数（cols 需按列排序）"""
+    counts = np.bincount(cols, minlength=n_cols)
+    first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    pos_in_col = np.arange(len(cols)) - first[cols]
+    from_end = counts[cols] - 1 - pos_in_col
+
+    is_recent = from_end < recent
+    wins = np.bincount(cols[is_recent], weights=(ret[is_recent] > 0), minlength=n_cols)
+    n_recent = np.minimum(counts, recent)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rate = np.where(n_recent > 0, wins / n_recent, 0.0)
+
+    # 每列最后一笔盈利交易的位置（无盈利为 -1），之后的都是连续亏损
+    cons_loss = counts.copy()
+    has = counts > 0
+    if len(cols):
+        marks = np.where(ret > 0, pos_in_col, -1)
+        last_win = np.maximum.reduceat(marks, first[has])
+        cons_loss[has] = counts[has] - 1 - last_win
+    return win_rate, cons_loss
+
+# ====================== 净值指标 ======================
+def return_stats(returns, periods_per_year=252, risk_free=RISK_FREE):
+    """returns: T × N 日收益（NaN 表示该列尚无数据），返回 (当前回撤, 最大回撤, 夏普)"""
+    returns = np.asarray(returns, dtype='float64')
+    valid = ~np.isnan(returns)
+    nav = np.cumprod(np.where(valid, 1 + returns, 1.0), axis=0)
+    nav = np.where(valid, nav, np.nan)
+    peak = np.fmax.accumulate(nav, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = (nav - peak) / peak
+        current_dd = drawdown[-1]
+        max_dd = np.nanmin(np.where(valid, drawdown, np.inf), axis=0)
+        max_dd = np.where(np.isinf(max_dd), np.nan, max_dd)
+        n = valid.sum(axis=0)
+        mean = np.nanmean(np.where(valid, returns, np.nan), axis=0)
+        std = np.nanstd(np.where(valid, returns, np.nan), axis=0, ddof=1)
+        vol = std * np.sqrt(periods_per_year)
+        sharpe = np.where((n > 1) & (vol != 0) & ~np.isnan(vol), (mean * periods_per_year - risk_free) / vol, 0.0)
+    return current_dd, max_dd, sharpe
+
+# ====================== 组合 ======================
+def signal_metrics(price, period=20):
+    """
+    对价格面板每列模拟“period 日涨幅 > 0 则持有，否则空仓”，返回各列指标 dict（数组）
+    与原 calculate_health_score 对单个指数的计算口径一致
+    """
+    price = np.asarray(price, dtype='float64')
+    if price.ndim == 1:
+        price = price[:, None]
+    n_days = price.shape[0]
+    ret_n = np.full(price.shape, np.nan)
+    daily = np.full(price.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if n_days > period:
+            ret_n[period:] = price[period:] / price[:-period] - 1
+        daily[1:] = price[1:] / price[:-1] - 1
+    with np.errstate(invalid='ignore'):
+        signal = (ret_n > 0).astype(int)
+    strategy = np.full(price.shape, np.nan)
+    strategy[1:] = signal[:-1] * daily[1:]
+    return _collect(signal, price, strategy, flat=0)
+
+def position_metrics(positions, nav, daily_returns=None, flat=-1):
+    """
+    对回测持仓/净值计算指标（如 backtest.run_backtest 的结果），支持 T × N 多组回测
+    持仓为 flat（ETF_SAFE）的段计为收益 0 的交易
+    """
+    positions = np.asarray(positions)
+    nav = np.asarray(nav, dtype='float64')
+    if positions.ndim == 1:
+        positions = positions[:, None]
+        nav = nav[:, None]
+    if daily_returns is None:
+        daily_returns = np.full(nav.shape, np.nan)
+        daily_returns[1:] = nav[1:] / nav[:-1] - 1
+    elif np.ndim(daily_returns) == 1:
+        daily_returns = np.asarray(daily_returns, dtype='float64')[:, None]
+    return _collect(positions, nav, daily_returns, flat=flat)
+
+def _collect(state, price, returns, flat):
+    cols, ret = segment_returns(state, price, flat=flat)
+    win_rate, cons_loss = trade_stats(cols, ret, state.shape[1])
+    current_dd, max_dd, sharpe = return_stats(returns)
+    return {
+        'win_rate': win_rate,
+        'cons_loss': cons_loss,
+        'current_drawdown': current_dd,
+        'max_drawdown': max_dd,
+        'sharpe': sharpe,
+        'trades': np.bincount(cols, minlength=state.shape[1]),
+    }
+
+def health_scores(m):
+    """按原健康度规则打分（0-100），m 为 signal_metrics / position_metrics 的结果"""
+    win_rate = m['win_rate']
+    cons_loss = m['cons_loss']
+    dd = m['current_drawdown']
+    sharpe = m['sharpe']
+    score = np.select([win_rate >= 0.4, win_rate >= 0.35, win_rate >= 0.3], [30, 20, 10], 0)
+    score = score + np.select([cons_loss <= 2, cons_loss <= 4, cons_loss <= 5], [25, 15, 5], 0)
+    with np.errstate(invalid='ignore'):
+        score = score + np.select([dd >= -0.05, dd >= -0.10, dd >= -0.15], [25, 15, 5], 0)
+    score = score + np.select([sharpe >= 1.0, sharpe >= 0.5, sharpe >= 0], [20, 10, 5], 0)
+    return score
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+确定性合成数据（基准测试 / 离线回放使用）
+同一 seed 生成的数据完全相同，规模可从 11 个品种 × 600 天扩展到数千品种 × 数十年：
+- make_assets()：品种列表（格式同 momentum.ASSETS）
+- make_bars()：各品种日线 {etf_code: DataFrame[date, open, close, high, low, volume]}，
+  含上市晚于起始日的品种和停牌缺失日，用于覆盖面板对齐逻辑
+- make_index()：市场指数日线 DataFrame[date, open, high, low, close, volume]
+- make_news()：新闻 [{title, content}]，含资产/宏观/无关三类
+- make_interventions()：干预建议 [{asset, direction, strength, factor, reason, source}]
+- make_events()：事件配置（格式同 events_config.json）
+"""
+
+import numpy as np
+import pandas as pd
+
+END_DATE = '2026-01-30'             # 固定截止日，保证结果不随运行日期变化
+INTERVENTION_ASSETS = ['创业板', '沪深300', '有色金属', '电力', '黄金', '能源', '半导体']
+INTERVENTION_SOURCES = ['新闻', '北向资金', '主力资金', '大宗商品']
+
+_FILLER = ['市场人士表示', '分析师认为', '据报道', '消息称', '盘面上', '截至收盘', '数据显示', '业内预计']
+_SUBJECTS = ['板块', '个股', '期货', '指数', '龙头', '资金', '机构']
+_UNRELATED = ['天气转凉', '体育赛事', '电影票房', '旅游出行', '消费电子新品发布', '教育改革']
+
+def trading_dates(n_bars, end=END_DATE):
+    """截止到 end 的最近 n_bars 个工作日"""
+    return pd.bdate_range(end=end, periods=n_bars)
+
+def make_assets(n_assets):
+    return [{"name": f"合成ETF{i:04d}", "etf_code": f"{510000 + i:06d}.{'SH' if i % 2 == 0 else 'SZ'}"}
+            for i in range(n_assets)]
+
+def _ohlc(rng, n_bars, start_price, drift=0.0003, vol=0.018):
+    """带趋势切换的几何随机游走，返回 (open, high, low, close, volume) 数组"""
+    # 每约 60 天切换一次趋势方向，使动量/ADX 有明显的趋势段和震荡段
+    regime = np.repeat(rng.normal(0, 0.002, n_bars // 60 + 1), 60)[:n_bars]
+    ret = rng.normal(drift, vol, n_bars) + regime
+    close = start_price * np.exp(np.cumsum(ret))
+    prev = np.concatenate(([start_price], close[:-1]))
+    open_ = prev * np.exp(rng.normal(0, vol / 3, n_bars))
+    spread = np.abs(rng.normal(0, vol / 2, n_bars))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, vol / 2, n_bars)))
+    volume = rng.lognormal(13, 0.6, n_bars).round()
+    return open_, high, low, close, volume
+
+def make_bars(assets, n_bars, seed=0, late_listing=0.1, gap_ratio=0.002, end=END_DATE):
+    """
+    end：最后一个交易日（离线回放时传入今天，使数据落在各模块按当前日期计算的窗口内）
+    late_listing：上市晚于起始日的品种比例（前段无数据）
+    gap_ratio：随机停牌（当日无 bar）比例
+    """
+    rng = np.random.default_rng(seed)
+    dates = trading_dates(n_bars, end)
+    frames = {}
+    for asset in assets:
+        open_, high, low, close, volume = _ohlc(rng, n_bars, rng.uniform(0.8, 5.0))
+        keep = rng.random(n_bars) >= gap_ratio
+        keep[-1] = True                              # 最后一天都有数据
+        if rng.random() < late_listing:
+            keep[:int(rng.uniform(0.1, 0.6) * n_bars)] = False
+        frames[asset["etf_code"]] = pd.DataFrame({
+            'date': dates[keep],
+            'open': open_[keep].round(3),
+            'close': close[keep].round(3),
+            'high': high[keep].round(3),
+            'low': low[keep].round(3),
+            'volume': volume[keep],
+        }).reset_index(drop=True)
+    return frames
+
+def make_index(n_bars, seed=0, start_price=2000.0, end=END_DATE):
+    rng = np.random.default_rng(seed + 10_000)
+    open_, high, low, close, volume = _ohlc(rng, n_bars, start_price, vol=0.015)
+    return pd.DataFrame({
+        'date': trading_dates(n_bars, end),
+        'open': open_.round(2),
+        'high': high.round(2),
+        'low': low.round(2),
+        'close': close.round(2),
+        'volume': volume,
+    })
+
+def make_news(n_news, seed=0, unrelated_ratio=0.3, macro_ratio=0.15):
+    """按 news_fetcher 的关键词表拼出标题和正文，保证分类结果覆盖各分支"""
+    from news_fetcher import ASSET_KEYWORDS, MACRO_KEYWORDS, POSITIVE_WORDS, NEGATIVE_WORDS
+    rng = np.random.default_rng(seed + 20_000)
+    assets = list(ASSET_KEYWORDS)
+    items = []
+    for i in range(n_news):
+        kind = rng.random()
+        sentiment = list(rng.choice(POSITIVE_WORDS + NEGATIVE_WORDS, size=rng.integers(0, 4)))
+        filler = list(rng.choice(_FILLER, size=rng.integers(2, 6)))
+        if kind < unrelated_ratio:
+            topic = str(rng.choice(_UNRELATED))
+        elif kind < unrelated_ratio + macro_ratio:
+            topic = str(rng.choice(MACRO_KEYWORDS))
+        else:
+            topic = str(rng.choice(ASSET_KEYWORDS[assets[rng.integers(len(assets))]]))
+        title = f"{topic}{rng.choice(_SUBJECTS)}{''.join(sentiment[:1])} 第{i}条"
+        content = '，'.join(filler + [topic] + sentiment) + '。'
+        items.append({'title': title, 'content': content})
+    return items
+
+def make_interventions(n_items, seed=0, assets=None, sources=None):
+    rng = np.random.default_rng(seed + 30_000)
+    assets = assets or INTERVENTION_ASSETS
+    sources = sources or INTERVENTION_SOURCES
+    items = []
+    for i in range(n_items):
+        direction = 'bull' if rng.random() < 0.55 else 'bear'
+        strength = int(rng.integers(1, 6))
+        step = (strength - 3) * 0.1
+        items.append({
+            'asset': str(assets[rng.integers(len(assets))]),
+            'direction': direction,
+            'strength': strength,
+            'factor': round(1.0 + step if direction == 'bull' else 1.0 - step, 2),
+            'reason': f"合成建议{i}",
+            'source': str(sources[rng.integers(len(sources))]),
+        })
+    return items
+
+def make_events(assets, n_events, n_bars, seed=0):
+    """随机区间的事件：约 1/4 为强制仓位事件（force_ratio），其余为动量因子调整（factor）"""
+    rng = np.random.default_rng(seed + 40_000)
+    dates = trading_dates(n_bars)
+    events = []
+    for i in range(n_events):
+        start = int(rng.integers(0, n_bars))
+        end = min(n_bars - 1, start + int(rng.integers(1, 40)))
+        affected = [assets[j]['name'] for j in rng.choice(len(assets), size=min(len(assets), int(rng.integers(1, 4))), replace=False)]
+        event = {
+            'name': f"合成事件{i}",
+            'description': f"合成事件{i}说明",
+            'start_date': dates[start].strftime('%Y-%m-%d'),
+            'end_date': dates[end].strftime('%Y-%m-%d'),
+            'affected_assets': affected,
+        }
+        if rng.random() < 0.25:
+            event['force_ratio'] = round(float(rng.uniform(0.3, 1.0)), 2)
+        else:
+            event['factor'] = round(float(rng.uniform(0.7, 1.3)), 2)
+        events.append(event)
+    return events
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+通达信长连接池 + 并发拉取引擎
+- ServerHealth：每个服务器 IP 的延迟 EWMA、失败率 EWMA 与熔断状态，保存在 cache/tdx_servers.json 跨运行复用
+- TdxClientPool：维护少量长连接 mootdx 客户端，按需创建、借出/归还；新建连接时选评分最好的健康服务器，
+  出错的连接丢弃并换下一个 IP；连续失败的服务器熔断一段时间，冷却后再试
+- fetch_parallel：后台（daemon）线程并发拉取多个品种，限制并发数，并对单个品种设置超时
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import tracing
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = 30        # 单个品种最长等待秒数
+HEALTH_FILE = os.path.join('cache', 'tdx_servers.json')
+EWMA_ALPHA = 0.3            # 新样本权重
+UNKNOWN_LATENCY = 1.0       # 没有记录的服务器按 1 秒估计（排在已知快速服务器之后、故障服务器之前）
+FAILURE_PENALTY = 10.0      # 评分 = 延迟 EWMA × (1 + FAILURE_PENALTY × 失败率)
+BREAKER_FAILURES = 2        # 连续失败次数达到后熔断
+BREAKER_COOLDOWN = 600      # 熔断时长（秒），到期后放行一次试探
+PROBE_INTERVAL = 86400      # 距上次测速超过此秒数时，连接池首次使用前重新测速
+PROBE_SYMBOL = '510300'     # 测往返延迟用的品种（取 1 根日线）
+PROBE_TIMEOUT = 2           # 测速时的连接超时（秒），不可达的服务器最多耽误这么久
+MAX_CONNECT_ATTEMPTS = 3    # 单次建连最多尝试的服务器数
+
+# ====================== 服务器健康度 ======================
+class ServerHealth:
+    """按 IP 记录 {latency, fail_rate, failures, open_until, samples, updated}，线程安全"""
+    def __init__(self, path=HEALTH_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.probed_at = 0.0
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._stats = data.get('servers', {})
+                self.probed_at = data.get('probed_at', 0.0)
+            except Exception:
+                self._stats = {}
+
+    def stats(self, ip):
+        with self._lock:
+            return dict(self._stats.get(ip, {}))
+
+    def _entry(self, ip):
+        return self._stats.setdefault(ip, {'latency': None, 'fail_rate': 0.0, 'failures': 0,
+                                           'open_until': 0.0, 'samples': 0, 'updated': 0.0})
+
+    def record_success(self, ip, latency=None):
+        """latency 为建连 / 测速耗时；普通请求成功只更新失败率（请求耗时与数据量有关，不计入延迟）"""
+        with self._lock:
+            e = self._entry(ip)
+            if latency is not None:
+                e['latency'] = latency if e['latency'] is None else (1 - EWMA_ALPHA) * e['latency'] + EWMA_ALPHA * latency
+            e['fail_rate'] = (1 - EWMA_ALPHA) * e['fail_rate']
+            e['failures'] = 0
+            e['open_until'] = 0.0
+            e['samples'] += 1
+            e['updated'] = time.time()
+
+    def record_failure(self, ip, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            e = self._entry(ip)
+            e['fail_rate'] = (1 - EWMA_ALPHA) * e['fail_rate'] + EWMA_ALPHA
+            e['failures'] += 1
+            e['samples'] += 1
+            e['updated'] = now
+            if e['failures'] >= BREAKER_FAILURES:
+                e['open_until'] = now + BREAKER_COOLDOWN
+
+    def is_open(self, ip, now=None):
+        """熔断中（冷却未到期）返回 True"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._stats.get(ip, {}).get('open_until', 0.0) > now
+
+    def score(self, ip):
+        """越小越好"""
+        with self._lock:
+            e = self._stats.get(ip)
+            if not e or e['latency'] is None:
+                latency = UNKNOWN_LATENCY
+                fail_rate = e['fail_rate'] if e else 0.0
+            else:
+                latency, fail_rate = e['latency'], e['fail_rate']
+        return latency * (1 + FAILURE_PENALTY * fail_rate)
+
+    def rank(self, ips, now=None):
+        """健康服务器按评分升序在前；熔断中的服务器按解除时间排在最后（全部熔断时仍有可用顺序）"""
+        now = time.time() if now is None else now
+        healthy = [ip for ip in ips if not self.is_open(ip, now)]
+        broken = [ip for ip in ips if ip not in healthy]
+        healthy.sort(key=self.score)
+        broken.sort(key=lambda ip: self.stats(ip).get('open_until', 0.0))
+        return healthy + broken
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._lock:
+            data = {'probed_at': self.probed_at, 'servers': self._stats}
+            tmp = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+# ====================== 连接池 ======================
+class TdxClientPool:
+    def __init__(self, ips, size=DEFAULT_POOL_SIZE, connect_timeout=5, health=None, probe_interval=PROBE_INTERVAL):
+        """health：ServerHealth（默认读写 cache/tdx_servers.json，传 ServerHealth(None) 不落盘）"""
+        self.ips = list(ips)
+        self.size = size
+        self.connect_timeout = connect_timeout
+        self.health = health if health is not None else ServerHealth()
+        self.probe_interval = probe_interval
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0           # 已建立且未关闭的连接数（空闲 + 借出），只在连接关闭时减少
+        self._generation = 0        # close_all 后递增，旧一代连接归还时直接关闭
+        self._probe_lock = threading.Lock()
+        self._probed = False
+
+    def _open(self, ip, timeout=None):
+        from mootdx.quotes import Quotes
+        # 使用指定IP快速连接，避免 mootdx 自带的全量测速
+        with tracing.span('tdx.connect', 'net', ip=ip):
+            client = Quotes.factory(market='std', bestip=False, ip=ip, timeout=timeout or self.connect_timeout)
+        client.pool_ip = ip
+        client.pool_generation = self._generation
+        return client
+
+    def _connect(self):
+        """按评分依次尝试服务器，失败的记入健康度并立即换下一个"""
+        self._ensure_probed()
+        error = None
+        for ip in self.health.rank(self.ips)[:MAX_CONNECT_ATTEMPTS]:
+            t0 = time.monotonic()
+            try:
+                client = self._open(ip)
+            except Exception as e:
+                self.health.record_failure(ip)
+                print(f"⚠️ 通达信服务器 {ip} 连接失败: {e}")
+                error = e
+                continue
+            self.health.record_success(ip, time.monotonic() - t0)
+            return client
+        raise error or ConnectionError("没有可用的通达信服务器")
+
+    # ---------- 测速 ----------
+    def _ensure_probed(self):
+        """距上次测速超过 probe_interval（或有从未连接过的 IP）时，首次建连前并发测速一次"""
+        if self._probed:
+            return
+        with self._probe_lock:
+            if self._probed:
+                return
+            # probe_interval=None 表示从不测速
+            if self.probe_interval is not None:
+                stale = time.time() - self.health.probed_at > self.probe_interval
+                unknown = any(not self.health.stats(ip).get('samples') for ip in self.ips)
+                if stale or unknown:
+                    self.probe()
+            self._probed = True
+
+    def probe(self, ips=None):
+        """
+        并发测每个服务器的建连 + 一次往返（取 1 根日线）耗时，结果记入健康度并保存
+        返回 {ip: 秒数或 None}；总耗时不超过 PROBE_TIMEOUT 加一次往返
+        """
+        ips = list(ips or self.ips)
+
+        def one(ip):
+            t0 = time.monotonic()
+            client = None
+            try:
+                client = self._open(ip, timeout=PROBE_TIMEOUT)
+                client.bars(symbol=PROBE_SYMBOL, frequency=9, offset=1, start=0)
+                return time.monotonic() - t0
+            finally:
+                if client is not None:
+                    self._close(client)
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=len(ips) or 1) as executor:
+            futures = {executor.submit(one, ip): ip for ip in ips}
+            for fut, ip in futures.items():
+                try:
+                    results[ip] = fut.result()
+                    self.health.record_success(ip, results[ip])
+                except Exception:
+                    results[ip] = None
+                    self.health.record_failure(ip)
+        self.health.probed_at = time.time()
+        self.health.save()
+        ok = sorted((t, ip) for ip, t in results.items() if t is not None)
+        if ok:
+            print(f"📡 通达信测速：{len(ok)}/{len(ips)} 可用，最快 {ok[0][1]}（{ok[0][0] * 1000:.0f}ms）")
+        return results
+
+    def acquire(self, timeout=None):
+        """借出一个客户端：优先复用空闲连接，未满时新建，满了则等待归还"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get(timeout=timeout)
+
+    def release(self, client, broken=False):
+        """
+        归还客户端；broken=True 时关闭并丢弃，下次借出时会连接下一个 IP
+        close_all 之前借出的连接（如超时任务迟迟才归还）同样关闭，不再放回空闲队列
+        """
+        with self._lock:
+            stale = getattr(client, 'pool_generation', self._generation) != self._generation
+            if not broken and not stale:
+                self._idle.put(client)
+                return
+            self._created -= 1
+        self._close(client)
+
+    @contextmanager
+    def client(self, timeout=None):
+        """借出客户端；请求出错计为所连服务器的一次失败，成功则清零连续失败次数"""
+        c = self.acquire(timeout=timeout)
+        ip = getattr(c, 'pool_ip', None)
+        try:
+            yield c
+        except Exception:
+            if ip:
+                self.health.record_failure(ip)
+            self.release(c, broken=True)
+            raise
+        else:
+            if ip:
+                self.health.record_success(ip)
+            self.release(c)
+
+    @staticmethod
+    def _close(client):
+        try:
+            close = getattr(client, 'close', None)
+            if close:
+                close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        """
+        关闭空闲连接并保存服务器健康度；连接池之后仍可继续使用
+        仍被借出的连接（超时后还在运行的任务）不计为已关闭，由其归还时关闭，连接数不会超过 size
+        """
+        closed = []
+        with self._lock:
+            self._generation += 1
+            while True:
+                try:
+                    closed.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+            self._created -= len(closed)
+            borrowed = self._created
+        for c in closed:
+            self._close(c)
+        if borrowed:
+            print(f"⚠️ 还有 {borrowed} 个通达信连接被未结束的任务占用，归还时关闭")
+        self.health.save()
+
+# ====================== 并发拉取 ======================
+def fetch_parallel(keys, fetch_fn, max_workers=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+    """
+    并发执行 fetch_fn(key)，返回 {key: 结果}
+    单个 key 从开始执行起超过 timeout 秒视为失败（结果为 None），不阻塞其他品种
+    注意：超时只是不再等待结果，执行中的请求无法中断——它借出的连接在请求真正返回、归还之前一直被占用，
+    期间连接池可用连接相应减少；工作线程为 daemon 线程，进程退出时不会等待这些请求
+    """
+    results = {k: None for k in keys}
+    if not keys:
+        return results
+    started = {}
+    tasks = queue.Queue()
+    pending = {}
+    for k in keys:
+        fut = Future()
+        pending[fut] = k
+        tasks.put((fut, k))
+
+    def worker():
+        while True:
+            try:
+                fut, key = tasks.get_nowait()
+            except queue.Empty:
+                return
+            if not fut.set_running_or_notify_cancel():
+                continue
+            started[key] = time.monotonic()
+            try:
+                fut.set_result(fetch_fn(key))
+            except BaseException as e:
+                fut.set_exception(e)
+
+    for _ in range(min(max_workers, len(keys))):
+        threading.Thread(target=worker, daemon=True).start()
+    try:
+        while pending:
+            done, _ = wait(list(pending), timeout=0.5, return_when=FIRST_COMPLETED)
+            for fut in done:
+                key = pending.pop(fut)
+                try:
+                    results[key] = fut.result()
+                except Exception as e:
+                    print(f"❌ {key} 拉取异常: {e}")
+            now = time.monotonic()
+            for fut, key in list(pending.items()):
+                if key in started and now - started[key] > timeout:
+                    print(f"⚠️ {key} 超过 {timeout}s 未返回，放弃")
+                    fut.cancel()
+                    pending.pop(fut)
+    finally:
+        # 异常退出时取消尚未开始的任务；超时的任务不再等待，daemon 线程结束后自行退出
+        for fut in pending:
+            fut.cancel()
+    return results
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测与实盘决策一致性：逐日用 momentum.decide 重放同一批事件，与 backtest.run_backtest 的持仓逐日比对
+重点覆盖同一天多个品种被强制、force_ratio 为 0 的情况
+运行：python -m pytest -q test_backtest.py
+"""
+
+import numpy as np
+
+import momentum
+import synthetic_data
+from backtest import run_backtest, SAFE
+from event_index import EventIndex
+from price_panel import PricePanel
+
+PERIOD = 20
+N_BARS = 600
+
+def _fixture(seed=3):
+    assets = synthetic_data.make_assets(6)
+    bars = synthetic_data.make_bars(assets, N_BARS, seed=seed)
+    panel = PricePanel.from_frames(bars, [a['etf_code'] for a in assets])
+    events = synthetic_data.make_events(assets, 120, N_BARS, seed=seed)
+    # 追加一批 0% 强制事件，与其他强制事件重叠
+    rng = np.random.default_rng(seed)
+    dates = synthetic_data.trading_dates(N_BARS)
+    for i in range(15):
+        start = int(rng.integers(0, N_BARS - 30))
+        events.append({
+            'name': f"清仓事件{i}",
+            'start_date': dates[start].strftime('%Y-%m-%d'),
+            'end_date': dates[start + 25].strftime('%Y-%m-%d'),
+            'affected_assets': [assets[int(rng.integers(len(assets)))]['name']],
+            'force_ratio': 0,
+        })
+    return assets, panel, events
+
+def _live_decision(panel, names, scores_row, events, day):
+    """按实盘流程得到 day 当天的决策：active_events → event_adjustments → 排序 → decide"""
+    event_factors, event_force = momentum.event_adjustments(momentum.active_events(events, day))
+    asset_momentums = []
+    for j in np.flatnonzero(~np.isnan(scores_row)):
+        adjusted = scores_row[j] * event_factors.get(names[j], 1.0)
+        asset_momentums.append({'name': names[j], 'etf_code': panel.codes[j],
+                                'momentum': float(scores_row[j]), 'adjusted_momentum': float(adjusted)})
+    asset_momentums.sort(key=lambda a: a['adjusted_momentum'], reverse=True)
+    decision = momentum.decide(asset_momentums, None, event_force)
+    forced = next((n for n in event_force if any(a['name'] == n for a in asset_momentums)), None)
+    return decision, forced, event_force.get(forced)
+
+def test_backtest_matches_decide_on_forced_days():
+    assets, panel, events = _fixture()
+    names = [a['name'] for a in assets]
+    factors, force, priority = EventIndex(events).matrices(panel.dates, names)
+    result = run_backtest(panel, momentum_period=PERIOD, factors=factors, force=force,
+                          force_priority=priority, start=PERIOD)
+    raw = panel.rolling_returns(PERIOD)
+
+    multi_force_days = zero_force_days = 0
+    for t in range(PERIOD, len(panel)):
+        day = str(panel.dates[t])
+        decision, forced, ratio = _live_decision(panel, names, raw[t], events, day)
+        pos = result['positions'][t]
+        live = decision['best']['name'] if decision['best'] else None
+        assert (names[pos] if pos != SAFE else None) == live, day
+        if forced is not None:
+            assert result['weights'][t, pos] == ratio, day
+            assert result['weights'][t, -1] == 1.0 - ratio, day
+            multi_force_days += np.count_nonzero(~np.isnan(force[t]) & ~np.isnan(raw[t])) > 1
+            zero_force_days += ratio == 0
+    assert multi_force_days > 0
+    assert zero_force_days > 0
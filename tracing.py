@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流水线埋点：各阶段 / 各次网络请求的耗时、CPU 时间、内存峰值、请求字节数
+- span(name, cat, **args)：with 语句包住一段代码；未开启时返回共享的空对象，几乎没有开销
+- traced(cat)：装饰器版本，未开启时直接调用原函数
+- session(name)：开启一次采集，结束时写出
+      traces/trace_YYYYmmdd_HHMMSS.json   Chrome trace-event 格式（chrome://tracing 或 Perfetto 打开）
+      traces/summary.csv                  每次运行按 span 名称汇总一行，跨运行累积，便于对比
+开启方式：python momentum.py --trace，或环境变量 ETF_TRACE=1
+查看历史：python tracing.py [--last 5]
+cat 约定：stage（流水线阶段）/ step（阶段内步骤）/ net（网络请求，args 中带 bytes）
+CPU 时间：stage/step 为进程 CPU（含工作线程），net 为所在线程 CPU；内存峰值只统计主线程的 stage/step
+"""
+
+import os
+import csv
+import json
+import time
+import threading
+import tracemalloc
+from functools import wraps
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+TRACE_DIR = os.environ.get('ETF_TRACE_DIR', 'traces')
+SUMMARY_FILE = 'summary.csv'
+SUMMARY_COLUMNS = ['run', 'session', 'name', 'cat', 'calls', 'wall_ms', 'cpu_ms', 'peak_mb', 'bytes', 'errors']
+_MEMORY_CATS = ('stage', 'step')
+
+_active = None                      # 当前采集中的 Tracer，None 表示未开启
+
+def enabled():
+    return _active is not None
+
+# ====================== 空实现（未开启时） ======================
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+_NULL = _NullSpan()
+
+def span(name, cat='step', **args):
+    if _active is None:
+        return _NULL
+    return _Span(_active, name, cat, args)
+
+def traced(cat='stage', name=None):
+    """函数装饰器：以函数名（或 name）记录一个 span"""
+    def deco(fn):
+        label = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*a, **kw):
+            if _active is None:
+                return fn(*a, **kw)
+            with _Span(_active, label, cat, {}):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
+
+# ====================== 采集 ======================
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'args', 't0', 'cpu0', 'memory', 'mem0', 'peak')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.memory = tracer.memory and cat in _MEMORY_CATS and threading.get_ident() == tracer.thread
+        self.peak = 0
+
+    def set(self, **args):
+        """补充记录（如响应字节数）"""
+        self.args.update(args)
+
+    def _cpu(self):
+        return time.process_time() if self.cat in _MEMORY_CATS else time.thread_time()
+
+    def __enter__(self):
+        if self.memory:
+            self.tracer.push_memory(self)
+        self.cpu0 = self._cpu()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.t0
+        cpu = self._cpu() - self.cpu0
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        if self.memory:
+            self.tracer.pop_memory(self)
+            self.args['peak_mb'] = round(self.peak / 1e6, 3)
+        self.args['cpu_ms'] = round(cpu * 1000, 3)
+        self.tracer.add(self, wall)
+        return False
+
+class Tracer:
+    def __init__(self, name='run', memory=True):
+        self.name = name
+        self.memory = memory
+        self.thread = threading.get_ident()
+        self.events = []
+        self.started_at = datetime.now()
+        self._origin = time.perf_counter()
+        self._mem_stack = []
+        self._own_tracemalloc = False
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracemalloc = True
+
+    # ---------- 内存峰值（嵌套 span 共用 tracemalloc 的峰值，切换前先把峰值并入外层） ----------
+    def _fold_peak(self):
+        current, peak = tracemalloc.get_traced_memory()
+        for s in self._mem_stack:
+            s.peak = max(s.peak, peak - s.mem0)
+        return current
+
+    def push_memory(self, s):
+        current = self._fold_peak()
+        tracemalloc.reset_peak()
+        s.mem0 = current
+        self._mem_stack.append(s)
+
+    def pop_memory(self, s):
+        self._fold_peak()
+        self._mem_stack.remove(s)
+
+    def add(self, s, wall):
+        # list.append 是原子操作，工作线程可直接追加
+        self.events.append({
+            'name': s.name,
+            'cat': s.cat,
+            'ph': 'X',
+            'ts': round((s.t0 - self._origin) * 1e6, 1),
+            'dur': round(wall * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': s.args,
+        })
+
+    def stop(self):
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+
+    # ---------- 汇总与输出 ----------
+    def summary(self):
+        """按 (name, cat) 汇总：调用次数、总耗时、总 CPU、最大内存峰值、总字节、失败次数"""
+        rows = {}
+        for e in self.events:
+            r = rows.setdefault((e['name'], e['cat']), {
+                'name': e['name'], 'cat': e['cat'], 'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0,
+                'peak_mb': None, 'bytes': 0, 'errors': 0, 'first': e['ts']})
+            a = e['args']
+            r['calls'] += 1
+            r['wall_ms'] += e['dur'] / 1000
+            r['cpu_ms'] += a.get('cpu_ms', 0.0)
+            if 'peak_mb' in a:
+                r['peak_mb'] = max(r['peak_mb'] or 0.0, a['peak_mb'])
+            r['bytes'] += int(a.get('bytes', 0) or 0)
+            r['errors'] += 'error' in a
+        return sorted(rows.values(), key=lambda r: r['first'])
+
+    def write(self, trace_dir=None):
+        """写出 Chrome trace JSON 并把汇总追加到 summary.csv，返回 trace 文件路径"""
+        trace_dir = trace_dir or TRACE_DIR
+        os.makedirs(trace_dir, exist_ok=True)
+        run = self.started_at.strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(trace_dir, f'trace_{run}.json')
+        names = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': self.thread,
+                  'args': {'name': 'main'}}]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': names + self.events, 'displayTimeUnit': 'ms',
+                       'otherData': {'session': self.name, 'started_at': self.started_at.isoformat()}},
+                      f, ensure_ascii=False)
+        summary_path = os.path.join(trace_dir, SUMMARY_FILE)
+        is_new = not os.path.exists(summary_path)
+        with open(summary_path, 'a', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS, extrasaction='ignore')
+            if is_new:
+                writer.writeheader()
+            for r in self.summary():
+                writer.writerow({**r, 'run': run, 'session': self.name,
+                                 'wall_ms': round(r['wall_ms'], 1), 'cpu_ms': round(r['cpu_ms'], 1),
+                                 'peak_mb': '' if r['peak_mb'] is None else r['peak_mb']})
+        return path
+
+def print_summary(rows):
+    print(f"{'span':<28}{'类别':<7}{'次数':>6}{'耗时(ms)':>12}{'CPU(ms)':>11}{'峰值(MB)':>10}{'KB':>10}{'失败':>6}")
+    for r in rows:
+        peak = '-' if r['peak_mb'] in (None, '') else f"{float(r['peak_mb']):.2f}"
+        print(f"{r['name']:<28}{r['cat']:<7}{int(r['calls']):>6}{float(r['wall_ms']):>12.1f}"
+              f"{float(r['cpu_ms']):>11.1f}{peak:>10}{int(r['bytes']) / 1e3:>10.1f}{int(r['errors']):>6}")
+
+def maybe_session(name, on=None):
+    """on 为真（默认看环境变量 ETF_TRACE）时开启 session，否则什么都不做"""
+    if on is None:
+        on = bool(os.environ.get('ETF_TRACE'))
+    return session(name) if on else nullcontext()
+
+@contextmanager
+def session(name='run', memory=True, trace_dir=None):
+    """开启采集（同一时间只允许一个），结束时写文件并打印汇总"""
+    global _active
+    if _active is not None:
+        yield _active
+        return
+    tracer = _active = Tracer(name, memory)
+    try:
+        with span(name, 'stage'):
+            yield tracer
+    finally:
+        _active = None
+        tracer.stop()
+        path = tracer.write(trace_dir)
+        print("="*60)
+        print_summary(tracer.summary())
+        print(f"🧭 trace 已写入 {path}（chrome://tracing 打开），汇总追加至 {os.path.join(trace_dir or TRACE_DIR, SUMMARY_FILE)}")
+
+# ====================== 历史对比 ======================
+def load_summary(trace_dir=None):
+    path = os.path.join(trace_dir or TRACE_DIR, SUMMARY_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='查看最近几次运行的 span 耗时对比')
+    parser.add_argument('--last', type=int, default=5)
+    parser.add_argument('--dir', default=None)
+    parser.add_argument('--cat', default=None, help='只看某一类（stage / step / net）')
+    args = parser.parse_args()
+    rows = [r for r in load_summary(args.dir) if args.cat is None or r['cat'] == args.cat]
+    runs = sorted({r['run'] for r in rows})[-args.last:]
+    if not runs:
+        print("暂无记录（先用 python momentum.py --trace 运行一次）")
+        return
+    table = {}
+    for r in rows:
+        if r['run'] in runs:
+            table.setdefault((r['name'], r['cat']), {})[r['run']] = float(r['wall_ms'])
+    print(f"{'span':<28}{'类别':<7}" + ''.join(f"{run[4:13]:>14}" for run in runs))
+    for (name, cat), values in table.items():
+        cells = ''.join(f"{values[run]:>14.1f}" if run in values else f"{'-':>14}" for run in runs)
+        print(f"{name:<28}{cat:<7}{cells}")
+
+if __name__ == "__main__":
+    main()